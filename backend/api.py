@@ -1,9 +1,14 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Any
 from pathlib import Path
 from datetime import datetime
+import asyncio
+import os
+import tempfile
+import threading
 
 # Initialize FastAPI app FIRST
 app = FastAPI(
@@ -31,7 +36,11 @@ app.add_middleware(
 
 # Import AI components
 from boogasi_ai_model.ai_insights import generate_insights, load_learned_patterns
-from boogasi_ai_model.ocr_system import BankStatementParser
+from boogasi_ai_model.deadline import Deadline, DeadlineExceeded, deadline_scope
+from boogasi_ai_model.insight_precompute import InsightPrecomputer
+from boogasi_ai_model.ocr_system import IMAGE_EXTENSIONS, BankStatementParser, BoogasiOCRSystem
+from boogasi_ai_model.result_builder import dumps
+from boogasi_ai_model.tracing import TRACE_DIR, TRACE_ENABLED, TRACE_HEADER_ENABLED, trace, trace_header_value
 
 # Initialize patterns AFTER app creation
 BASE_DIR = Path(__file__).parent
@@ -47,6 +56,111 @@ try:
 except Exception as e:
     print(f"⚠️ Warning: Could not load patterns: {e}")
 
+# Read-only parser state (patterns, compiled category index, model artifacts) is
+# built once here. Under gunicorn with preload_app (see gunicorn.conf.py) this runs
+# in the master and forked workers share it copy-on-write.
+statement_parser = BankStatementParser(
+    learned_patterns=patterns,
+    model_artifacts=MODEL_FILE
+)
+
+# Insights for parsed documents are computed in the background right after parsing
+precomputer = InsightPrecomputer(
+    max_workers=int(os.environ.get("BOOGASI_PRECOMPUTE_WORKERS", "2")),
+    max_documents=int(os.environ.get("BOOGASI_PRECOMPUTE_DOCUMENTS", "256")),
+)
+
+# Seconds a JSON endpoint may spend parsing and computing insights (0 = no limit)
+REQUEST_TIMEOUT = float(os.environ.get("BOOGASI_REQUEST_TIMEOUT", "60"))
+# Seconds an uploaded document may spend in OCR and parsing (0 = no limit);
+# batch, CLI and daemon runs are not limited unless BOOGASI_DOCUMENT_TIMEOUT is set
+DOCUMENT_TIMEOUT = float(os.environ.get("BOOGASI_API_DOCUMENT_TIMEOUT", "120"))
+
+def _timeout_error(deadline: Deadline, stage: str) -> HTTPException:
+    return HTTPException(status_code=504, detail=f"Timed out after {deadline.seconds:g}s during {stage}")
+
+async def _run_blocking(deadline: Deadline, stage: str, func, *args):
+    """
+    Run blocking work (parsing, insights) in a thread under the request deadline.
+    The thread sees the deadline (check_deadline) and stops at its next check
+    once the endpoint has given up with a 504.
+    """
+    with deadline_scope(deadline):
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(func, *args), deadline.remaining())
+        except (asyncio.TimeoutError, DeadlineExceeded):
+            deadline.cancel()
+            raise _timeout_error(deadline, stage)
+
+async def _precomputed_insight(document_id: Optional[str], feature: str,
+                               deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+    """
+    Await a precomputed result without blocking the event loop; None on miss/failure.
+    Raises a 504 when the deadline runs out first (the computation itself keeps going
+    for later requests).
+    """
+    pending = precomputer.future(document_id, feature) if document_id else None
+    if pending is None or pending.cancelled():
+        return None
+    timeout = deadline.remaining() if deadline is not None else None
+    try:
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(pending)), timeout)
+    except asyncio.TimeoutError:
+        raise _timeout_error(deadline, f"precomputed {feature}")
+    except asyncio.CancelledError:
+        # The precomputation was cancelled (not this request): compute it instead
+        if pending.cancelled():
+            return None
+        raise
+    except Exception:
+        return None
+
+# OCR for uploaded documents, created on first use (needs the Tesseract engine)
+API_OCR_CACHE = os.environ.get("BOOGASI_API_OCR_CACHE", "").lower() in ("1", "true", "yes", "on")
+_ocr_system: Optional[BoogasiOCRSystem] = None
+_ocr_lock = threading.Lock()
+
+def _get_ocr_system() -> BoogasiOCRSystem:
+    global _ocr_system
+    with _ocr_lock:
+        if _ocr_system is None:
+            # No duplicate index: it is shared by every caller, and uploads come from different users.
+            # For the same reason uploads are not kept in the OCR cache unless BOOGASI_API_OCR_CACHE=1
+            _ocr_system = BoogasiOCRSystem(insight_precomputer=precomputer, duplicate_detection=False,
+                                           ocr_cache=API_OCR_CACHE)
+        return _ocr_system
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by result_builder.dumps (orjson when installed).
+
+    Endpoints return it directly so large insight payloads skip FastAPI's
+    per-value jsonable_encoder walk.
+    """
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+TRACE_HEADER = "X-Boogasi-Trace"
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Record a stage timing tree for the request when BOOGASI_TRACE is set or,
+    with BOOGASI_TRACE_HEADER set on the server, the client sends
+    `X-Boogasi-Trace: 1`. The tree is then returned in the X-Boogasi-Trace
+    response header (and written to BOOGASI_TRACE_DIR when tracing is enabled
+    server-side). Untraced requests pass straight through.
+    """
+    wants_header = (TRACE_HEADER_ENABLED and
+                    request.headers.get(TRACE_HEADER, "").strip().lower() in ("1", "true", "yes", "on"))
+    if not (TRACE_ENABLED or wants_header):
+        return await call_next(request)
+    with trace(f"{request.method} {request.url.path}",
+               dump_dir=TRACE_DIR if TRACE_ENABLED else None) as root:
+        response = await call_next(request)
+    if wants_header:
+        response.headers[TRACE_HEADER] = trace_header_value(root)
+    return response
+
 # Pydantic models
 class TransactionBase(BaseModel):
     date: str
@@ -57,7 +171,45 @@ class TransactionBase(BaseModel):
 
 class InsightRequest(BaseModel):
     feature: str
-    transactions: List[TransactionBase]
+    transactions: List[TransactionBase] = []
+    document_id: Optional[str] = None  # from /api/parse-and-insights; served from precomputed results
+
+DOCUMENT_EXTENSIONS = IMAGE_EXTENSIONS + ('.pdf',)
+# Most transactions sent in one "transactions" event
+STREAM_BATCH_SIZE = int(os.environ.get("BOOGASI_STREAM_BATCH", "25"))
+# Most documents OCR'd at once (like the tesserocr engine pool: one per CPU);
+# uploads beyond that get a 503 instead of another Tesseract process
+STREAM_DOCUMENTS = int(os.environ.get("BOOGASI_API_DOCUMENTS", os.environ.get("BOOGASI_OCR_ENGINE_WORKERS")
+                                      or os.cpu_count() or 1))
+_document_slots = threading.BoundedSemaphore(STREAM_DOCUMENTS)
+
+def _sse(event: str, data: Any) -> bytes:
+    """One Server-Sent Events message (compact JSON payload, no raw newlines)."""
+    return b"event: " + event.encode("ascii") + b"\ndata: " + dumps(data) + b"\n\n"
+
+def _run_document_events(system: BoogasiOCRSystem, path: str, loop: asyncio.AbstractEventLoop,
+                         queue: asyncio.Queue, deadline: Deadline):
+    """
+    Worker thread: drive iter_process_document and hand every event to the event loop.
+    deadline.cancel() (client gone) stops OCR at the next page or Tesseract call.
+    Releases the document slot taken by the endpoint.
+    """
+    try:
+        events = system.iter_process_document(path, save_output=False, deadline=deadline)
+        try:
+            for event in events:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+        finally:
+            events.close()
+    except Exception as e:
+        loop.call_soon_threadsafe(queue.put_nowait, {"event": "error", "error": str(e)})
+    finally:
+        loop.call_soon_threadsafe(queue.put_nowait, None)
+        _document_slots.release()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
 
 # ========== ENDPOINTS ==========
 @app.get("/")
@@ -70,7 +222,9 @@ async def root():
         "endpoints": {
             "health": "/health",
             "insights": "/api/insights",
-            "parse_and_insights": "/api/parse-and-insights"
+            "parse_and_insights": "/api/parse-and-insights",
+            "document_stream": "/api/documents/stream",
+            "document_insights": "/api/documents/{document_id}/insights/{feature}"
         }
     }
 
@@ -89,11 +243,17 @@ async def health_check():
 @app.post("/api/insights")
 async def get_insights(request: InsightRequest):
     """Generate AI insights for transactions"""
+    deadline = Deadline(REQUEST_TIMEOUT)
     try:
+        result = await _precomputed_insight(request.document_id, request.feature, deadline)
+        if result is not None:
+            return FastJSONResponse(result)
         transactions = [dict(t) for t in request.transactions]
-        result = generate_insights(transactions, request.feature)
+        result = await _run_blocking(deadline, "insights", generate_insights, transactions, request.feature)
         print(f"🤖 Generated {request.feature} insights for {len(transactions)} transactions")
-        return result
+        return FastJSONResponse(result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -109,20 +269,16 @@ async def parse_and_insights(
       - raw_text (text extracted client-side)
     Returns parsed/normalized transactions and, if `feature` provided, the AI insight JSON.
     """
+    deadline = Deadline(REQUEST_TIMEOUT)
     try:
         text = raw_text if raw_text else await file.read().decode("utf-8") if file else None
         if not text:
             raise HTTPException(status_code=400, detail="No content provided")
 
-        parser = BankStatementParser(
-            learned_patterns=patterns,
-            model_artifacts=MODEL_FILE
-        )
-        
-        parsed = parser.parse(text)
-        print(f"🔍 Parsed {len(parsed.get('formattedTransactions', []))} transactions")
-        
-        txns = parsed.get("formattedTransactions", [])
+        parser = statement_parser
+        parsed = await _run_blocking(deadline, "parsing", parser.parse, text)
+        txns = parsed.get("transactions", [])
+        print(f"🔍 Parsed {len(txns)} transactions")
 
         normalized = []
         for t in txns:
@@ -150,19 +306,105 @@ async def parse_and_insights(
                 **({ "sourceFile": file.filename } if file is not None else {})
             })
 
+        # Start every insight for this document now; the dashboard asks for them next
+        document_id = precomputer.schedule(normalized, first=feature) if normalized else None
+
         response = {
+            "document_id": document_id,
             "parsed": parsed,
             "transactions": normalized
         }
 
         if feature:
-            ai_result = generate_insights(normalized, feature)
+            ai_result = await _precomputed_insight(document_id, feature, deadline)
+            if ai_result is None:
+                ai_result = await _run_blocking(deadline, "insights", generate_insights, normalized, feature)
             response["insight_feature"] = feature
             response["insight_result"] = ai_result
 
-        return response
+        return FastJSONResponse(response)
 
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/documents/stream")
+async def stream_document(file: UploadFile = File(...)):
+    """
+    OCR and parse an uploaded statement or receipt, streaming progress as
+    Server-Sent Events while the document is processed:
+      event: preview       {"document_type"}        first-page classification (BOOGASI_OCR_PREVIEW=1)
+      event: page          {"page", "source", "char_count"}
+      event: transactions  {"transactions": [...]}  parsed, categorized, as pages arrive (PDF statements; the
+                           preview, or else the first page, is classified)
+      event: result        final result (as BoogasiOCRSystem.process_document), with document_id;
+                           {"success": false, "timed_out": true, ...} past the document timeout
+      event: error         {"error"}
+    503 when BOOGASI_API_DOCUMENTS documents are already being processed.
+    EventSource cannot POST; read the response body with fetch() instead.
+    """
+    suffix = Path(file.filename or "").suffix.lower()
+    if suffix not in DOCUMENT_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {suffix or 'unknown'}")
+    try:
+        system = await asyncio.to_thread(_get_ocr_system)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"OCR unavailable: {e}")
+    if not _document_slots.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="Too many documents in progress, try again later",
+                            headers={"Retry-After": "5"})
+    try:
+        content = await file.read()
+        fd, path = tempfile.mkstemp(prefix="boogasi_upload_", suffix=suffix)
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+    except BaseException:
+        _document_slots.release()
+        raise
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    deadline = Deadline(DOCUMENT_TIMEOUT)
+    threading.Thread(target=_run_document_events, args=(system, path, loop, queue, deadline),
+                     name="document-stream", daemon=True).start()
+
+    async def events():
+        backlog = []
+        try:
+            while True:
+                event = backlog.pop() if backlog else await queue.get()
+                if event is None:
+                    return
+                kind = event["event"]
+                if kind == "transaction":
+                    # Transactions already produced go out together
+                    batch = [event["transaction"]]
+                    while len(batch) < STREAM_BATCH_SIZE and not queue.empty():
+                        following = queue.get_nowait()
+                        if following is None or following["event"] != "transaction":
+                            backlog.append(following)
+                            break
+                        batch.append(following["transaction"])
+                    yield _sse("transactions", {"transactions": batch})
+                elif kind == "result":
+                    yield _sse("result", {**event["result"], "filename": file.filename})
+                else:
+                    yield _sse(kind, {k: v for k, v in event.items() if k != "event"})
+        finally:
+            # Client gone (or done): stop OCR at the next page or Tesseract call
+            deadline.cancel()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/documents/{document_id}/insights/{feature}")
+async def get_document_insight(document_id: str, feature: str):
+    """Precomputed insight for a document parsed by /api/parse-and-insights"""
+    result = await _precomputed_insight(document_id, feature, Deadline(REQUEST_TIMEOUT))
+    if result is None:
+        status = precomputer.status(document_id)
+        if status is None or feature not in status or status[feature] == "cancelled":
+            raise HTTPException(status_code=404, detail=f"No precomputed '{feature}' for document {document_id}")
+        raise HTTPException(status_code=500, detail=f"Precomputing '{feature}' failed for document {document_id}")
+    return FastJSONResponse(result)
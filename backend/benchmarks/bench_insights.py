@@ -0,0 +1,153 @@
+"""
+bench_insights.py
+
+Time and memory-profile every ai_insights feature on synthetic transactions.
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_insights
+    python -m benchmarks.bench_insights --sizes 1000,10000 --features weekly_report --repeat 5
+
+For each (feature, size) it records wall-clock runs (perf_counter), the peak
+traced allocation of one extra run (tracemalloc) and the serialized output
+size, then writes everything to a JSON file under benchmarks/results/ so runs
+can be compared over time. A feature stops scaling up once a run exceeds
+--max-seconds; the larger sizes are recorded as skipped.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from boogasi_ai_model.ai_insights import INSIGHT_FEATURES, generate_insights
+from boogasi_ai_model.result_builder import dumps
+from benchmarks.synthetic_transactions import generate_transactions
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def _environment() -> Dict:
+    return {
+        "python": sys.version.split()[0],
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def _peak_memory(transactions: List[Dict], feature: str) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        generate_insights(transactions, feature)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def bench_feature(transactions: List[Dict], feature: str, repeat: int, memory: bool) -> Dict:
+    """Benchmark one feature on one transaction list."""
+    timings = []
+    output = None
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        output = generate_insights(transactions, feature)
+        timings.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    payload = dumps(output)
+    serialize_seconds = time.perf_counter() - t0
+
+    result = {
+        "feature": feature,
+        "size": len(transactions),
+        "seconds": timings,
+        "best_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "per_txn_us": min(timings) / max(1, len(transactions)) * 1e6,
+        "serialize_seconds": serialize_seconds,
+        "output_bytes": len(payload),
+    }
+    if memory:
+        result["peak_traced_bytes"] = _peak_memory(transactions, feature)
+    return result
+
+
+def run(sizes, features, repeat: int, seed: int, memory: bool, max_seconds: float) -> Dict:
+    results = []
+    too_slow = set()
+    for size in sizes:
+        t0 = time.perf_counter()
+        transactions = generate_transactions(size, seed=seed)
+        print(f"\n📦 {size:,} transactions (generated in {time.perf_counter() - t0:.2f}s)")
+
+        for feature in features:
+            if feature in too_slow:
+                print(f"   ⏭️  {feature:<28} skipped (exceeded {max_seconds}s at a smaller size)")
+                results.append({"feature": feature, "size": size, "skipped": True})
+                continue
+
+            entry = bench_feature(transactions, feature, repeat, memory)
+            results.append(entry)
+            mem = f"{entry['peak_traced_bytes'] / 1e6:9.1f} MB" if memory else ""
+            print(f"   ⏱️  {feature:<28} best {entry['best_seconds']:9.4f}s  "
+                  f"median {entry['median_seconds']:9.4f}s  {mem}")
+            if entry["best_seconds"] > max_seconds:
+                too_slow.add(feature)
+
+    return {
+        "suite": "ai_insights",
+        "created_at": datetime.now().isoformat(),
+        "seed": seed,
+        "repeat": repeat,
+        "environment": _environment(),
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ai_insights features on synthetic data")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated transaction counts")
+    parser.add_argument("--features", default=",".join(INSIGHT_FEATURES),
+                        help="Comma-separated feature names")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per feature and size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--max-seconds", type=float, default=120.0,
+                        help="Stop scaling a feature once one run takes longer than this")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/insights_<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    features = [f.strip() for f in args.features.split(",") if f.strip()]
+    unknown = set(features) - set(INSIGHT_FEATURES)
+    if unknown:
+        parser.error(f"Unknown feature(s): {', '.join(sorted(unknown))}")
+
+    report = run(sizes, features, args.repeat, args.seed, not args.no_memory, args.max_seconds)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"insights_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+bench_parsers.py
+
+Throughput and scaling of the text parsers on synthetic OCR text.
+
+Run from the backend/ directory (no Tesseract needed):
+    python -m benchmarks.bench_parsers
+    python -m benchmarks.bench_parsers --banks bdo,landbank --sizes 100,10000 --noise 0,0.05 --repeat 5
+
+For every (bank layout, noise level, size) it generates a statement with
+benchmarks.synthetic_statements, times BankStatementParser.parse on it and
+records lines/sec, transactions/sec and how many of the generated
+transactions the parser recovered (benchmarks.corpus.match_transactions).
+ReceiptParser.parse is measured the same way on receipts with 1..N items.
+
+`scaling_exponent` is the slope of log(time) over log(lines) across the sizes
+(1.0 = linear; higher means the parser slows down on long documents).
+Results go to benchmarks/results/parsers_<timestamp>.json.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from boogasi_ai_model.ocr_system import BankStatementParser, ReceiptParser
+from benchmarks.corpus import match_transactions
+from benchmarks.synthetic_statements import LAYOUTS, generate_receipt, generate_statement
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = (1, 10, 100, 1_000, 10_000)
+DEFAULT_RECEIPT_SIZES = (1, 10, 100, 1_000)
+DEFAULT_NOISE = (0.0, 0.02)
+
+
+def _environment() -> Dict:
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def _time(parse: Callable[[str], Dict], text: str, repeat: int):
+    timings, result = [], None
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        result = parse(text)
+        timings.append(time.perf_counter() - t0)
+    return result, timings
+
+
+def scaling_exponent(rows: List[Dict]) -> Optional[float]:
+    """Least-squares slope of log(best_seconds) over log(lines)."""
+    points = [(math.log(r["lines"]), math.log(r["best_seconds"])) for r in rows if r["best_seconds"] > 0]
+    if len(points) < 2:
+        return None
+    mean_x = statistics.mean(x for x, _ in points)
+    mean_y = statistics.mean(y for _, y in points)
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if not var_x:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+
+def _entry(kind: str, size: int, noise: float, lines: int, timings: List[float], items: int) -> Dict:
+    best = min(timings)
+    return {
+        "parser": kind,
+        "size": size,
+        "noise": noise,
+        "lines": lines,
+        "seconds": timings,
+        "best_seconds": best,
+        "median_seconds": statistics.median(timings),
+        "lines_per_second": lines / best if best else None,
+        "items_per_second": items / best if best else None,
+    }
+
+
+def bench_statement(bank: str, size: int, noise: float, repeat: int, seed: int) -> Dict:
+    doc = generate_statement(bank, size, seed=seed, noise=noise)
+    result, timings = _time(BankStatementParser().parse, doc["text"], repeat)
+    entry = _entry("bank_statement", size, noise, doc["lines"], timings, size)
+    entry.update(bank=bank, pages=doc["pages"])
+    entry.update(match_transactions(result["transactions"], doc["transactions"]))
+    return entry
+
+
+def bench_receipt(size: int, noise: float, repeat: int, seed: int) -> Dict:
+    doc = generate_receipt(size, seed=seed, noise=noise)
+    result, timings = _time(ReceiptParser().parse, doc["text"], repeat)
+    entry = _entry("receipt", size, noise, doc["lines"], timings, size)
+    entry["bank"] = "receipt"
+    found = {(i["description"], round(i["price"], 2)) for i in result["items"]}
+    entry["items_found"] = sum(1 for i in doc["items"] if (i["description"], round(i["price"], 2)) in found)
+    entry["item_recall"] = entry["items_found"] / size if size else None
+    entry["total_correct"] = result["totals"].get("total") == doc["total"]
+    return entry
+
+
+def summarize(results: List[Dict]) -> List[Dict]:
+    """Per (layout, noise): throughput at the largest size and the scaling exponent."""
+    summary = []
+    groups: Dict[tuple, List[Dict]] = {}
+    for r in results:
+        groups.setdefault((r["bank"], r["noise"]), []).append(r)
+    for (bank, noise), rows in groups.items():
+        largest = max(rows, key=lambda r: r["lines"])
+        recalls = [r.get("recall", r.get("item_recall")) for r in rows]
+        recalls = [v for v in recalls if v is not None]
+        summary.append({
+            "bank": bank,
+            "noise": noise,
+            "largest_size": largest["size"],
+            "lines_per_second": largest["lines_per_second"],
+            "scaling_exponent": scaling_exponent(rows),
+            "mean_recall": statistics.mean(recalls) if recalls else None,
+        })
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark BankStatementParser and ReceiptParser on synthetic text")
+    parser.add_argument("--banks", default=",".join(LAYOUTS), help="Comma-separated statement layouts")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Transactions per statement")
+    parser.add_argument("--receipt-sizes", default=",".join(map(str, DEFAULT_RECEIPT_SIZES)),
+                        help="Items per receipt (empty to skip receipts)")
+    parser.add_argument("--noise", default=",".join(map(str, DEFAULT_NOISE)), help="OCR noise levels (0 = clean)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per document")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/parsers_<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    def _list(value: str, cast):
+        return [cast(v) for v in value.split(",") if v.strip()]
+
+    banks = _list(args.banks, str.strip)
+    unknown = [b for b in banks if b not in LAYOUTS]
+    if unknown:
+        parser.error(f"unknown bank layout(s) {', '.join(unknown)} (choose from {', '.join(LAYOUTS)})")
+    sizes = _list(args.sizes, int)
+    receipt_sizes = _list(args.receipt_sizes, int)
+    noise_levels = _list(args.noise, float)
+
+    results = []
+    for bank in banks:
+        for noise in noise_levels:
+            print(f"\n🏦 {bank} (noise {noise:g})")
+            for size in sizes:
+                entry = bench_statement(bank, size, noise, args.repeat, args.seed)
+                results.append(entry)
+                print(f"   ⏱️  {size:>6} txns {entry['lines']:>6} lines  {entry['best_seconds'] * 1000:9.2f} ms  "
+                      f"{entry['lines_per_second']:>10,.0f} lines/s  "
+                      f"recovered {entry['matched']}/{size} ({entry['parsed']} parsed)")
+    for noise in noise_levels if receipt_sizes else []:
+        print(f"\n🧾 receipts (noise {noise:g})")
+        for size in receipt_sizes:
+            entry = bench_receipt(size, noise, args.repeat, args.seed)
+            results.append(entry)
+            print(f"   ⏱️  {size:>6} items {entry['lines']:>6} lines  {entry['best_seconds'] * 1000:9.2f} ms  "
+                  f"{entry['lines_per_second']:>10,.0f} lines/s  "
+                  f"items {entry['items_found']}/{size}  total {'✓' if entry['total_correct'] else '✗'}")
+
+    summary = summarize(results)
+    print("\n📊 Scaling (1.0 = linear in lines)")
+    for row in summary:
+        exponent = f"{row['scaling_exponent']:.2f}" if row["scaling_exponent"] is not None else "-"
+        recall = f"{row['mean_recall']:.0%}" if row["mean_recall"] is not None else "-"
+        print(f"   {row['bank']:<10} noise {row['noise']:<5g} {row['lines_per_second']:>10,.0f} lines/s "
+              f"at {row['largest_size']:>6}  exponent {exponent:>5}  recall {recall}")
+
+    report = {
+        "suite": "parsers",
+        "created_at": datetime.now().isoformat(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "environment": _environment(),
+        "summary": summary,
+        "results": results,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"parsers_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Results saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""
+bench_pipeline.py
+
+Throughput and accuracy of the whole OCR -> classify -> parse pipeline on the
+sample documents, under different pipeline configurations.
+
+Run from the backend/ directory (needs the Tesseract engine):
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --preprocess default,none --dpi 150,200,300 --psm profile,6 --workers 1,4
+
+Every combination of --preview, --preprocess, --dpi, --psm and --workers is one config.
+The default compares the pipeline without and with the first-page preview
+(early classification plus the OCR_PROFILES settings), so the accuracy of
+the profiles can be checked before enabling BOOGASI_OCR_PREVIEW.
+Each config runs all documents through BoogasiOCRSystem.process_document in a
+fresh worker pool (OCR cache and duplicate detection off, so every document
+is really OCR'd) and reports:
+
+ - pages/sec and documents/sec over the config's wall time
+ - per-stage latency, summed from the trace spans of every document
+   (ocr.page, ocr.preview, classifier.classify, bank_parser.parse, ...)
+ - peak memory: max RSS of the pipeline workers and of their Tesseract processes
+ - transaction precision/recall against the labeled JSON
+   (benchmarks.corpus.match_transactions) and document type accuracy
+
+Results go to benchmarks/results/pipeline_<timestamp>.json.
+
+Options:
+ - --preview     "off" (the default pipeline) and/or "on" (early classification)
+ - --preprocess  "default" (BOOGASI_PREPROCESS or the built-in steps), "none",
+                 or steps joined with "+", e.g. "resize+grayscale+deskew"
+ - --dpi         PDF rasterization resolution (images are unaffected)
+ - --psm         "profile" (OCR_PROFILES per document type) or a Tesseract page
+                 segmentation mode forced for every document type (needs --preview on)
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import os
+import platform
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource  # peak RSS; not available on Windows
+except ImportError:
+    resource = None
+
+from boogasi_ai_model.image_preprocessing import ImagePreprocessor
+from boogasi_ai_model.ocr_system import OCR_PROFILES, BoogasiOCRSystem
+from boogasi_ai_model.tracing import trace
+from benchmarks.corpus import load_ground_truth, match_transactions, sample_documents
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+_PSM = re.compile(r"--psm\s+\d+\s*")
+
+_system: Optional[BoogasiOCRSystem] = None
+
+
+def _environment() -> Dict:
+    import pytesseract
+    from PIL import Image
+    return {
+        "python": sys.version.split()[0],
+        "tesseract": str(pytesseract.get_tesseract_version()),
+        "pillow": Image.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _peak_rss_mb(who) -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def psm_profiles(psm: str) -> Optional[Dict[str, str]]:
+    """OCR_PROFILES with the page segmentation mode replaced; None keeps the defaults."""
+    if psm == "profile":
+        return None
+    return {kind: f"--psm {int(psm)} " + _PSM.sub("", options) for kind, options in OCR_PROFILES.items()}
+
+
+def _init_worker(config: Dict, verbose: bool):
+    global _system
+    if not verbose:
+        sys.stdout = open(os.devnull, "w")  # the pipeline's per-document progress lines
+    preprocess = config["preprocess"]
+    _system = BoogasiOCRSystem(
+        ocr_cache=False,
+        duplicate_detection=False,
+        preprocess=None if preprocess == "default" else preprocess.replace("+", ","),
+        early_classification=config["preview"] == "on",
+        pdf_dpi=config["dpi"],
+        ocr_profiles=psm_profiles(config["psm"]),
+    )
+
+
+def _run_document(path: str) -> Dict:
+    """Worker task: one document through the pipeline, traced."""
+    t0 = time.perf_counter()
+    with trace("benchmark") as root:
+        result = _system.process_document(path, save_output=False)
+    return {
+        "result": result,
+        "trace": root.to_dict(),
+        "seconds": time.perf_counter() - t0,
+        "worker_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+        "tesseract_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+    }
+
+
+def _stage_totals(node: Dict, totals: Dict[str, Dict]):
+    for child in node.get("children", []):
+        stage = totals.setdefault(child["name"], {"ms": 0.0, "calls": 0})
+        stage["ms"] += child["ms"]
+        stage["calls"] += child.get("calls", 1)
+        _stage_totals(child, totals)
+
+
+def _score(path: Path, result: Dict) -> Dict:
+    entry = {
+        "document": f"{path.parent.name}/{path.name}",
+        "success": bool(result.get("success")),
+        "document_type": result.get("document_type"),
+        "pages": len(result.get("pages") or []) or 1,
+    }
+    if not result.get("success"):
+        entry["error"] = result.get("error")
+    truth = load_ground_truth(path)
+    if truth is not None:
+        parsed = (result.get("data") or {}).get("transactions", []) if result.get("success") else []
+        entry["type_correct"] = result.get("document_type") == "bank_statement"
+        entry.update(match_transactions(parsed, truth.get("transactions", [])))
+    return entry
+
+
+def run_config(documents: List[Path], config: Dict, verbose: bool = False) -> Dict:
+    """All documents under one config, in a fresh pool of config["workers"] processes."""
+    stages: Dict[str, Dict] = {}
+    scores, worker_peaks, tesseract_peaks = [], [], []
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=config["workers"], initializer=_init_worker,
+                             initargs=(config, verbose)) as pool:
+        for path, run in zip(documents, pool.map(_run_document, [str(p) for p in documents])):
+            _stage_totals(run["trace"], stages)
+            entry = _score(path, run["result"])
+            entry["seconds"] = run["seconds"]
+            scores.append(entry)
+            if run["worker_rss_mb"] is not None:
+                worker_peaks.append(run["worker_rss_mb"])
+                tesseract_peaks.append(run["tesseract_rss_mb"])
+    wall = time.perf_counter() - t0
+
+    labeled = [s for s in scores if "matched" in s]
+    parsed = sum(s["parsed"] for s in labeled)
+    expected = sum(s["labeled"] for s in labeled)
+    matched = sum(s["matched"] for s in labeled)
+    pages = sum(s["pages"] for s in scores)
+    return {
+        "config": config,
+        "label": config_label(config),
+        "documents": len(scores),
+        "failed": sum(1 for s in scores if not s["success"]),
+        "pages": pages,
+        "wall_seconds": wall,
+        "pages_per_second": pages / wall if wall else None,
+        "documents_per_second": len(scores) / wall if wall else None,
+        "stages": {name: {"ms": round(s["ms"], 3), "calls": s["calls"],
+                          "ms_per_page": round(s["ms"] / pages, 3) if pages else None}
+                   for name, s in sorted(stages.items(), key=lambda item: -item[1]["ms"])},
+        "peak_worker_rss_mb": max(worker_peaks) if worker_peaks else None,
+        "peak_tesseract_rss_mb": max(tesseract_peaks) if tesseract_peaks else None,
+        # Micro-averaged over all labeled transactions
+        "precision": matched / parsed if parsed else None,
+        "recall": matched / expected if expected else None,
+        "type_accuracy": sum(s["type_correct"] for s in labeled) / len(labeled) if labeled else None,
+        "results": scores,
+    }
+
+
+def config_label(config: Dict) -> str:
+    return (f"preview={config['preview']} pre={config['preprocess']} dpi={config['dpi']} "
+            f"psm={config['psm']} w={config['workers']}")
+
+
+def _percent(value: Optional[float]) -> str:
+    return f"{value:6.1%}" if value is not None else "     -"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark OCR pipeline throughput and accuracy per configuration")
+    parser.add_argument("--preview", default="off,on",
+                        help='Comma-separated early classification settings: "off" and/or "on"')
+    parser.add_argument("--preprocess", default="default",
+                        help='Comma-separated preprocessing configs: "default", "none" or steps joined by "+"')
+    parser.add_argument("--dpi", default="200", help="Comma-separated PDF rasterization DPIs")
+    parser.add_argument("--psm", default="profile",
+                        help='Comma-separated page segmentation modes: "profile" or a Tesseract --psm number')
+    parser.add_argument("--workers", default="1", help="Comma-separated worker process counts")
+    parser.add_argument("--documents", nargs="*",
+                        help="Document paths (default: every labeled sample in raw/)")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/pipeline_<timestamp>.json)")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own progress output")
+    args = parser.parse_args(argv)
+
+    def _list(value: str) -> List[str]:
+        return [v.strip() for v in value.split(",") if v.strip()]
+
+    previews = _list(args.preview)
+    if not previews or any(v not in ("off", "on") for v in previews):
+        parser.error('--preview takes "off" and/or "on"')
+    preprocess = _list(args.preprocess)
+    for spec in preprocess:
+        if spec != "default":
+            try:
+                ImagePreprocessor.from_spec(spec.replace("+", ","))
+            except ValueError as e:
+                parser.error(str(e))
+    try:
+        dpis = [int(v) for v in _list(args.dpi)]
+        workers = [max(1, int(v)) for v in _list(args.workers)]
+        psms = [v if v == "profile" else str(int(v)) for v in _list(args.psm)]
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.documents:
+        documents = [Path(p) for p in args.documents]
+    else:
+        documents = [p for p in sample_documents(folders=("raw",)) if load_ground_truth(p) is not None]
+    if not documents:
+        print("❌ No documents to benchmark")
+        return 1
+
+    try:
+        environment = _environment()
+    except Exception as e:
+        print(f"❌ Tesseract not available: {e}")
+        return 1
+
+    # Without the preview every document gets the default Tesseract settings: --psm does not apply
+    configs = [{"preview": v, "preprocess": p, "dpi": d, "psm": s, "workers": w}
+               for v, p, d, w in itertools.product(previews, preprocess, dpis, workers)
+               for s in (psms if v == "on" else ["profile"])]
+    print(f"📄 {len(documents)} documents × {len(configs)} configs")
+
+    runs = []
+    for config in configs:
+        print(f"\n⚙️  {config_label(config)}")
+        run = run_config(documents, config, args.verbose)
+        runs.append(run)
+        for entry in run["results"]:
+            status = "✓" if entry["success"] else "✗"
+            accuracy = "" if entry["success"] else f"  {entry.get('error')}"
+            if "matched" in entry:
+                accuracy += (f"  {entry['matched']}/{entry['labeled']} labeled, {entry['parsed']} parsed"
+                            f"  P {_percent(entry['precision'])}  R {_percent(entry['recall'])}")
+            print(f"   {status} {entry['document']:<42} {entry['seconds']:7.2f}s{accuracy}")
+        top = ", ".join(f"{name} {s['ms'] / 1000:.2f}s" for name, s in list(run["stages"].items())[:4])
+        print(f"   ⏱️  {run['pages_per_second']:.2f} pages/s  ({top})")
+
+    print("\n📊 Summary")
+    print(f"   {'config':<56} {'pages/s':>8} {'worker MB':>10} {'tess MB':>8} {'prec':>7} {'recall':>7} {'type':>7}")
+    for run in runs:
+        worker_mb = f"{run['peak_worker_rss_mb']:.0f}" if run["peak_worker_rss_mb"] is not None else "-"
+        tess_mb = f"{run['peak_tesseract_rss_mb']:.0f}" if run["peak_tesseract_rss_mb"] is not None else "-"
+        print(f"   {run['label']:<56} {run['pages_per_second']:8.2f} {worker_mb:>10} {tess_mb:>8} "
+              f"{_percent(run['precision'])} {_percent(run['recall'])} {_percent(run['type_accuracy'])}")
+
+    report = {
+        "suite": "pipeline",
+        "created_at": datetime.now().isoformat(),
+        "environment": environment,
+        "documents": [f"{p.parent.name}/{p.name}" for p in documents],
+        "runs": runs,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"pipeline_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    print(f"\n💾 Results saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+bench_preprocessing.py
+
+Measure what each image preprocessing step costs and buys on the sample images.
+
+Run from the backend/ directory (needs the Tesseract engine):
+    python -m benchmarks.bench_preprocessing
+    python -m benchmarks.bench_preprocessing --configs none,resize+grayscale,all --repeat 3
+
+For every (image, config) it records preprocessing time per step, Tesseract
+time, output size in pixels and, where the image has labeled ground truth
+(benchmarks.corpus.LABELED_FILES), how many labeled amounts and description
+words the OCR text contains. `agreement` compares each config's text with the
+unprocessed ("none") OCR of the same image. Results go to
+benchmarks/results/preprocessing_<timestamp>.json.
+
+Configs are step lists joined with "+", e.g. "resize+grayscale+deskew".
+"""
+from __future__ import annotations
+import argparse
+import difflib
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import pytesseract
+from PIL import Image
+
+from boogasi_ai_model.image_preprocessing import ImagePreprocessor
+from benchmarks.corpus import IMAGE_EXTENSIONS, amount_recall, load_ground_truth, sample_documents, word_recall
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_CONFIGS = (
+    "none",
+    "resize",
+    "grayscale",
+    "resize+grayscale",
+    "resize+grayscale+deskew",
+    "resize+grayscale+binarize",
+    "resize+grayscale+crop",
+    "all",
+)
+
+
+def _environment() -> Dict:
+    return {
+        "python": sys.version.split()[0],
+        "tesseract": str(pytesseract.get_tesseract_version()),
+        "pillow": Image.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def bench_image(path: Path, config: str, repeat: int, lang: str) -> Dict:
+    """Preprocess + OCR one image `repeat` times with one config."""
+    preprocessor = ImagePreprocessor.from_spec(config.replace("+", ","))
+    prep_seconds, ocr_seconds = [], []
+    step_seconds: Dict[str, List[float]] = {}
+    text, size = "", (0, 0)
+    for _ in range(repeat):
+        timings: Dict[str, float] = {}
+        t0 = time.perf_counter()
+        with preprocessor.open(str(path)) as image:
+            image.load()
+            processed = preprocessor(image, timings=timings)
+            size = processed.size
+            prep_seconds.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            text = pytesseract.image_to_string(processed, lang=lang)
+            ocr_seconds.append(time.perf_counter() - t0)
+        for step, seconds in timings.items():
+            step_seconds.setdefault(step, []).append(seconds)
+
+    entry = {
+        "image": f"{path.parent.name}/{path.name}",
+        "config": config,
+        "pixels": size[0] * size[1],
+        "size": list(size),
+        "preprocess_seconds": min(prep_seconds),
+        "step_seconds": {step: min(values) for step, values in step_seconds.items()},
+        "ocr_seconds": min(ocr_seconds),
+        "ocr_median_seconds": statistics.median(ocr_seconds),
+        "total_seconds": min(prep_seconds) + min(ocr_seconds),
+        "char_count": len(text),
+        "text": text,
+    }
+    truth = load_ground_truth(path)
+    if truth is not None:
+        entry["amount_recall"] = amount_recall(text, truth.get("transactions", []))
+        entry["word_recall"] = word_recall(text, truth.get("transactions", []))
+    return entry
+
+
+def run(images: List[Path], configs: List[str], repeat: int, lang: str) -> Dict:
+    results = []
+    for path in images:
+        print(f"\n🖼️  {path.parent.name}/{path.name}")
+        baseline = None
+        for config in configs:
+            entry = bench_image(path, config, repeat, lang)
+            if config == "none":
+                baseline = entry["text"]
+            if baseline is not None:
+                entry["agreement"] = difflib.SequenceMatcher(None, baseline, entry["text"], autojunk=False).ratio()
+            results.append(entry)
+
+            accuracy = ""
+            if "amount_recall" in entry:
+                accuracy = f"amounts {entry['amount_recall']:.0%}  words {entry['word_recall']:.0%}"
+            print(f"   ⏱️  {config:<28} prep {entry['preprocess_seconds']:7.3f}s  "
+                  f"ocr {entry['ocr_seconds']:7.3f}s  {entry['pixels'] / 1e6:6.2f} MP  {accuracy}")
+
+    return {
+        "suite": "preprocessing",
+        "created_at": datetime.now().isoformat(),
+        "repeat": repeat,
+        "lang": lang,
+        "environment": _environment(),
+        "summary": summarize(results, configs),
+        "results": results,
+    }
+
+
+def summarize(results: List[Dict], configs: List[str]) -> List[Dict]:
+    """Per-config totals across all images."""
+    summary = []
+    for config in configs:
+        rows = [r for r in results if r["config"] == config]
+        labeled = [r for r in rows if r.get("amount_recall") is not None]
+        summary.append({
+            "config": config,
+            "images": len(rows),
+            "preprocess_seconds": sum(r["preprocess_seconds"] for r in rows),
+            "ocr_seconds": sum(r["ocr_seconds"] for r in rows),
+            "total_seconds": sum(r["total_seconds"] for r in rows),
+            "mean_amount_recall": statistics.mean(r["amount_recall"] for r in labeled) if labeled else None,
+            "mean_word_recall": statistics.mean(r["word_recall"] for r in labeled if r.get("word_recall") is not None)
+            if any(r.get("word_recall") is not None for r in labeled) else None,
+        })
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark image preprocessing steps before OCR")
+    parser.add_argument("--configs", default=",".join(DEFAULT_CONFIGS),
+                        help='Comma-separated configs; steps within a config joined by "+"')
+    parser.add_argument("--images", nargs="*", help="Image paths (default: sample images in raw/ and receipts/)")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per image and config")
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/preprocessing_<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    configs = [c.strip() for c in args.configs.split(",") if c.strip()]
+    for config in configs:
+        try:
+            ImagePreprocessor.from_spec(config.replace("+", ","))
+        except ValueError as e:
+            parser.error(str(e))
+    images = [Path(p) for p in args.images] if args.images else sample_documents(extensions=IMAGE_EXTENSIONS)
+
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception as e:
+        print(f"❌ Tesseract not available: {e}")
+        return 1
+
+    report = run(images, configs, args.repeat, args.lang)
+
+    print("\n📊 Totals per config")
+    for row in report["summary"]:
+        recall = f"  amounts {row['mean_amount_recall']:.0%}" if row["mean_amount_recall"] is not None else ""
+        print(f"   {row['config']:<28} total {row['total_seconds']:8.3f}s  "
+              f"(prep {row['preprocess_seconds']:.3f}s, ocr {row['ocr_seconds']:.3f}s){recall}")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"preprocessing_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Results saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+corpus.py
+
+The sample documents under boogasi_ai_data/ and their labeled ground truth,
+for benchmarks that measure OCR/parsing accuracy as well as speed.
+
+Raw files and labeled JSON do not share names, so LABELED_FILES maps each
+sample document to its human-corrected statement in boogasi_ai_data/labeled/.
+"""
+from __future__ import annotations
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "boogasi_ai_data"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tiff")
+DOCUMENT_EXTENSIONS = IMAGE_EXTENSIONS + (".pdf",)
+
+LABELED_FILES = {
+    "bdo_dummy_bank_statement.jpg": "bdo_labeled.json",
+    "hsbc_dummy_bank_statement.jpg": "hsbc_labeled.json",
+    "hsbc_uk_bankstatement1.pdf": "hsbc_uk_labeled1.json",
+    "hsbc_uk_bankstatement2.png": "hsbc_uk_labeled2.json",
+    "hsbc_uk_bankstatement3.jpg": "hsbc_uk_labeled3.json",
+    "hsbc_uk_bankstatement4.jpg": "hsbc_uk_labeled4.json",
+    "landbank_bank_statement.jpg": "landbank_labeled.json",
+    "metrobank_bankstatement.png": "metrobank_bankstatement1.json",
+}
+
+_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def sample_documents(folders: Sequence[str] = ("raw", "receipts"),
+                     extensions: Sequence[str] = DOCUMENT_EXTENSIONS) -> List[Path]:
+    """Sample documents in boogasi_ai_data/<folder>/, sorted by name."""
+    files = []
+    for folder in folders:
+        directory = DATA_DIR / folder
+        if directory.exists():
+            files.extend(p for p in directory.iterdir() if p.suffix.lower() in extensions)
+    return sorted(files, key=lambda p: (p.parent.name, p.name))
+
+
+def load_ground_truth(document: Path) -> Optional[Dict]:
+    """Labeled statement for a sample document, or None if it has no label."""
+    name = LABELED_FILES.get(Path(document).name)
+    if name is None:
+        return None
+    with open(DATA_DIR / "labeled" / name, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def text_numbers(text: str) -> List[float]:
+    """Every number in a text ("35,000.00" -> 35000.0)."""
+    values = []
+    for match in _NUMBER.findall(text):
+        try:
+            values.append(float(match.replace(",", "")))
+        except ValueError:
+            continue
+    return values
+
+
+def amount_recall(text: str, transactions: List[Dict]) -> Optional[float]:
+    """Share of labeled transaction amounts that appear in the text."""
+    if not transactions:
+        return None
+    found = {round(v, 2) for v in text_numbers(text)}
+    hits = sum(1 for t in transactions if round(abs(float(t.get("amount", 0))), 2) in found)
+    return hits / len(transactions)
+
+
+def word_recall(text: str, transactions: List[Dict]) -> Optional[float]:
+    """Share of words in labeled transaction descriptions that appear in the text."""
+    expected = [w for t in transactions for w in _WORD.findall(str(t.get("description", "")).lower())]
+    if not expected:
+        return None
+    present = set(_WORD.findall(text.lower()))
+    return sum(1 for w in expected if w in present) / len(expected)
+
+
+def _transaction_key(transaction: Dict):
+    """(amount in cents, "income" | "expense"); labeled amounts are signed, parsed ones are not."""
+    amount = float(transaction.get("amount", 0) or 0)
+    kind = transaction.get("type") or ("expense" if amount < 0 else "income")
+    return round(abs(amount) * 100), kind
+
+
+def match_transactions(parsed: List[Dict], labeled: List[Dict]) -> Dict:
+    """
+    Transaction-level accuracy of parsed transactions against labeled ones.
+
+    A parsed transaction matches a labeled one with the same amount and
+    direction (income/expense); each labeled transaction is matched at most
+    once. `date_accuracy` is the share of matches whose dates also agree.
+    """
+    remaining: Dict = {}
+    for t in labeled:
+        remaining.setdefault(_transaction_key(t), []).append(t)
+    matched = dates = 0
+    for t in parsed:
+        candidates = remaining.get(_transaction_key(t))
+        if not candidates:
+            continue
+        same_date = next((c for c in candidates if c.get("date") and c.get("date") == t.get("date")), None)
+        candidates.remove(same_date or candidates[0])
+        matched += 1
+        dates += same_date is not None
+    return {
+        "parsed": len(parsed),
+        "labeled": len(labeled),
+        "matched": matched,
+        "precision": matched / len(parsed) if parsed else None,
+        "recall": matched / len(labeled) if labeled else None,
+        "date_accuracy": dates / matched if matched else None,
+    }
@@ -0,0 +1,318 @@
+"""
+synthetic_statements.py
+
+Seeded generator of OCR-like statement and receipt text for benchmarking the
+parsers (BankStatementParser.parse, ReceiptParser.parse) at any size.
+
+Statements follow the layouts of the sample documents in boogasi_ai_data/raw/
+as Tesseract reads them, one text line per table row:
+ - hsbc_uk:   "08 Jun 24 Debit 3,000.00 9,000.00", the date printed once per day
+              (later rows of the day start with the description) and the balance
+              only on the day's last row, long descriptions wrapped onto the line
+              above the row, Balance B/F / Closing Balance rows
+ - bdo:       "October 1, 2023 ATM Withdrawal 8,700.00 17.00 P"
+ - metrobank: "03/02 water bill 1075.99" (no balance column), Previous/Ending balance
+ - landbank:  "01/23/2024 Google Play Store Subscription 499.00 P328,027.50"
+Long statements are split into pages (PAGE_BREAK) with the table header
+repeated, like the multi-page text of a PDF.
+
+Transactions come from synthetic_transactions.generate_transactions, so the
+payee mix is the one the insights benchmark uses. Every document is returned
+with its ground truth.
+
+OCR noise (noise=0..1, roughly the share of characters/lines affected):
+look-alike substitutions (O/0, l/1, S/5, B/8, rn/m), dropped and doubled
+spaces, stray marks ("‘", "|", "_") and blank lines.
+
+Usage:
+    from benchmarks.synthetic_statements import generate_statement, generate_receipt
+    doc = generate_statement("bdo", 1_000, seed=42, noise=0.02)
+    doc["text"], doc["transactions"]
+"""
+from __future__ import annotations
+import random
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from boogasi_ai_model.ocr_system import PAGE_BREAK
+from benchmarks.synthetic_transactions import generate_transactions
+
+ROWS_PER_PAGE = 30
+
+# Look-alike characters Tesseract confuses on scanned statements
+_CONFUSIONS = {
+    "O": "0", "0": "O", "o": "0", "l": "1", "1": "l", "I": "l",
+    "S": "5", "5": "S", "B": "8", "8": "B", "e": "c", "g": "9", ",": ".",
+}
+_STRAY_MARKS = ("‘", "“", "|", "_", "—", ".")
+
+
+def _money(value: float) -> str:
+    return f"{value:,.2f}"
+
+
+def _wrap(description: str, width: int) -> Tuple[str, str]:
+    """Split a description at a word boundary so the first part fits width."""
+    if len(description) <= width:
+        return "", description
+    cut = description.rfind(" ", 0, width)
+    if cut <= 0:
+        return "", description
+    return description[:cut], description[cut + 1:]
+
+
+def _hsbc_uk(rows: List[Dict], opening: float, start: date, end: date) -> Tuple[List[str], List[str], Callable, List[str]]:
+    paid_in = sum(r["amount"] for r in rows if r["amount"] > 0)
+    paid_out = -sum(r["amount"] for r in rows if r["amount"] < 0)
+    header = [
+        "Your Statement",
+        "Contact Tel +44 1442 422 929",
+        "Current Account Statement",
+        "Account Name MARC DOWNIE",
+        "Account number 022757824",
+        f"Opening Balance {_money(opening)}",
+        f"Payments In {_money(paid_in)}",
+        f"Payments Out {_money(paid_out)}",
+        f"Closing Balance {_money(opening + paid_in - paid_out)}",
+        "Account Type CURRENT/GBP CURRENCY",
+        "International Bank Account Number",
+        "IDLGB2322354/022757824",
+        "Transactions",
+    ]
+    table_header = ["Description", "Date Continued Details Money out Money in Balance"]
+
+    # Rows that open a day (date printed) and rows that close one (balance printed)
+    dated = {id(r) for i, r in enumerate(rows) if i == 0 or rows[i - 1]["date"] != r["date"]}
+    closing_rows = {id(r) for i, r in enumerate(rows) if i == len(rows) - 1 or rows[i + 1]["date"] != r["date"]}
+
+    def row(r: Dict, day: date, balance: float) -> List[str]:
+        marker = "Credit" if r["amount"] > 0 else "Debit"
+        wrapped, rest = _wrap(r["description"].title(), 28)
+        line = f"{rest} {marker} {_money(abs(r['amount']))}"
+        if id(r) in dated:
+            line = f"{day:%d %b %y} {line}"
+        if id(r) in closing_rows:
+            line = f"{line} {_money(balance)}"
+        return [wrapped, line] if wrapped else [line]
+
+    footer = [f"{end:%d %b %y} Closing Balance {_money(opening + paid_in - paid_out)}",
+              "Correspondence: HSBC Bank PLC"]
+    return header + table_header + [f"{start:%d %b %y} Balance B/F {_money(opening)}"], table_header, row, footer
+
+
+def _bdo(rows: List[Dict], opening: float, start: date, end: date) -> Tuple[List[str], List[str], Callable, List[str]]:
+    deposits = sum(r["amount"] for r in rows if r["amount"] > 0)
+    withdrawals = -sum(r["amount"] for r in rows if r["amount"] < 0)
+    closing = opening + deposits - withdrawals
+    header = [
+        "BDO",
+        "John Doe",
+        "BRGY. DEL REMEDIO",
+        "SAN PABLO LAGUNA",
+        f"For {start:%b} {start.day} - {end:%b} {end.day}, {end.year}",
+        "Account Summary Account Number",
+        "001-8201-771-55",
+        f"Balance P {_money(closing)}",
+        f"Withdrawals P {_money(withdrawals)} Your branch",
+        f"Deposits P {_money(deposits)} BDO RIZAL AVENUE SAN PABLO CITY",
+    ]
+    table_header = ["Date Details Withdrawals Debit Deposits Balance"]
+
+    def row(r: Dict, day: date, balance: float) -> List[str]:
+        amount = f"{_money(r['amount'])} P" if r["amount"] > 0 else _money(-r["amount"])
+        return [f"{day:%B} {day.day}, {day.year} {r['description'].title()} {amount} {_money(balance)} P"]
+
+    footer = [
+        f"Closing Balance Total {_money(closing)} P",
+        "BDO Unibank, Inc.",
+        "Contact us by phone for questions, on this statement",
+        "bdo.com.ph We find ways",
+    ]
+    return header + table_header, table_header, row, footer
+
+
+def _metrobank(rows: List[Dict], opening: float, start: date, end: date) -> Tuple[List[str], List[str], Callable, List[str]]:
+    money_in = sum(r["amount"] for r in rows if r["amount"] > 0)
+    money_out = -sum(r["amount"] for r in rows if r["amount"] < 0)
+    closing = opening + money_in - money_out
+    header = [
+        "Metrobank",
+        "Metrobank Magsaysay Ave, Corner Gen. Luna Road, Baguio City, 2600",
+        "Account Name: Pedro Juanico Jr.",
+        "Account Number: 004-700372927-0",
+        f"Statement Period: {start:%m/%d/%Y} to {end:%m/%d/%Y}",
+        "ACCOUNT SUMMARY",
+        f"Balance on {start:%B} {start.day}: ₱ {opening:.2f}",
+        f"Total money in: ₱ {money_in:.2f}",
+        f"Total money out: ₱ {money_out:.2f}",
+        f"Balance on {end:%B} {end.day}: ₱ {closing:.2f}",
+    ]
+    table_header = ["DATE DESCRIPTION WITHDRAWAL DEPOSIT BALANCE"]
+
+    def row(r: Dict, day: date, balance: float) -> List[str]:
+        return [f"{day:%m/%d} {r['description'].lower()} {abs(r['amount']):.2f}"]
+
+    footer = [f"Ending Balance {closing:.2f}"]
+    return header + table_header + [f"Previous balance {opening:.2f}"], table_header, row, footer
+
+
+def _landbank(rows: List[Dict], opening: float, start: date, end: date) -> Tuple[List[str], List[str], Callable, List[str]]:
+    deposits = sum(r["amount"] for r in rows if r["amount"] > 0)
+    withdrawals = -sum(r["amount"] for r in rows if r["amount"] < 0)
+    header = [
+        "LANDBANK",
+        f"{end:%m/%d/%Y}",
+        "WJJ7+F46, UCPB Building, Avenue & L. (in front of Buddy's Restaurant)",
+        "Customer Care Hotline (+632) 8-405-7000",
+        "Account name: JUAN DELA CRUZ",
+        "Account Number: 0016-0308-14",
+        f"Starting Balance: {opening:.2f}",
+        f"Total Deposit: {deposits:.2f}",
+        f"Total Withdrawals: {withdrawals:.2f}",
+        f"Remaining Balance: {opening + deposits - withdrawals:.2f}",
+        f"Duration: {start:%m/%d/%Y} - {end:%m/%d/%Y}",
+        "ACCOUNT STATEMENT",
+    ]
+    table_header = ["Date Description Withdrawal Deposit Balance"]
+
+    def row(r: Dict, day: date, balance: float) -> List[str]:
+        return [f"{day:%m/%d/%Y} {r['description'].title()} {abs(r['amount']):.2f} P{_money(balance)}"]
+
+    return header + table_header, table_header, row, []
+
+
+# bank -> layout(rows, opening balance, first day, last day) returning
+# (first-page lines up to the table, table header repeated on later pages,
+#  row renderer(row, day, running balance) -> lines, closing lines)
+LAYOUTS = {
+    "hsbc_uk": _hsbc_uk,
+    "bdo": _bdo,
+    "metrobank": _metrobank,
+    "landbank": _landbank,
+}
+
+
+def ocr_noise(lines: List[str], noise: float, rng: random.Random) -> List[str]:
+    """Degrade lines the way Tesseract misreads a scan; noise=0 returns them unchanged."""
+    if noise <= 0:
+        return list(lines)
+    noisy = []
+    for line in lines:
+        chars = []
+        for ch in line:
+            roll = rng.random()
+            if roll < noise and ch in _CONFUSIONS:
+                chars.append(_CONFUSIONS[ch])
+            elif ch == " " and roll < noise:
+                continue  # words run together
+            elif ch == " " and roll < 2 * noise:
+                chars.append("  ")
+            else:
+                chars.append(ch)
+        line = "".join(chars).replace("m", "rn", 1) if rng.random() < noise else "".join(chars)
+        if rng.random() < noise:
+            line = rng.choice(_STRAY_MARKS) + line
+        if rng.random() < noise:
+            line = line + " " + rng.choice(_STRAY_MARKS)
+        noisy.append(line)
+        if rng.random() < noise:
+            noisy.append("")
+    return noisy
+
+
+def generate_statement(bank: str, count: int, seed: int = 42, noise: float = 0.0,
+                       rows_per_page: int = ROWS_PER_PAGE) -> Dict:
+    """
+    Statement text with `count` transactions in one bank's layout.
+
+    Args:
+        bank: A LAYOUTS key
+        count: Number of transactions
+        seed: RNG seed (transactions, balances and noise)
+        noise: OCR noise level, 0 (clean) to ~0.1 (very poor scan)
+        rows_per_page: Table rows per page before a PAGE_BREAK
+
+    Returns:
+        {"bank", "text", "lines", "pages", "opening_balance", "transactions"} where
+        transactions are the ground truth in labeled-JSON shape (ISO dates,
+        signed amounts, type, category)
+    """
+    if bank not in LAYOUTS:
+        raise ValueError(f"Unknown bank layout {bank!r} (choose from {', '.join(LAYOUTS)})")
+    rng = random.Random(seed)
+    rows = generate_transactions(count, seed=seed, format_weights={"iso": 1.0})
+    days = [date.fromisoformat(r["date"]) for r in rows]
+    start = days[0] - timedelta(days=1) if days else date(2024, 1, 1)
+    end = days[-1] + timedelta(days=1) if days else start
+
+    # Enough to keep the running balance positive, like a real account
+    opening = round(-sum(r["amount"] for r in rows if r["amount"] < 0) + rng.uniform(1_000, 50_000), 2)
+    header, table_header, render_row, footer = LAYOUTS[bank](rows, opening, start, end)
+
+    pages = [list(header)]
+    balance = opening
+    for i, (r, day) in enumerate(zip(rows, days)):
+        if i and i % rows_per_page == 0:
+            pages[-1].append(f"Statement page {len(pages)}")
+            pages.append(list(table_header))
+        balance = round(balance + r["amount"], 2)
+        pages[-1].extend(render_row(r, day, balance))
+    pages[-1].extend(footer)
+
+    text = PAGE_BREAK.join("\n".join(ocr_noise(page, noise, rng)) for page in pages)
+    return {
+        "bank": bank,
+        "text": text,
+        "lines": text.count("\n") + 1,
+        "pages": len(pages),
+        "opening_balance": opening,
+        "transactions": rows,
+    }
+
+
+# (name, typical price) - grocery / convenience items like the sample receipts
+RECEIPT_ITEMS = [
+    ("ALIBEISS CLEANING WIPES", 88.99), ("BEAR BRAND MILK 300G", 72.50), ("LUCKY ME PANCIT CANTON", 15.75),
+    ("SAN MIGUEL PALE PILSEN", 58.00), ("COKE ZERO 1.5L", 75.00), ("GARDENIA WHITE BREAD", 86.50),
+    ("NESCAFE 3IN1 ORIGINAL", 9.25), ("SAFEGUARD SOAP 135G", 52.75), ("ALASKA EVAP 370ML", 41.00),
+    ("EGGS LARGE 12PCS", 118.00), ("RICE 5KG SINANDOMENG", 289.00), ("COLGATE TOOTHPASTE", 96.50),
+]
+RECEIPT_MERCHANTS = ["TARGET", "SM SUPERMARKET", "PUREGOLD PRICE CLUB", "7-ELEVEN", "MERCURY DRUG"]
+
+
+def generate_receipt(count: int, seed: int = 42, noise: float = 0.0) -> Dict:
+    """
+    Receipt text with `count` item lines.
+
+    Returns:
+        {"text", "lines", "items": [{"description", "price"}], "total"}
+    """
+    rng = random.Random(seed)
+    items = []
+    for _ in range(count):
+        name, price = rng.choice(RECEIPT_ITEMS)
+        quantity = rng.choice((1, 1, 1, 2, 3))
+        items.append({"description": f"{quantity} {name}", "price": round(price * quantity, 2)})
+    subtotal = round(sum(i["price"] for i in items), 2)
+    tax = round(subtotal * 0.12, 2)
+    total = round(subtotal + tax, 2)
+    cash = float(-(-total // 100) * 100) if total else 0.0
+    when = date(2025, 1, 1) + timedelta(days=rng.randrange(365))
+
+    lines = [
+        rng.choice(RECEIPT_MERCHANTS),
+        "SANTA ROSA LAGUNA",
+        f"ST# {rng.randrange(1000, 9999)} OP# {rng.randrange(100, 999):05d} TE# 12 TR# {rng.randrange(10000, 99999)}",
+        f"{when.month}/{when.day}/{when.year} {rng.randrange(1, 13)}:{rng.randrange(60):02d}:{rng.randrange(60):02d} PM",
+    ]
+    lines.extend(f"{i['description']} {_money(i['price'])}" for i in items)
+    lines.extend([
+        f"SUBTOTAL {_money(subtotal)}",
+        f"TAX 12.000 % {_money(tax)}",
+        f"TOTAL {_money(total)}",
+        f"CASH {_money(cash)}",
+        f"CHANGE DUE {_money(cash - total)}",
+        "THANK YOU FOR SHOPPING",
+    ])
+    text = "\n".join(ocr_noise(lines, noise, rng))
+    return {"text": text, "lines": text.count("\n") + 1, "items": items, "total": total}
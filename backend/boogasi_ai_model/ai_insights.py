@@ -8,7 +8,7 @@ Functions:
  - flag_unusual_transactions(data)
  - generate_weekly_report(data)
  - generate_combined_insights(data)
- - generate_insights(data, feature)  # router
+ - generate_insights(data, feature)  # router, see INSIGHT_FEATURES
 
 Accepts `data` as either:
  - list of transaction dicts, or
@@ -28,6 +28,15 @@ import numpy as np
 from datetime import timedelta, datetime
 import re
 
+try:
+    from .deadline import check_deadline
+    from .result_builder import build_records, column_values, format_dates, frame_to_records
+    from .tracing import current_span, traced
+except ImportError:  # imported as a top-level module (scripts in this folder)
+    from deadline import check_deadline
+    from result_builder import build_records, column_values, format_dates, frame_to_records
+    from tracing import current_span, traced
+
 # Placeholder for future LLM text generation (offline-friendly stub)
 def _llm_generate_summary_stub(prompt: str) -> str:
     # Future: call local LLM / template engine here. For now return the prompt headlined.
@@ -99,6 +108,7 @@ def _parse_date_flexible(val):
     except:
         return pd.NaT
 
+@traced("insights._to_dataframe", items=len)
 def _to_dataframe(transactions: List[Dict[str, Any]]) -> pd.DataFrame:
     """Convert transactions list to pandas DataFrame and coerce types."""
     df = pd.DataFrame(transactions).copy()
@@ -118,16 +128,15 @@ def _to_dataframe(transactions: List[Dict[str, Any]]) -> pd.DataFrame:
     df['type'] = df['type'].fillna('').str.lower().replace({'in': 'income'})
     df['category'] = df['category'].fillna('').astype(str)
     # Add sign-consistent value: positive for income, negative for expenses
-    def signed_amount(row):
-        if row['type'] == 'expense':
-            return -abs(row['amount'])
-        if row['type'] == 'income':
-            return abs(row['amount'])
-        # fallback: use amount sign as-is
-        return float(row['amount'])
-    df['signed_amount'] = df.apply(signed_amount, axis=1)
+    # (fallback: use amount sign as-is)
+    amounts = df['amount'].to_numpy(dtype=float)
+    df['signed_amount'] = np.where(
+        df['type'] == 'expense', -np.abs(amounts),
+        np.where(df['type'] == 'income', np.abs(amounts), amounts)
+    )
     return df
 
+@traced("insights.generate_expense_summary")
 def generate_expense_summary(data: Any) -> Dict[str, Any]:
     """Group expenses by category and return totals, percentages, top categories and an insight text."""
     txns = _extract_transactions(data)
@@ -218,6 +227,7 @@ def flag_unusual_transactions(data: Any, z_threshold: float = 2.0) -> Dict[str,
         "summary_text": summary_text
     }
 
+@traced("insights.generate_weekly_report")
 def generate_weekly_report(transactions: Any, days: int = 28) -> Dict[str, Any]:
     try:
         df = _to_dataframe(transactions)
@@ -235,38 +245,37 @@ def generate_weekly_report(transactions: Any, days: int = 28) -> Dict[str, Any]:
         start = latest - pd.Timedelta(days=days - 1)
         period_df = df[(df['date'] >= start) & (df['date'] <= latest)].copy()
 
-        # daily_series
+        # daily_series (one groupby over the period instead of a mask per day)
         all_days = pd.date_range(start=start, end=latest, freq='D')
-        daily_series = []
-        for d in all_days:
-            mask = period_df['date'].dt.normalize() == d.normalize()
-            day_tx = period_df[mask]
-            
-            # Use explicit type field or amount sign
-            income_mask = (day_tx['type'].str.lower() == 'income') | ((day_tx['type'] == '') & (day_tx['amount'] > 0))
-            expense_mask = (day_tx['type'].str.lower() == 'expense') | ((day_tx['type'] == '') & (day_tx['amount'] < 0))
-            
-            income = float(day_tx.loc[income_mask, 'amount'].abs().sum() or 0.0)
-            expense = float(day_tx.loc[expense_mask, 'amount'].abs().sum() or 0.0)
-            net = float(income - expense)
-            daily_series.append({
-                "date": d.strftime("%Y-%m-%d"),
-                "income": income,
-                "expense": expense,
-                "net": net,
-                "transactions_count": int(len(day_tx))
-            })
+        day_labels = format_dates(all_days)
+        day_keys = period_df['date'].dt.normalize()
 
-        # summary (compute if missing)
+        # Use explicit type field or amount sign
         income_mask = (period_df['type'].str.lower() == 'income') | ((period_df['type'] == '') & (period_df['amount'] > 0))
         expense_mask = (period_df['type'].str.lower() == 'expense') | ((period_df['type'] == '') & (period_df['amount'] < 0))
-        
+        abs_amounts = period_df['amount'].abs()
+
+        per_day = pd.DataFrame({
+            'income': abs_amounts.where(income_mask, 0.0),
+            'expense': abs_amounts.where(expense_mask, 0.0),
+            'transactions_count': 1,
+        }).groupby(day_keys).sum().reindex(all_days, fill_value=0)
+        day_income = per_day['income'].to_numpy(dtype=float)
+        day_expense = per_day['expense'].to_numpy(dtype=float)
+        day_net = day_income - day_expense
+        daily_series = build_records({
+            "date": day_labels,
+            "income": day_income,
+            "expense": day_expense,
+            "net": day_net,
+            "transactions_count": per_day['transactions_count'].to_numpy(dtype=int),
+        })
+
+        # summary (compute if missing)
         total_income = float(period_df.loc[income_mask, 'amount'].abs().sum() or 0.0)
         total_expenses = float(period_df.loc[expense_mask, 'amount'].abs().sum() or 0.0)
         net = float(total_income - total_expenses)
-        avg_daily_spend = float(
-            (sum(abs(d['net']) for d in daily_series) / max(1, len(daily_series)))
-        )
+        avg_daily_spend = float(np.abs(day_net).sum() / max(1, len(day_net)))
 
         summary = {
             "total_income": total_income,
@@ -277,21 +286,25 @@ def generate_weekly_report(transactions: Any, days: int = 28) -> Dict[str, Any]:
         }
 
         # category_tree
-        if 'category' in period_df.columns:
-            cat_series = period_df.groupby(period_df['category'].fillna("uncategorized"))['amount'].sum().abs()
-            category_tree = [{"name": c, "total": float(v)} for c, v in cat_series.sort_values(ascending=False).items()]
-        else:
-            category_tree = []
+        categories = period_df['category'].fillna("uncategorized")
+        cat_series = period_df.groupby(categories)['amount'].sum().abs().sort_values(ascending=False)
+        category_tree = build_records({
+            "name": column_values(cat_series.index),
+            "total": cat_series.to_numpy(dtype=float),
+        })
 
         # category_sparklines (top 6)
         top_cats = [c['name'] for c in category_tree[:6]]
         category_sparklines = []
-        for cat in top_cats:
-            series = []
-            for d in all_days:
-                mask = (period_df['date'].dt.normalize() == d.normalize()) & (period_df['category'].fillna("uncategorized") == cat)
-                series.append({"date": d.strftime("%Y-%m-%d"), "amount": float(period_df.loc[mask, 'amount'].sum() or 0.0)})
-            category_sparklines.append({"category": cat, "series": series})
+        if top_cats:
+            per_day_cat = (
+                period_df.groupby([day_keys, categories])['amount'].sum()
+                .unstack(fill_value=0.0)
+                .reindex(index=all_days, columns=top_cats, fill_value=0.0)
+            )
+            for cat in top_cats:
+                series = build_records({"date": day_labels, "amount": per_day_cat[cat].to_numpy(dtype=float)})
+                category_sparklines.append({"category": cat, "series": series})
 
         # distribution (boxplot + outliers)
         amounts = period_df['amount'].values
@@ -302,23 +315,22 @@ def generate_weekly_report(transactions: Any, days: int = 28) -> Dict[str, Any]:
             iqr = q3 - q1 or 1.0
             lower = q1 - 1.5 * iqr
             upper = q3 + 1.5 * iqr
-            outliers = []
             mask_out = (amounts < lower) | (amounts > upper)
-            if mask_out.any():
-                outs = period_df.iloc[np.where(mask_out)[0]]
-                for _, r in outs.iterrows():
-                    outliers.append({"date": pd.to_datetime(r['date']).strftime("%Y-%m-%d"), "amount": float(r['amount']), "index": int(r.name)})
+            outs = period_df[mask_out]
+            outliers = build_records({
+                "date": format_dates(outs['date']),
+                "amount": outs['amount'].to_numpy(dtype=float),
+                "index": outs.index.to_numpy(dtype=int),
+            })
             distribution = {"min": float(np.min(amounts)), "q1": q1, "median": q2, "q3": q3, "max": float(np.max(amounts)), "outliers": outliers}
         else:
             distribution = {"min": 0.0, "q1": 0.0, "median": 0.0, "q3": 0.0, "max": 0.0, "outliers": []}
 
         # flagged and transactions_by_day
         flagged = (flag_unusual_transactions(period_df.to_dict('records')) or {}).get('flagged', [])
-        transactions_by_day = {}
-        for d in all_days:
-            key = d.strftime("%Y-%m-%d")
-            mask = period_df['date'].dt.normalize() == d.normalize()
-            transactions_by_day[key] = period_df[mask].to_dict('records')
+        transactions_by_day = {key: [] for key in day_labels}
+        for key, record in zip(format_dates(day_keys), frame_to_records(period_df)):
+            transactions_by_day[key].append(record)
 
         data = {
             "summary": summary,
@@ -335,12 +347,13 @@ def generate_weekly_report(transactions: Any, days: int = 28) -> Dict[str, Any]:
             "transactions_by_day": transactions_by_day
         }
 
-        return {"feature": "weekly_report", "data": data, "transactions": df.to_dict('records')}
+        return {"feature": "weekly_report", "data": data, "transactions": frame_to_records(df)}
 
     except Exception as e:
         print(f"Error in generate_weekly_report: {e}")
         return {"feature": "weekly_report", "data": {}, "transactions": []}
 
+@traced("insights.generate_combined_insights")
 def generate_combined_insights(data: Any) -> Dict[str, Any]:
     """Combine all financial analyses into a unified report."""
     try:
@@ -403,7 +416,19 @@ def load_learned_patterns(patterns_file: str | Path) -> Dict[str, Any]:
             "category_patterns": {}
         }
 
+# Features served by generate_insights (in dashboard order)
+INSIGHT_FEATURES = (
+    "expense_summary",
+    "cash_flow_forecast",
+    "flag_unusual_transactions",
+    "weekly_report",
+    "combined_insights",
+)
+
+@traced("insights.generate_insights")
 def generate_insights(transactions: List[Dict], feature: str) -> Dict[str, Any]:
+    current_span().set(feature=feature, transactions=len(transactions or []))
+    check_deadline("insights")
     if not transactions:
         return {
             "feature": feature,
@@ -494,6 +519,7 @@ def generate_insights(transactions: List[Dict], feature: str) -> Dict[str, Any]:
         "insight_text": "The requested analysis feature is not available."
     }
 
+@traced("insights.generate_cash_flow_forecast")
 def generate_cash_flow_forecast(transactions):
     # Normalize input and coercions
     df = _to_dataframe(transactions)
@@ -524,16 +550,13 @@ def generate_cash_flow_forecast(transactions):
     ).fillna(0)
 
     # Build weekly_series list (keep last 4 weeks; if fewer, return what's available)
-    series = []
-    for dt, row in weekly.iterrows():
-        series.append({
-            "week_start": dt.strftime("%Y-%m-%d"),
-            "income": float(row.get('income', 0) or 0.0),
-            "expense": float(row.get('expense', 0) or 0.0),
-            "net": float(row.get('net', 0) or 0.0)
-        })
-
-    weekly_series = series[-4:]
+    weekly = weekly.reindex(columns=['income', 'expense', 'net'], fill_value=0.0).iloc[-4:]
+    weekly_series = build_records({
+        "week_start": format_dates(weekly.index),
+        "income": weekly['income'].to_numpy(dtype=float),
+        "expense": weekly['expense'].to_numpy(dtype=float),
+        "net": weekly['net'].to_numpy(dtype=float)
+    })
 
     total_income = float(df.loc[df['amount'] >= 0, 'amount'].sum())
     total_expenses = float(abs(df.loc[df['amount'] < 0, 'amount'].sum()))
@@ -551,6 +574,7 @@ def generate_cash_flow_forecast(transactions):
     }
 
 # Replace any duplicated implementations with this single unified function
+@traced("insights.flag_unusual_transactions", items=lambda result: len(result["flagged"]))
 def flag_unusual_transactions(transactions: Any, window_days: int = 90) -> Dict[str, Any]:
     """
     Robust, single implementation for flagging unusual transactions.
@@ -573,47 +597,50 @@ def flag_unusual_transactions(transactions: Any, window_days: int = 90) -> Dict[
     med = float(baseline['amount'].median())
     mad = float((np.abs(baseline['amount'] - med)).median() or 1.0)
 
-    flagged = []
     # Prepare lower-case description series for comparisons (handle missing descriptions)
     df['desc_norm'] = df['description'].fillna('').astype(str).str.strip().str.lower()
     baseline_desc_counts = baseline['description'].fillna('').astype(str).str.strip().str.lower().value_counts()
 
-    for idx, row in df.iterrows():
-        amt = float(row['amount'])
-        # normalized distance using MAD
-        z_mad = abs(amt - med) / mad
+    # Column-wise inputs for the per-row checks
+    amounts = df['amount'].to_numpy(dtype=float)
+    z_mad = np.abs(amounts - med) / mad
+    payees = df['desc_norm'].tolist()
+    payee_counts = df['desc_norm'].map(baseline_desc_counts).fillna(0).to_numpy(dtype=int)
+    date_values = df['date'].to_numpy(dtype='datetime64[ns]')
+    one_day = np.timedelta64(1, 'D')
+    same_payee_amount = df.groupby(['desc_norm', 'amount'], sort=False).indices
+
+    flag_positions, flag_scores, flag_reasons = [], [], []
+    for pos in range(len(df)):
         reasons = []
         score = 0.0
 
-        # amount outlier
-        if z_mad > 3:
+        # amount outlier (normalized distance using MAD)
+        if z_mad[pos] > 3:
             reasons.append('amount_outlier')
             score += 0.6
-        elif z_mad > 2:
+        elif z_mad[pos] > 2:
             reasons.append('possible_amount_outlier')
             score += 0.35
 
         # rare payee/merchant
-        payee = row['desc_norm']
-        payee_count = int(baseline_desc_counts.get(payee, 0))
-        if payee_count <= 1 and payee != '':
+        payee = payees[pos]
+        if payee_counts[pos] <= 1 and payee != '':
             reasons.append('rare_payee')
             score += 0.2
 
         # duplicate / reversal: same amount & description within 2 days
         if payee:
-            window = df[
-                (df['desc_norm'] == payee) &
-                (df['amount'] == amt) &
-                (abs((df['date'] - row['date']).dt.days) <= 2)
-            ]
-            if len(window) > 1:
-                reasons.append('possible_duplicate_or_reversal')
-                score += 0.2
+            candidates = same_payee_amount[(payee, amounts[pos])]
+            if len(candidates) > 1:
+                gap_days = np.floor((date_values[candidates] - date_values[pos]) / one_day)
+                if np.count_nonzero(np.abs(gap_days) <= 2) > 1:
+                    reasons.append('possible_duplicate_or_reversal')
+                    score += 0.2
 
         # time-based anomaly: transaction on unusual weekday for this payee (optional)
         try:
-            dow = int(row['date'].dayofweek)
+            dow = int(df['date'].iat[pos].dayofweek)
             hist_weekdays = baseline[baseline['desc_norm'] == payee]['date'].dt.dayofweek.value_counts()
             if payee and not hist_weekdays.empty:
                 if hist_weekdays.get(dow, 0) == 0 and hist_weekdays.sum() >= 3:
@@ -623,25 +650,30 @@ def flag_unusual_transactions(transactions: Any, window_days: int = 90) -> Dict[
             pass
 
         if reasons:
-            severity = 'low' if score < 0.4 else 'medium' if score < 0.8 else 'high'
-            flagged.append({
-                "id": int(row.get('index', -1)) if row.get('index', None) is not None else None,
-                "index": int(idx),
-                "date": row['date'].strftime('%Y-%m-%d') if not pd.isna(row['date']) else row.get('date_raw'),
-                "amount": float(amt),
-                "currency": row.get('currency') if 'currency' in row else None,
-                "type": row.get('type'),
-                "category": row.get('category'),
-                "description": row.get('description'),
-                "score": round(min(score, 1.0), 2),
-                "severity": severity,
-                "reasons": reasons,
-                "baseline": {
-                    "median": med,
-                    "mad": mad,
-                    "baseline_count": int(len(baseline))
-                }
-            })
+            flag_positions.append(pos)
+            flag_scores.append(score)
+            flag_reasons.append(reasons)
+
+    # Build the flagged records column-wise
+    rows = df.iloc[flag_positions]
+    scores = np.asarray(flag_scores, dtype=float)
+    count = len(flag_positions)
+    baseline_info = {"median": med, "mad": mad, "baseline_count": int(len(baseline))}
+    flagged = build_records({
+        "id": ([None if v is None else int(v) for v in column_values(rows['index'])]
+               if 'index' in rows.columns else [None] * count),
+        "index": rows.index.to_numpy(dtype=int),
+        "date": format_dates(rows['date'], fallback=rows['date_raw']),
+        "amount": amounts[flag_positions],
+        "currency": column_values(rows['currency']) if 'currency' in rows.columns else [None] * count,
+        "type": column_values(rows['type']),
+        "category": column_values(rows['category']),
+        "description": column_values(rows['description']),
+        "score": np.round(np.minimum(scores, 1.0), 2),
+        "severity": np.where(scores < 0.4, 'low', np.where(scores < 0.8, 'medium', 'high')).astype(object),
+        "reasons": flag_reasons,
+        "baseline": [dict(baseline_info) for _ in range(count)]
+    })
 
     summary = {"total_checked": int(len(df)), "flagged_count": int(len(flagged))}
     return {"feature": "flag_unusual_transactions", "flagged": flagged, "summary": summary}
\ No newline at end of file
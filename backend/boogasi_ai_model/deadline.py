@@ -0,0 +1,119 @@
+"""
+Boogasi Financial Assistant AI - Deadlines and cancellation
+A time budget for one request or document, shared by every stage that works
+on it (OCR, parsing, insights).
+
+The current deadline lives in a context variable, like tracing spans, so it
+reaches code that runs on the caller's thread and PDF page threads (submitted
+with contextvars.copy_context) without being passed through every signature.
+
+ - Long-running calls take their timeout from remaining() (Tesseract is
+   killed when it runs out)
+ - Loops call check_deadline() between units of work (pages, re-reads,
+   transactions); it raises DeadlineExceeded once the budget is spent or the
+   deadline was cancelled (e.g. the client disconnected)
+
+Usage:
+    deadline = Deadline(30)
+    with deadline_scope(deadline):
+        ...
+        check_deadline("ocr.page")
+        text = engine.image_to_string(image)     # timeout = deadline.remaining()
+
+    deadline.cancel()    # from another thread: stop at the next check
+
+Environment:
+ - BOOGASI_DOCUMENT_TIMEOUT       seconds per document in batch, CLI and daemon runs (default 0 = none)
+ - BOOGASI_API_DOCUMENT_TIMEOUT   seconds per uploaded document in the API (default 120, 0 = none)
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class DeadlineExceeded(Exception):
+    """The work ran out of time or was cancelled."""
+
+    def __init__(self, message: str, stage: Optional[str] = None, cancelled: bool = False):
+        super().__init__(message)
+        self.stage = stage
+        self.cancelled = cancelled
+
+
+class Deadline:
+    """Absolute time limit plus a cancel flag, safe to share between threads."""
+
+    def __init__(self, seconds: Optional[float] = None):
+        """
+        Args:
+            seconds: Budget from now; None for no time limit (cancellation only)
+        """
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds if seconds else None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None without a time limit."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.cancelled or self.remaining() == 0.0
+
+    def check(self, stage: Optional[str] = None):
+        """Raise DeadlineExceeded if cancelled or out of time."""
+        if self.cancelled:
+            raise DeadlineExceeded(f"Cancelled{f' during {stage}' if stage else ''}", stage, cancelled=True)
+        if self.remaining() == 0.0:
+            raise DeadlineExceeded(f"Timed out after {self.seconds:g}s{f' during {stage}' if stage else ''}", stage)
+
+
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("boogasi_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make deadline current for the block; None keeps the enclosing one."""
+    if deadline is None:
+        yield _current.get()
+        return
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def check_deadline(stage: Optional[str] = None):
+    """Cooperative cancellation point: raises DeadlineExceeded when the current deadline is spent."""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def remaining_time(cap: Optional[float] = None) -> Optional[float]:
+    """
+    Timeout for a blocking call: seconds left on the current deadline,
+    limited to cap. None when neither applies.
+    """
+    deadline = _current.get()
+    remaining = deadline.remaining() if deadline is not None else None
+    if remaining is None:
+        return cap
+    return remaining if cap is None else min(remaining, cap)
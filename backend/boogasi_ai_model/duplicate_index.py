@@ -0,0 +1,227 @@
+"""
+Boogasi Financial Assistant AI - Near-duplicate document index
+Recognizes a document that was already processed even when its bytes differ
+(re-saved, re-compressed, rescaled, screenshotted with extra margins), so its
+previous parsed result can be returned without running the full OCR.
+
+Each page is normalized (grayscale, 800 px wide, deskewed, borders cropped,
+contrast stretched) and fingerprinted twice:
+ - a 64-bit difference hash (dHash), compared by Hamming distance, as a cheap
+   prefilter
+ - a 32x32 thumbnail, compared by correlation, to confirm a match
+Page images only say two documents share a layout: next month's statement
+from the same bank scores as close as a re-saved copy. So a match also needs
+the same content signature (TesseractOCR.content_signature: a hash of the
+text layer or the first-page preview OCR), and a document matches when it
+has the same number of pages, every page matches the same earlier document
+and their content signatures are equal.
+
+Entries are keyed on the OCR settings plus the parser code and learned
+patterns (BoogasiOCRSystem.result_settings), so a parser or pattern change
+stops stale results from being served.
+
+A match is not free: fingerprinting decodes every page, and for images (and
+PDFs without a full text layer) the content signature costs one low-resolution
+Tesseract run on the first page. What it saves is the full-resolution OCR of
+every page and the parsing.
+
+The index is one per data folder, shared by every caller of the system: it is
+meant for batch, CLI and daemon runs over one user's documents. The API does
+not use it, because uploads carry no uploader identity to scope it by, so a
+statement re-uploaded through the API is processed again.
+
+Layout:
+boogasi_ai_data/cache/duplicates/
+├── index/<key>.json     (fingerprints + metadata, loaded into memory)
+└── results/<key>.json   (stored payload, e.g. parsed result + OCR text, read on a match)
+
+One file per entry, written atomically, so batch worker processes can share
+the index.
+
+Usage:
+    index = DuplicateIndex(cache_dir / "duplicates", settings)
+    pages = document_fingerprint("statement.jpg")
+    content = ocr.content_signature("statement.jpg")
+    previous = index.find(pages, content)          # stored payload or None
+    index.add(pages, content, {"result": result, "text": text}, "statement.jpg")
+
+Requires: Pillow, numpy (pdf2image for PDFs)
+"""
+
+import base64
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from PIL import Image, ImageOps
+
+try:
+    from pdf2image import convert_from_path
+    PDF_SUPPORT = True
+except ImportError:
+    PDF_SUPPORT = False
+
+try:
+    from .image_preprocessing import crop_borders, deskew, to_grayscale
+    from .ocr_cache import settings_digest, write_json_atomic
+    from .deadline import remaining_time
+except ImportError:  # imported as a top-level module (scripts in this folder)
+    from image_preprocessing import crop_borders, deskew, to_grayscale
+    from ocr_cache import settings_digest, write_json_atomic
+    from deadline import remaining_time
+
+NORMALIZED_WIDTH = 800
+THUMB_SIZE = 32
+FINGERPRINT_PDF_DPI = 50
+
+# Re-encoded/rescaled/brightened/padded copies of the sample documents stay
+# within 9 bits and above 0.82 correlation; documents with other layouts are
+# 20+ bits apart and below 0.4. Same-layout documents with different rows fall
+# inside these limits too, which is why find() also compares content.
+MAX_DHASH_DISTANCE = 12
+MIN_CORRELATION = 0.8
+MAX_ASPECT_DIFFERENCE = 0.05
+
+
+def normalize_page(image: Image.Image) -> Image.Image:
+    """Grayscale, fixed width, deskewed, borders cropped, contrast stretched."""
+    gray = to_grayscale(image)
+    height = max(1, round(gray.height * NORMALIZED_WIDTH / gray.width))
+    gray = gray.resize((NORMALIZED_WIDTH, height), Image.BILINEAR)
+    gray = crop_borders(deskew(gray))
+    return ImageOps.autocontrast(gray, cutoff=1)
+
+
+def page_fingerprint(image: Image.Image) -> Dict:
+    """{"dhash": int, "thumb": uint8 THUMB_SIZE x THUMB_SIZE array, "aspect": h/w} of a page."""
+    page = normalize_page(image)
+    small = np.asarray(page.resize((9, 8), Image.BOX), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    thumb = np.asarray(page.resize((THUMB_SIZE, THUMB_SIZE), Image.BOX), dtype=np.uint8)
+    return {
+        "dhash": int("".join("1" if b else "0" for b in bits), 2),
+        "thumb": thumb,
+        "aspect": page.height / page.width,
+    }
+
+
+def document_fingerprint(file_path) -> List[Dict]:
+    """Fingerprints of every page of an image or PDF."""
+    file_path = Path(file_path)
+    if file_path.suffix.lower() == '.pdf':
+        if not PDF_SUPPORT:
+            raise ImportError("pdf2image not installed. Run: pip install pdf2image")
+        images = convert_from_path(str(file_path), dpi=FINGERPRINT_PDF_DPI, timeout=remaining_time())
+        try:
+            return [page_fingerprint(image) for image in images]
+        finally:
+            for image in images:
+                image.close()
+    with Image.open(file_path) as image:
+        # Let the JPEG decoder do most of the downscaling
+        image.draft('L', (NORMALIZED_WIDTH, max(1, image.height * NORMALIZED_WIDTH // max(1, image.width))))
+        return [page_fingerprint(image)]
+
+
+def correlation(a: np.ndarray, b: np.ndarray) -> float:
+    """Pearson correlation of two thumbnails (1.0 = identical up to brightness/contrast)."""
+    a = a.astype(np.float32).ravel()
+    b = b.astype(np.float32).ravel()
+    a -= a.mean()
+    b -= b.mean()
+    norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(a @ b) / norm if norm else 0.0
+
+
+def pages_match(page: Dict, other: Dict) -> bool:
+    if abs(page["aspect"] - other["aspect"]) > MAX_ASPECT_DIFFERENCE * other["aspect"]:
+        return False
+    if bin(page["dhash"] ^ other["dhash"]).count("1") > MAX_DHASH_DISTANCE:
+        return False
+    return correlation(page["thumb"], other["thumb"]) >= MIN_CORRELATION
+
+
+class DuplicateIndex:
+    """Payloads (parsed results) of earlier documents, looked up by page fingerprints."""
+
+    def __init__(self, index_dir, settings: Dict):
+        """
+        Args:
+            index_dir: Folder holding index/ and results/ (created on first write)
+            settings: Current OCR and parser settings; entries made with other settings are ignored
+        """
+        self.index_dir = Path(index_dir) / 'index'
+        self.results_dir = Path(index_dir) / 'results'
+        self.settings_key = settings_digest(settings)
+        self.entries: Dict[str, Dict] = {}
+        self._loaded_mtime = None
+
+    def _refresh(self):
+        """Load entries written since the last lookup (possibly by other processes)."""
+        try:
+            mtime = self.index_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+        self._loaded_mtime = mtime
+        for entry_file in self.index_dir.glob('*.json'):
+            key = entry_file.stem
+            if key in self.entries:
+                continue
+            try:
+                with open(entry_file, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if entry.get('settings') != self.settings_key:
+                continue
+            for page in entry['pages']:
+                page['thumb'] = np.frombuffer(base64.b64decode(page['thumb']), dtype=np.uint8)
+            self.entries[key] = entry
+
+    def find(self, pages: List[Dict], content: str) -> Optional[Dict]:
+        """
+        Stored payload of a previous document whose pages all match and whose
+        content signature is the same, or None.
+        """
+        if not pages or not content:
+            return None
+        self._refresh()
+        for key, entry in self.entries.items():
+            if entry.get('content') != content or len(entry['pages']) != len(pages):
+                continue
+            if all(pages_match(page, other) for page, other in zip(pages, entry['pages'])):
+                try:
+                    with open(self.results_dir / f"{key}.json", 'r', encoding='utf-8') as f:
+                        payload = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    continue
+                payload['duplicate_of'] = entry['filename']
+                return payload
+        return None
+
+    def add(self, pages: List[Dict], content: str, payload: Dict, filename: str):
+        """Remember a successfully processed document and what to return for its duplicates."""
+        if not pages or not content:
+            return
+        key = hashlib.sha256((content + "".join(f"{p['dhash']:016x}{p['thumb'].tobytes().hex()}"
+                                                for p in pages)).encode('utf-8')).hexdigest()[:32]
+        # Payload first: an index entry is only visible once its payload exists
+        write_json_atomic(self.results_dir / f"{key}.json", payload)
+        write_json_atomic(self.index_dir / f"{key}.json", {
+            "filename": filename,
+            "settings": self.settings_key,
+            "content": content,
+            "added_at": datetime.now().isoformat(),
+            "pages": [
+                {"dhash": p["dhash"], "aspect": p["aspect"],
+                 "thumb": base64.b64encode(np.ascontiguousarray(p["thumb"]).tobytes()).decode('ascii')}
+                for p in pages
+            ],
+        })
+        self.entries[key] = {"filename": filename, "settings": self.settings_key, "content": content,
+                             "pages": [{**p, "thumb": np.asarray(p["thumb"]).ravel()} for p in pages]}
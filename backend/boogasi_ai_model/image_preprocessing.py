@@ -0,0 +1,266 @@
+"""
+Boogasi Financial Assistant AI - Image preprocessing for OCR
+Shrinks and cleans document images before they reach Tesseract.
+
+Steps (always applied in this order, each optional):
+ - resize     normalize to target_dpi (when the image reports its DPI) and cap
+              the pixel count; phone photos carry far more pixels than OCR needs
+ - grayscale  single channel (JPEGs are decoded straight to grayscale)
+ - deskew     rotate by the angle that makes text lines horizontal (projection profile)
+ - binarize   adaptive (local mean) threshold; handles shadows and uneven lighting
+ - crop       trim blank margins and dark scan/photo borders
+
+Usage:
+    pre = ImagePreprocessor(steps=("resize", "grayscale", "deskew"))
+    image = pre(pre.open("statement.jpg"))
+
+    pre = ImagePreprocessor.from_spec("resize,grayscale,binarize")   # or "none" / "all"
+
+Environment:
+ - BOOGASI_OCR_PREPROCESS   default steps for the OCR system (default: "resize,grayscale")
+
+Requires: Pillow, numpy
+"""
+
+import math
+import os
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+try:
+    from .tracing import span
+except ImportError:  # imported as a top-level module (scripts in this folder)
+    from tracing import span
+
+PREPROCESS_STEPS = ("resize", "grayscale", "deskew", "binarize", "crop")
+DEFAULT_STEPS = ("resize", "grayscale")
+
+
+def image_dpi(image: Image.Image) -> Optional[float]:
+    """Horizontal DPI stored in the image, or None when missing/implausible (e.g. 72)."""
+    dpi = image.info.get('dpi')
+    try:
+        value = float(dpi[0])
+    except (TypeError, ValueError, IndexError):
+        return None
+    return value if value >= 100 else None
+
+
+def normalize_resolution(image: Image.Image, target_dpi: int = 300, max_pixels: int = 6_000_000,
+                         dpi: Optional[float] = None) -> Image.Image:
+    """Downscale to target_dpi and at most max_pixels; never upscales."""
+    dpi = dpi or image_dpi(image)
+    scale = 1.0
+    if dpi and dpi > target_dpi:
+        scale = target_dpi / dpi
+    pixels = image.width * image.height * scale * scale
+    if max_pixels and pixels > max_pixels:
+        scale *= math.sqrt(max_pixels / pixels)
+    if scale >= 0.95:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+
+
+def to_grayscale(image: Image.Image) -> Image.Image:
+    if image.mode == 'L':
+        return image
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # Transparent areas become white paper instead of black
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image.convert('RGBA'), mask=image.convert('RGBA').getchannel('A'))
+        image = background
+    return image.convert('L')
+
+
+def estimate_skew(gray: Image.Image, max_angle: float = 5.0, step: float = 0.5,
+                  sample_width: int = 800) -> float:
+    """
+    Rotation (degrees, counter-clockwise) that best aligns text lines with the
+    horizontal, searched on a small thumbnail. Aligned lines give the sharpest
+    row-sum (projection) profile.
+    """
+    sample = gray
+    if gray.width > sample_width:
+        sample = gray.resize((sample_width, max(1, round(gray.height * sample_width / gray.width))),
+                             Image.BILINEAR)
+    arr = np.asarray(sample, dtype=np.uint8)
+    ink = Image.fromarray(((arr < arr.mean() * 0.8) * 255).astype(np.uint8))
+
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-max_angle, max_angle + step / 2, step):
+        rotated = ink.rotate(float(angle), resample=Image.NEAREST, fillcolor=0)
+        profile = np.asarray(rotated, dtype=np.float32).sum(axis=1)
+        score = float(np.square(np.diff(profile)).sum())
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def deskew(gray: Image.Image, max_angle: float = 5.0, min_angle: float = 0.25) -> Image.Image:
+    angle = estimate_skew(gray, max_angle=max_angle)
+    if abs(angle) < min_angle:
+        return gray
+    return gray.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+
+def adaptive_binarize(gray: Image.Image, window: Optional[int] = None, offset: float = 0.15) -> Image.Image:
+    """
+    Local-mean (Bradley) threshold: a pixel is ink when it is `offset` darker
+    than the mean of its window. One integral image, so cost is O(pixels)
+    regardless of window size.
+    """
+    a = np.asarray(gray)
+    h, w = a.shape
+    win = window or max(15, (w // 16) | 1)
+    r = win // 2
+    # int32 holds the integral of images up to ~8.4 MP
+    dtype = np.int32 if 255 * h * w < 2**31 else np.int64
+
+    integral = np.zeros((h + 1, w + 1), dtype=dtype)
+    np.cumsum(np.cumsum(a, axis=0, dtype=dtype), axis=1, out=integral[1:, 1:])
+
+    y0 = np.clip(np.arange(h) - r, 0, h)
+    y1 = np.clip(np.arange(h) + r + 1, 0, h)
+    x0 = np.clip(np.arange(w) - r, 0, w)
+    x1 = np.clip(np.arange(w) + r + 1, 0, w)
+
+    band = integral[y1] - integral[y0]          # column prefix sums of each row band
+    del integral
+    sums = band[:, x1] - band[:, x0]
+    del band
+    counts = (y1 - y0)[:, None] * (x1 - x0)[None, :]
+
+    # a > mean * (1 - offset), kept in integers: a * count > sum * (1 - offset)
+    white = a * counts.astype(np.float32) > sums * np.float32(1 - offset)
+    return Image.fromarray(np.where(white, 255, 0).astype(np.uint8))
+
+
+def crop_borders(gray: Image.Image, margin: int = 10, border_fill: float = 0.6,
+                 min_keep: float = 0.3) -> Image.Image:
+    """
+    Trim blank margins and solid dark borders (rows/columns that are mostly ink).
+    Leaves the image alone if the crop would keep less than min_keep of its area.
+    """
+    ink = np.asarray(gray) < 128
+
+    def content_span(fraction: np.ndarray) -> Tuple[int, int]:
+        idx = np.flatnonzero((fraction > 0) & (fraction < border_fill))
+        if idx.size == 0:
+            return 0, fraction.size
+        return max(int(idx[0]) - margin, 0), min(int(idx[-1]) + margin + 1, fraction.size)
+
+    left, right = content_span(ink.mean(axis=0))
+    top, bottom = content_span(ink[:, left:right].mean(axis=1))
+    if (right - left) * (bottom - top) < min_keep * gray.width * gray.height:
+        return gray
+    if (left, top, right, bottom) == (0, 0, gray.width, gray.height):
+        return gray
+    return gray.crop((left, top, right, bottom))
+
+
+class ImagePreprocessor:
+    """Configurable preprocessing pipeline applied to every image before OCR."""
+
+    def __init__(self, steps: Iterable[str] = DEFAULT_STEPS, target_dpi: int = 300,
+                 max_pixels: int = 6_000_000, max_skew: float = 5.0,
+                 binarize_window: Optional[int] = None, binarize_offset: float = 0.15):
+        """
+        Args:
+            steps: Subset of PREPROCESS_STEPS (order is always the canonical one)
+            target_dpi: Resolution images with a known DPI are reduced to
+            max_pixels: Pixel budget after resizing (6 MP ~ a letter page at 250 DPI)
+            max_skew: Largest rotation (degrees) deskew searches
+            binarize_window: Local window in pixels (default: width / 16)
+            binarize_offset: How much darker than the local mean counts as ink
+        """
+        steps = set(steps)
+        unknown = steps - set(PREPROCESS_STEPS)
+        if unknown:
+            raise ValueError(f"Unknown preprocessing steps: {sorted(unknown)}")
+        self.steps = tuple(step for step in PREPROCESS_STEPS if step in steps)
+        self.target_dpi = target_dpi
+        self.max_pixels = max_pixels
+        self.max_skew = max_skew
+        self.binarize_window = binarize_window
+        self.binarize_offset = binarize_offset
+
+    @classmethod
+    def from_spec(cls, spec: Optional[str], **kwargs) -> "ImagePreprocessor":
+        """Build from a comma-separated step list, "none" or "all"."""
+        spec = (spec or "").strip().lower()
+        if spec in ("", "none", "off", "0"):
+            steps = ()
+        elif spec == "all":
+            steps = PREPROCESS_STEPS
+        else:
+            steps = [s.strip() for s in spec.split(",") if s.strip()]
+        return cls(steps=steps, **kwargs)
+
+    def settings(self) -> Dict:
+        """Everything that changes the output image (part of the OCR cache key)."""
+        return {
+            "steps": list(self.steps),
+            "target_dpi": self.target_dpi,
+            "max_pixels": self.max_pixels,
+            "max_skew": self.max_skew,
+            "binarize_window": self.binarize_window,
+            "binarize_offset": self.binarize_offset,
+        }
+
+    def open(self, path: str) -> Image.Image:
+        """
+        Open an image, letting the JPEG decoder downscale and convert to
+        grayscale while decoding when resize/grayscale are enabled.
+        """
+        image = Image.open(path)
+        if image.format == 'JPEG' and ('resize' in self.steps or 'grayscale' in self.steps):
+            dpi = image_dpi(image)
+            width, height = image.size
+            scale = 1.0
+            if 'resize' in self.steps:
+                if dpi and dpi > self.target_dpi:
+                    scale = self.target_dpi / dpi
+                if self.max_pixels and width * height * scale * scale > self.max_pixels:
+                    scale *= math.sqrt(self.max_pixels / (width * height * scale * scale))
+            mode = 'L' if 'grayscale' in self.steps else image.mode
+            # draft() picks the largest DCT scale still >= the requested size
+            image.draft(mode, (max(1, int(width * scale)), max(1, int(height * scale))))
+            if dpi and image.width != width:
+                image.info['dpi'] = (dpi * image.width / width, dpi * image.width / width)
+        return image
+
+    def __call__(self, image: Image.Image, dpi: Optional[float] = None,
+                 timings: Optional[Dict[str, float]] = None) -> Image.Image:
+        """
+        Run the enabled steps.
+
+        Args:
+            image: PIL image (not modified)
+            dpi: Known resolution (e.g. the DPI a PDF page was rasterized at)
+            timings: Optional dict receiving seconds spent per step
+        """
+        for step in self.steps:
+            start = time.perf_counter()
+            with span(f"preprocess.{step}"):
+                if step == 'resize':
+                    image = normalize_resolution(image, self.target_dpi, self.max_pixels, dpi)
+                elif step == 'grayscale':
+                    image = to_grayscale(image)
+                elif step == 'deskew':
+                    image = deskew(to_grayscale(image), max_angle=self.max_skew)
+                elif step == 'binarize':
+                    image = adaptive_binarize(to_grayscale(image), self.binarize_window, self.binarize_offset)
+                elif step == 'crop':
+                    image = crop_borders(to_grayscale(image))
+            if timings is not None:
+                timings[step] = timings.get(step, 0.0) + time.perf_counter() - start
+        return image
+
+
+def default_preprocessor() -> ImagePreprocessor:
+    """Preprocessor configured from BOOGASI_OCR_PREPROCESS."""
+    return ImagePreprocessor.from_spec(os.environ.get('BOOGASI_OCR_PREPROCESS', ",".join(DEFAULT_STEPS)))
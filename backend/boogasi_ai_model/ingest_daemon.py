@@ -0,0 +1,321 @@
+"""
+Boogasi Financial Assistant AI - Watch-folder ingestion daemon
+Processes documents dropped into boogasi_ai_data/raw and receipts within
+seconds of the drop, instead of on the next manual main.py run.
+
+ - The watched folders are polled (os.scandir every BOOGASI_WATCH_INTERVAL
+   seconds; works the same on local disks, network shares and container bind
+   mounts, where inotify events are unreliable)
+ - A file is queued once its size and mtime have not changed for
+   BOOGASI_WATCH_DEBOUNCE seconds, so scans and copies still being written
+   are left alone
+ - Queued files go to the same OCR worker processes as batch_process; parsed
+   output is saved to parsed/ by an OutputWriter and then recorded in the
+   batch manifest, so a restart (or the next main.py run) does not process
+   them again
+ - Queue depth and drop-to-parsed lag are available from stats() and written
+   to cache/ingest_stats.json whenever they change
+
+Usage:
+    python ingest_daemon.py              # run until Ctrl+C
+    python ingest_daemon.py --status     # print the stats of a running daemon
+    python main.py --watch
+
+Environment:
+ - BOOGASI_WATCH_INTERVAL   Seconds between folder scans (default 1.0)
+ - BOOGASI_WATCH_DEBOUNCE   Seconds a file must stay unchanged before it is queued (default 2.0)
+ - BOOGASI_BATCH_WORKERS    OCR worker processes (default: CPU count)
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+try:
+    from .ocr_cache import BatchManifest, write_json_atomic
+    from .ocr_system import IMAGE_EXTENSIONS, BoogasiOCRSystem, _batch_worker_process, _init_batch_worker
+    from .output_writer import OutputWriter
+except ImportError:  # imported as a top-level module (scripts in this folder)
+    from ocr_cache import BatchManifest, write_json_atomic
+    from ocr_system import IMAGE_EXTENSIONS, BoogasiOCRSystem, _batch_worker_process, _init_batch_worker
+    from output_writer import OutputWriter
+
+DOCUMENT_EXTENSIONS = IMAGE_EXTENSIONS + ('.pdf',)
+# Lag statistics cover the most recent documents only
+LAG_WINDOW = 1000
+# Stats file is rewritten at least this often, so a stale updated_at means the daemon is gone
+STATS_HEARTBEAT = 10.0
+
+Signature = Tuple[int, int]  # (size, mtime_ns)
+
+
+class IngestionDaemon:
+    """Watches document folders and feeds new or changed files to the OCR workers."""
+
+    def __init__(self, system: BoogasiOCRSystem, folders: Optional[List] = None,
+                 workers: Optional[int] = None, poll_interval: Optional[float] = None,
+                 debounce: Optional[float] = None, stats_path: Optional[Path] = None):
+        """
+        Args:
+            system: OCR system whose settings, parsed/ folder and manifest are used
+            folders: Folders to watch (default: raw/ and receipts/ of the data folder)
+            workers: OCR worker processes (1 = in this process; default: BOOGASI_BATCH_WORKERS or CPU count)
+            poll_interval: Seconds between scans (default: BOOGASI_WATCH_INTERVAL or 1.0)
+            debounce: Seconds a file must be unchanged before it is queued
+                      (default: BOOGASI_WATCH_DEBOUNCE or 2.0)
+            stats_path: Where stats() is written (default: cache/ingest_stats.json)
+        """
+        self.system = system
+        self.folders = [Path(f) for f in (folders or (system.data_dir / 'raw', system.data_dir / 'receipts'))]
+        if workers is None:
+            workers = int(os.environ.get('BOOGASI_BATCH_WORKERS', os.cpu_count() or 1))
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval or float(os.environ.get('BOOGASI_WATCH_INTERVAL', '1.0'))
+        self.debounce = debounce if debounce is not None else float(os.environ.get('BOOGASI_WATCH_DEBOUNCE', '2.0'))
+        self.stats_path = Path(stats_path or system.cache_dir / 'ingest_stats.json')
+        self.manifest = BatchManifest(system.manifest_path, system.result_settings())
+
+        # path -> {"signature", "first_seen", "changed_at"} while waiting for the file to settle
+        self._settling: Dict[Path, Dict] = {}
+        self._queue: Deque[Tuple[Path, Signature, float]] = deque()
+        self._in_flight: Dict[Future, Tuple[Path, Signature, float]] = {}
+        # Last signature processed (or found unchanged) per file; a new signature means a new version
+        self._handled: Dict[Path, Signature] = {}
+        # Parsed results being saved; recorded in the manifest once on disk
+        self._writes: List[Tuple[Future, Path, Signature]] = []
+        self._lags: Deque[float] = deque(maxlen=LAG_WINDOW)
+        self.processed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.last_error: Optional[Dict] = None
+        self.started_at = datetime.now().isoformat()
+        self._last_stats_write = 0.0
+        self._executor = None
+        self._writer: Optional[OutputWriter] = None
+
+    def _active(self) -> set:
+        return {path for path, _, _ in self._queue} | {path for path, _, _ in self._in_flight.values()}
+
+    def scan(self, now: float) -> bool:
+        """Pick up new and changed files; queue the ones that have settled. Returns True if anything changed."""
+        changed = False
+        present = set()
+        active = self._active()
+        for folder in self.folders:
+            try:
+                entries = list(os.scandir(folder))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.name.lower().endswith(DOCUMENT_EXTENSIONS):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue  # removed while scanning
+                path = Path(entry.path)
+                signature = (stat.st_size, stat.st_mtime_ns)
+                present.add(path)
+                if path in active or self._handled.get(path) == signature:
+                    continue
+                settling = self._settling.get(path)
+                if settling is None or settling["signature"] != signature:
+                    self._settling[path] = {
+                        "signature": signature,
+                        "first_seen": settling["first_seen"] if settling else now,
+                        "changed_at": now,
+                    }
+                    changed = True
+                    continue
+                if now - settling["changed_at"] < self.debounce:
+                    continue
+                del self._settling[path]
+                changed = True
+                if self.manifest.unchanged_output(path) is not None:
+                    # Already parsed with the current settings (earlier run or batch_process)
+                    self._handled[path] = signature
+                    self.skipped += 1
+                    continue
+                self._queue.append((path, signature, settling["first_seen"]))
+        for path in [p for p in self._settling if p not in present]:
+            del self._settling[path]
+        for path in [p for p in self._handled if p not in present]:
+            del self._handled[path]
+        return changed
+
+    def _dispatch(self):
+        """Hand queued files to free workers (the rest stay in our queue, so its depth is visible)."""
+        while self._queue and len(self._in_flight) < self.workers:
+            path, signature, first_seen = self._queue.popleft()
+            if self.workers == 1:
+                future = self._executor.submit(self.system.process_document, str(path), write_parsed=False)
+            else:
+                future = self._executor.submit(_batch_worker_process, str(path))
+            self._in_flight[future] = (path, signature, first_seen)
+
+    def _collect(self, done) -> bool:
+        for future in done:
+            path, signature, first_seen = self._in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"success": False, "filename": path.name, "error": str(e)}
+            lag = time.monotonic() - first_seen
+            self._lags.append(lag)
+            self._handled[path] = signature
+            if result.get('success'):
+                self.processed += 1
+                write = self._writer.write(result, [self.system.parsed_output_path(path)])
+                self._writes.append((write, path, signature))
+                print(f"   ✓ Ingested {path.name} ({lag:.1f}s after it appeared)")
+            else:
+                self.failed += 1
+                self.last_error = {"file": path.name, "error": result.get('error', 'Unknown error'),
+                                   "at": datetime.now().isoformat()}
+                print(f"   ❌ {path.name}: {self.last_error['error']}")
+        return bool(done)
+
+    def _record_writes(self):
+        """Add files whose parsed output is on disk to the batch manifest."""
+        recorded = False
+        for item in [w for w in self._writes if w[0].done()]:
+            self._writes.remove(item)
+            write, path, signature = item
+            if write.exception() is not None:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            # Changed while it was processed: leave it unrecorded so the new version is picked up
+            if (stat.st_size, stat.st_mtime_ns) == signature:
+                self.manifest.record(path, self.system.parsed_output_path(path))
+                recorded = True
+        if recorded:
+            self.manifest.save()
+
+    def stats(self) -> Dict:
+        """Queue depth, counters and drop-to-parsed lag (seconds) of recent documents."""
+        now = time.monotonic()
+        waiting = [first_seen for _, _, first_seen in self._queue] + \
+                  [first_seen for _, _, first_seen in self._in_flight.values()]
+        lags = sorted(self._lags)
+        return {
+            "folders": [str(f) for f in self.folders],
+            "workers": self.workers,
+            "settling": len(self._settling),
+            "queued": len(self._queue),
+            "in_flight": len(self._in_flight),
+            "queue_depth": len(self._queue) + len(self._in_flight),
+            "oldest_waiting_seconds": round(now - min(waiting), 2) if waiting else 0.0,
+            "processed": self.processed,
+            "failed": self.failed,
+            "skipped_unchanged": self.skipped,
+            "lag_seconds": {
+                "count": len(lags),
+                "last": round(self._lags[-1], 2) if lags else None,
+                "mean": round(sum(lags) / len(lags), 2) if lags else None,
+                "p95": round(lags[min(len(lags) - 1, int(len(lags) * 0.95))], 2) if lags else None,
+                "max": round(lags[-1], 2) if lags else None,
+            },
+            "last_error": self.last_error,
+            "started_at": self.started_at,
+            "updated_at": datetime.now().isoformat(),
+        }
+
+    def _write_stats(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_stats_write < STATS_HEARTBEAT:
+            return
+        self._last_stats_write = now
+        try:
+            write_json_atomic(self.stats_path, self.stats(), indent=2)
+        except OSError as e:
+            print(f"⚠️  Could not write ingestion stats: {e}")
+
+    def run_once(self, timeout: float = 0.0) -> bool:
+        """One scan / dispatch / collect round; waits up to timeout for a worker to finish."""
+        changed = self.scan(time.monotonic())
+        self._dispatch()
+        done = set()
+        if self._in_flight:
+            done, _ = wait(list(self._in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+        elif timeout:
+            time.sleep(timeout)
+        changed = self._collect(done) or changed
+        self._dispatch()
+        self._record_writes()
+        self._write_stats(force=changed)
+        return changed
+
+    def run(self, max_seconds: Optional[float] = None):
+        """
+        Watch until interrupted (Ctrl+C) or max_seconds have passed. Files
+        already handed to a worker are finished before returning.
+        """
+        self._writer = OutputWriter()
+        if self.workers == 1:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+        else:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_batch_worker,
+                # One tesseract thread per worker process, as in batch_process
+                initargs=(self.system.tesseract_path, self.system.patterns_file, 1, self.system.worker_options),
+            )
+        print(f"\n👀 Watching {', '.join(str(f) for f in self.folders)} "
+              f"(every {self.poll_interval:g}s, debounce {self.debounce:g}s, {self.workers} workers)")
+        stop_at = time.monotonic() + max_seconds if max_seconds else None
+        try:
+            while stop_at is None or time.monotonic() < stop_at:
+                self.run_once(timeout=self.poll_interval)
+        except KeyboardInterrupt:
+            print(f"\n🛑 Stopping: finishing {len(self._in_flight)} documents in progress")
+        finally:
+            self._queue.clear()
+            self._collect(wait(list(self._in_flight))[0] if self._in_flight else set())
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            self._writer.close()
+            self._record_writes()
+            self.manifest.save()
+            self._write_stats(force=True)
+
+
+def run_daemon(workers: Optional[int] = None, patterns_file: str = "learned_patterns.json"):
+    """Start the OCR system and watch raw/ and receipts/ until Ctrl+C."""
+    system = BoogasiOCRSystem(patterns_file=patterns_file)
+    IngestionDaemon(system, workers=workers).run()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Process documents dropped into raw/ and receipts/")
+    parser.add_argument("--workers", type=int, help="OCR worker processes (default: BOOGASI_BATCH_WORKERS or CPU count)")
+    parser.add_argument("--status", action="store_true", help="Print the stats of a running daemon and exit")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        stats_path = Path(__file__).resolve().parent.parent / 'boogasi_ai_data' / 'cache' / 'ingest_stats.json'
+        try:
+            with open(stats_path, 'r', encoding='utf-8') as f:
+                print(json.dumps(json.load(f), indent=2))
+        except FileNotFoundError:
+            print(f"No ingestion stats at {stats_path} (daemon not started yet)")
+            return 1
+        return 0
+
+    run_daemon(workers=args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
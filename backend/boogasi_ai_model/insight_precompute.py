@@ -0,0 +1,139 @@
+"""
+insight_precompute.py
+
+Eager background computation of every insight feature for a parsed document.
+
+Once a statement or receipt has been parsed into normalized transactions,
+schedule() submits every feature in INSIGHT_FEATURES to a small thread pool
+and keeps the futures under a document id. Later requests for that document
+are dictionary lookups: a finished result is returned immediately, and one
+still running is awaited instead of being computed a second time.
+
+Evicting a document (max_documents) only forgets it: futures already handed
+out keep running to completion. A future that was cancelled anyway (executor
+shutdown) is resubmitted the next time it is asked for.
+
+Usage:
+    precomputer = InsightPrecomputer(max_workers=2)
+    doc_id = precomputer.schedule(transactions)
+    ...
+    result = precomputer.get(doc_id, "weekly_report")   # None if unknown/failed
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .ai_insights import INSIGHT_FEATURES, generate_insights
+except ImportError:  # imported as a top-level module (scripts in this folder)
+    from ai_insights import INSIGHT_FEATURES, generate_insights
+
+
+def document_key(transactions: List[Dict]) -> str:
+    """Stable id for a list of normalized transactions (content hash)."""
+    payload = json.dumps(transactions, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+class InsightPrecomputer:
+    """Background insight computation with per-document result storage."""
+
+    def __init__(self, max_workers: int = 2, max_documents: int = 256,
+                 features: Iterable[str] = INSIGHT_FEATURES):
+        """
+        Args:
+            max_workers: Threads computing insights in the background
+            max_documents: Documents kept before the least recently used is evicted
+            features: Features computed for every scheduled document
+        """
+        self.features = tuple(features)
+        self.max_documents = max_documents
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="insights")
+        # document id -> (transactions snapshot, feature -> future)
+        self._documents: "OrderedDict[str, Tuple[List[Dict], Dict[str, Future]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def schedule(self, transactions: List[Dict], document_id: Optional[str] = None,
+                 first: Optional[str] = None) -> str:
+        """
+        Queue every feature for a document and return its id.
+
+        Args:
+            transactions: Normalized transactions of the document
+            document_id: Id to store results under (default: content hash)
+            first: Feature to queue ahead of the others (e.g. the one requested now)
+        """
+        document_id = document_id or document_key(transactions)
+        with self._lock:
+            if document_id in self._documents:
+                self._documents.move_to_end(document_id)
+                return document_id
+
+            order = list(self.features)
+            if first in order:
+                order.remove(first)
+                order.insert(0, first)
+
+            snapshot = list(transactions)
+            self._documents[document_id] = (snapshot, {
+                feature: self._executor.submit(generate_insights, snapshot, feature)
+                for feature in order
+            })
+
+            # Not cancelled: a request may already be awaiting one of the futures
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+
+        return document_id
+
+    def future(self, document_id: str, feature: str) -> Optional[Future]:
+        """The future for a document's feature, or None when not scheduled."""
+        with self._lock:
+            entry = self._documents.get(document_id)
+            if entry is None:
+                return None
+            self._documents.move_to_end(document_id)
+            snapshot, features = entry
+            pending = features.get(feature)
+            if pending is not None and pending.cancelled():
+                try:
+                    pending = features[feature] = self._executor.submit(generate_insights, snapshot, feature)
+                except RuntimeError:  # executor shut down
+                    return None
+            return pending
+
+    def get(self, document_id: str, feature: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        Precomputed result for a document's feature.
+        Waits for a running computation; returns None if the document or
+        feature is unknown, the computation failed or `timeout` expired.
+        """
+        pending = self.future(document_id, feature)
+        if pending is None:
+            return None
+        try:
+            return pending.result(timeout=timeout)
+        except Exception:  # includes concurrent.futures.CancelledError
+            return None
+
+    def status(self, document_id: str) -> Optional[Dict[str, str]]:
+        """Per-feature state ('pending', 'done', 'failed', 'cancelled') or None if unknown."""
+        with self._lock:
+            entry = self._documents.get(document_id)
+            if entry is None:
+                return None
+            features = dict(entry[1])
+        return {
+            feature: ("pending" if not f.done()
+                      else "cancelled" if f.cancelled()
+                      else "failed" if f.exception() is not None
+                      else "done")
+            for feature, f in features.items()
+        }
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,104 @@
+"""
+Boogasi Financial Assistant AI - Line lexer
+Tokenizes OCR'd statement and receipt lines once, so the parsers read typed
+tokens instead of re-running their patterns over the same lines.
+
+Each line becomes a LineTokens with:
+ - text: the line without surrounding whitespace
+ - date: the date token the line starts with ("07 Jun 2024", "07/06/2024"),
+   i.e. the start of a statement transaction, or None
+ - amounts: every numeric-looking token in line order (with its currency
+   symbol, if any); parsers take the rightmost one as the amount
+ - currency: the currency symbol of the first amount that has one
+ - keywords: the KEYWORDS that occur in the line (case-insensitive,
+   substring match - "debited" has "debit")
+
+Usage:
+    for tokens in lex(text):
+        if tokens.date and tokens.amounts:
+            amount = amount_value(tokens.amounts[-1])
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+# Statement lines: a transaction starts with a date at line start
+# ("07 Jun 2024", "07 Jun 24", "07 Jun", or "07/06/2024")
+MONTH_NAMES = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)'
+DATE_START_RE = re.compile(
+    rf'^(?:\d{{1,2}}[\/\-]\d{{1,2}}[\/\-]\d{{2,4}}|\d{{1,2}}\s+{MONTH_NAMES}\b(?:\s+\d{{2,4}})?)',
+    re.IGNORECASE
+)
+# Amount pattern - pick rightmost numeric-looking token (with optional currency)
+AMOUNT_RE = re.compile(r'([£$₱]?\s*-?\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)')
+CURRENCY_SYMBOLS = '£$₱'
+
+# Words the parsers act on: transaction direction on statements, totals and
+# payment lines on receipts
+KEYWORDS = (
+    'debit', 'payment to', 'withdraw', 'dra wn', 'paid',
+    'credit', 'received', 'deposit', 'inward',
+    'total', 'tax', 'change', 'cash', 'tender',
+)
+
+
+class LineTokens:
+    """
+    The typed tokens of one line. The leading date is read on construction
+    (every parser checks it); amounts and keywords are scanned for on first
+    use and kept, so a line looked at again (look-ahead, the next page of a
+    stream) is never re-scanned.
+    """
+
+    __slots__ = ('text', 'offset', 'date', '_amounts', '_keywords')
+
+    def __init__(self, line: str, offset: int = 0):
+        """
+        Args:
+            line: One line of text
+            offset: Position of the line in the document text
+        """
+        self.text = text = line.strip()
+        self.offset = offset
+        match = DATE_START_RE.match(text)
+        self.date: Optional[str] = match.group(0) if match else None
+        self._amounts: Optional[List[str]] = None
+        self._keywords: Optional[Tuple[str, ...]] = None
+
+    @property
+    def amounts(self) -> List[str]:
+        if self._amounts is None:
+            self._amounts = AMOUNT_RE.findall(self.text)
+        return self._amounts
+
+    @property
+    def currency(self) -> Optional[str]:
+        for token in self.amounts:
+            if token[0] in CURRENCY_SYMBOLS:
+                return token[0]
+        return None
+
+    @property
+    def keywords(self) -> Tuple[str, ...]:
+        if self._keywords is None:
+            lowered = self.text.lower()
+            self._keywords = tuple([keyword for keyword in KEYWORDS if keyword in lowered])
+        return self._keywords
+
+    def __repr__(self):
+        return f"LineTokens({self.text!r})"
+
+
+def lex(text: str) -> List[LineTokens]:
+    """Tokens of every line of text (split on newlines; blank lines included)."""
+    tokens = []
+    offset = 0
+    for line in text.split('\n'):
+        tokens.append(LineTokens(line, offset))
+        offset += len(line) + 1
+    return tokens
+
+
+def amount_value(token: str) -> float:
+    """'₱ 1,234.56' -> 1234.56 (raises ValueError for a malformed token)."""
+    return float(token.replace('£', '').replace('$', '').replace('₱', '').replace(',', '').strip())
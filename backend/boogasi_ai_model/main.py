@@ -4,6 +4,7 @@ Combines training and OCR processing
 """
 
 import os
+import sys
 from pathlib import Path
 
 # --- ADD THESE LINES ---
@@ -13,6 +14,12 @@ RAW_DIR = BASE_DIR / 'boogasi_ai_data' / 'raw'
 RECEIPTS_DIR = BASE_DIR / 'boogasi_ai_data' / 'receipts'
 PARSED_DIR = BASE_DIR / 'boogasi_ai_data' / 'parsed'  # Add this line
 
+# Worker processes for batch OCR (1 = sequential)
+BATCH_WORKERS = int(os.environ.get('BOOGASI_BATCH_WORKERS', os.cpu_count() or 1))
+
+# Skip documents unchanged since the last run (BOOGASI_INCREMENTAL=0 reprocesses everything)
+INCREMENTAL_BATCH = os.environ.get('BOOGASI_INCREMENTAL', '1') != '0'
+
 # Create required directories if they don't exist
 for dir_path in [LABELED_DIR, RAW_DIR, RECEIPTS_DIR, PARSED_DIR]:
     dir_path.mkdir(parents=True, exist_ok=True)
@@ -83,7 +90,9 @@ def process_new_documents(ocr_system):
         results = ocr_system.batch_process(
             str(raw_dir), 
             "*.jpg",
-            output_dir=str(PARSED_DIR)  # Add output directory parameter
+            output_dir=str(PARSED_DIR),  # Add output directory parameter
+            workers=BATCH_WORKERS,
+            incremental=INCREMENTAL_BATCH
         )
         print(f"\n✅ Processed {len(results)} bank statements")
     
@@ -94,11 +103,32 @@ def process_new_documents(ocr_system):
         results = ocr_system.batch_process(
             str(receipts_dir), 
             "*.jpg",
-            output_dir=str(PARSED_DIR)  # Add output directory parameter
+            output_dir=str(PARSED_DIR),  # Add output directory parameter
+            workers=BATCH_WORKERS,
+            incremental=INCREMENTAL_BATCH
         )
         print(f"\n✅ Processed {len(results)} receipts")
 
 
+def reparse_documents():
+    """Re-train, then re-parse and re-categorize stored OCR text (no Tesseract needed)."""
+    
+    print("\n"+"="*60)
+    print("🔁 RE-PARSING STORED OCR TEXT")
+    print("="*60)
+    
+    trainer = BoogasiModelTrainer(labeled_data_dir=str(LABELED_DIR))
+    if trainer.load_labeled_statements():
+        trainer.save_learned_patterns("learned_patterns.json")
+        trainer.save_model_artifacts("model_artifacts.json")
+    
+    ocr_system = BoogasiOCRSystem(patterns_file="learned_patterns.json", load_ocr=False)
+    results = ocr_system.reparse(str(PARSED_DIR), workers=BATCH_WORKERS)
+    ok = sum(1 for r in results if r.get('success'))
+    print(f"\n✅ Re-parsed {ok}/{len(results)} documents")
+    return results
+
+
 def demo_single_document(ocr_system, file_path: str):
     """Demo: Process a single document and show results."""
     
@@ -154,6 +184,17 @@ def interactive_menu():
 
 if __name__ == "__main__":
     
+    # python main.py --reparse : apply parser/pattern changes to stored OCR text only
+    if '--reparse' in sys.argv[1:]:
+        reparse_documents()
+        sys.exit(0)
+
+    # python main.py --watch : keep processing documents as they land in raw/ and receipts/
+    if '--watch' in sys.argv[1:]:
+        from ingest_daemon import run_daemon
+        run_daemon(workers=BATCH_WORKERS)
+        sys.exit(0)
+
     # Option 1: Automatic Setup and Processing
     print("="*60)
     print("🚀 BOOGASI - AUTOMATIC MODE")
@@ -171,7 +212,7 @@ if __name__ == "__main__":
     print("="*60)
     print("\n1. Place bank statements in: boogasi_ai_data/raw/")
     print("2. Place receipts in: boogasi_ai_data/receipts/")
-    print("3. Run this script again to process them")
+    print("3. Run this script again to process them (or keep `python main.py --watch` running)")
     print("\nOr use the functions directly:")
     print("   result = ocr_system.process_document('path/to/file.jpg')")
     
@@ -0,0 +1,176 @@
+"""
+Boogasi Financial Assistant AI - OCR result cache and batch manifest
+
+OCRCache stores OCR output (text, per-page sources and, when the OCR mode
+produced them, word boxes) under the SHA-256 of the file's bytes plus the
+OCR settings used (language, DPI, preprocessing, ...). The same document
+processed with the same settings is never OCR'd twice.
+
+BatchManifest remembers, per input file, its size, mtime, content hash and
+the parsed output written for it, so batch_process(incremental=True) only
+touches new or changed files. Entries are keyed on the OCR settings plus the
+parser code and learned patterns (BoogasiOCRSystem.result_settings), so a
+parser or pattern change re-parses every file (the OCR cache still saves the
+Tesseract runs).
+
+Layout:
+boogasi_ai_data/cache/
+├── ocr/ab/abcdef....json   (one entry per content+settings key)
+└── manifest.json           (batch manifest)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def file_digest(path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_digest(settings: Dict) -> str:
+    """Stable hash of an OCR settings dict."""
+    payload = json.dumps(settings, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# mkstemp creates owner-only files; renamed files get the mode open() would have given them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def write_bytes_atomic(path: Path, data: bytes):
+    """Write bytes to a temp file in the same folder and rename it into place."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json_atomic(path: Path, data, indent: Optional[int] = None):
+    """Write JSON to a temp file in the same folder and rename it into place."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class OCRCache:
+    """Persistent OCR results keyed by file content and OCR settings."""
+
+    def __init__(self, cache_dir):
+        """
+        Args:
+            cache_dir: Folder holding cache entries (created on first write)
+        """
+        self.cache_dir = Path(cache_dir)
+
+    def key(self, content_digest: str, settings: Dict) -> str:
+        """Cache key for a file digest + OCR settings."""
+        return hashlib.sha256(f"{content_digest}:{settings_digest(settings)}".encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached entry or None."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️  Ignoring unreadable OCR cache entry {path.name}: {e}")
+            return None
+
+    def put(self, key: str, entry: Dict):
+        """Store an entry (text, pages, words, ...) under key."""
+        write_json_atomic(self._path(key), {**entry, "cached_at": datetime.now().isoformat()})
+
+
+class BatchManifest:
+    """Tracks which input files were already processed, and with which settings."""
+
+    def __init__(self, manifest_path, settings: Dict):
+        """
+        Args:
+            manifest_path: JSON file holding the manifest
+            settings: Current OCR and parser settings; entries made with other settings count as stale
+        """
+        self.path = Path(manifest_path)
+        self.settings_key = settings_digest(settings)
+        self.files: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.files = json.load(f).get('files', {})
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠️  Starting a new batch manifest ({e})")
+
+    def unchanged_output(self, file_path: Path) -> Optional[Path]:
+        """
+        Output path of a previous run if the file and settings are unchanged and
+        that output still exists; otherwise None (the file must be processed).
+        Size + mtime are checked first; the content hash only when they differ.
+        """
+        entry = self.files.get(str(Path(file_path).resolve()))
+        if not entry or entry.get('settings') != self.settings_key:
+            return None
+        output = Path(entry.get('output', ''))
+        if not entry.get('output') or not output.exists():
+            return None
+
+        stat = Path(file_path).stat()
+        if stat.st_size == entry.get('size') and stat.st_mtime_ns == entry.get('mtime_ns'):
+            return output
+        if stat.st_size == entry.get('size') and file_digest(file_path) == entry.get('sha256'):
+            # Touched but identical: refresh mtime so the next check is cheap again
+            entry['mtime_ns'] = stat.st_mtime_ns
+            return output
+        return None
+
+    def record(self, file_path: Path, output_path: Path):
+        """Remember a successfully processed file and where its output went."""
+        file_path = Path(file_path)
+        stat = file_path.stat()
+        self.files[str(file_path.resolve())] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_digest(file_path),
+            "settings": self.settings_key,
+            "output": str(Path(output_path).resolve()),
+            "processed_at": datetime.now().isoformat(),
+        }
+
+    def save(self):
+        write_json_atomic(self.path, {"version": 1, "files": self.files}, indent=2)
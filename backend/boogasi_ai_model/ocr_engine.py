@@ -0,0 +1,268 @@
+"""
+Boogasi Financial Assistant AI - Tesseract engines
+Runs recognition for the OCR system and ocr_layout.
+
+Engines:
+ - tesserocr   Binds libtesseract directly. A pool of long-lived engine
+               handles, each loading the language model once; PIL images are
+               handed over in memory (no temp files, no process per image).
+               tesserocr releases the GIL while recognizing, so the PDF page
+               threads and concurrent API uploads each get a handle of their own.
+ - pytesseract Fallback when tesserocr is not installed: one tesseract process
+               per call, images exchanged through temp files.
+
+Both engines take the same Tesseract option strings ("--psm 6 -c key=value")
+and return image_to_data results in pytesseract's Output.DICT shape. Both
+stop recognizing when the current deadline (deadline.py) runs out and raise
+DeadlineExceeded: pytesseract kills the tesseract process, tesserocr cancels
+the recognition in place.
+
+Usage:
+    engine = default_engine()
+    text = engine.image_to_string(image, lang='eng', config='--psm 6')
+    data = engine.image_to_data(image, lang='eng')    # {"text": [...], "conf": [...], ...}
+
+Environment:
+ - BOOGASI_OCR_ENGINE          "auto" (tesserocr when installed), "tesserocr" or "pytesseract"
+ - BOOGASI_OCR_ENGINE_WORKERS  Most tesserocr handles per language (default: CPU count)
+
+Requires: pytesseract, Pillow (tesserocr optional: pip install tesserocr)
+"""
+
+import importlib.util
+import os
+import queue
+import shlex
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import pytesseract
+    from pytesseract import Output
+    PYTESSERACT_AVAILABLE = True
+except ImportError:
+    PYTESSERACT_AVAILABLE = False
+
+try:
+    from .deadline import DeadlineExceeded, check_deadline, remaining_time
+except ImportError:  # imported as a top-level module (scripts in this folder)
+    from deadline import DeadlineExceeded, check_deadline, remaining_time
+
+# Imported on first use, so OMP_THREAD_LIMIT set by batch workers still applies
+TESSEROCR_AVAILABLE = importlib.util.find_spec("tesserocr") is not None
+
+TSV_COLUMNS = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+               'left', 'top', 'width', 'height', 'conf', 'text')
+
+
+def parse_config(config: str) -> Tuple[Optional[int], Dict[str, str]]:
+    """
+    Split a Tesseract option string into (page segmentation mode, variables).
+
+    "--psm 6 -c preserve_interword_spaces=1" -> (6, {"preserve_interword_spaces": "1"})
+    """
+    psm, variables = None, {}
+    args = shlex.split(config or '')
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '--psm' and i + 1 < len(args):
+            psm = int(args[i + 1])
+            i += 1
+        elif arg == '-c' and i + 1 < len(args):
+            name, _, value = args[i + 1].partition('=')
+            variables[name] = value
+            i += 1
+        elif arg.startswith('--psm='):
+            psm = int(arg.split('=', 1)[1])
+        else:
+            raise ValueError(f"Unsupported Tesseract option for the in-process engine: {arg}")
+        i += 1
+    return psm, variables
+
+
+def parse_tsv(tsv: str) -> Dict[str, List]:
+    """Tesseract TSV rows (without header) as pytesseract's Output.DICT."""
+    data: Dict[str, List] = {column: [] for column in TSV_COLUMNS}
+    for row in tsv.splitlines():
+        fields = row.split('\t')
+        if len(fields) < len(TSV_COLUMNS) - 1 or not fields[0].isdigit():
+            continue  # header or blank line
+        fields += [''] * (len(TSV_COLUMNS) - len(fields))
+        for column, value in zip(TSV_COLUMNS, fields):
+            if column == 'text':
+                data[column].append(value)
+            elif column == 'conf':
+                data[column].append(float(value))
+            else:
+                data[column].append(int(value))
+    return data
+
+
+def _time_limit(stage: str) -> Optional[float]:
+    """Seconds one recognition may take under the current deadline (None = unlimited)."""
+    check_deadline(stage)
+    remaining = remaining_time()
+    # Never 0: both engines treat 0 as "no limit"
+    return max(remaining, 0.01) if remaining is not None else None
+
+
+class PytesseractEngine:
+    """One tesseract process per call (pytesseract)."""
+
+    name = "pytesseract"
+
+    def __init__(self):
+        if not PYTESSERACT_AVAILABLE:
+            raise ImportError("pytesseract not installed. Run: pip install pytesseract pillow")
+
+    def version(self) -> str:
+        return str(pytesseract.get_tesseract_version())
+
+    @contextmanager
+    def _killed_on_timeout(self, stage: str) -> Iterator[Optional[float]]:
+        timeout = _time_limit(stage)
+        try:
+            yield timeout
+        except RuntimeError as e:
+            if timeout is not None and 'timeout' in str(e).lower():
+                check_deadline(stage)
+                raise DeadlineExceeded(f"Timed out during {stage}", stage) from e
+            raise
+
+    def image_to_string(self, image, lang: str = 'eng', config: str = '') -> str:
+        with self._killed_on_timeout('ocr.recognize') as timeout:
+            return pytesseract.image_to_string(image, lang=lang, config=config, timeout=timeout or 0)
+
+    def image_to_data(self, image, lang: str = 'eng', config: str = '') -> Dict[str, List]:
+        with self._killed_on_timeout('ocr.recognize') as timeout:
+            return pytesseract.image_to_data(image, lang=lang, config=config, output_type=Output.DICT,
+                                             timeout=timeout or 0)
+
+
+class TesserocrEngine:
+    """
+    Pool of in-process libtesseract handles (tesserocr), one language model
+    load per handle. Handles are created on demand up to max_workers per
+    language and reused for the life of the process.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, max_workers: Optional[int] = None, tessdata_path: Optional[str] = None):
+        """
+        Args:
+            max_workers: Most handles per language; callers beyond that wait
+                         for a free one (default: CPU count)
+            tessdata_path: Folder holding <lang>.traineddata (default: TESSDATA_PREFIX
+                           or the location libtesseract was built with)
+        """
+        import tesserocr
+        self._tesserocr = tesserocr
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.tessdata_path = tessdata_path or os.environ.get('TESSDATA_PREFIX') or tesserocr.get_languages()[0]
+        self._idle: Dict[str, queue.LifoQueue] = {}
+        self._created: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def version(self) -> str:
+        return self._tesserocr.tesseract_version().split()[1]
+
+    @contextmanager
+    def _handle(self, lang: str) -> Iterator:
+        """Borrow an idle handle for lang, creating one if the pool has room."""
+        with self._lock:
+            idle = self._idle.setdefault(lang, queue.LifoQueue())
+            create = idle.empty() and self._created.get(lang, 0) < self.max_workers
+            if create:
+                self._created[lang] = self._created.get(lang, 0) + 1
+        if create:
+            try:
+                api = self._tesserocr.PyTessBaseAPI(path=self.tessdata_path, lang=lang)
+            except Exception:
+                with self._lock:
+                    self._created[lang] -= 1
+                raise
+        else:
+            api = idle.get()
+        try:
+            yield api
+        finally:
+            api.Clear()
+            idle.put(api)
+
+    @contextmanager
+    def _configured(self, lang: str, config: str) -> Iterator:
+        """A handle with config applied, restored to its defaults afterwards."""
+        psm, variables = parse_config(config)
+        with self._handle(lang) as api:
+            previous_psm = api.GetPageSegMode()
+            previous = {name: api.GetVariableAsString(name) for name in variables}
+            try:
+                if psm is not None:
+                    api.SetPageSegMode(psm)
+                for name, value in variables.items():
+                    if not api.SetVariable(name, value):
+                        raise ValueError(f"Unknown Tesseract variable: {name}")
+                yield api
+            finally:
+                api.SetPageSegMode(previous_psm)
+                for name, value in previous.items():
+                    if value is not None:
+                        api.SetVariable(name, value)
+
+    @staticmethod
+    def _recognize(api, image):
+        """Recognize image, giving up when the current deadline runs out."""
+        timeout = _time_limit('ocr.recognize')
+        api.SetImage(image)
+        if not api.Recognize(int(timeout * 1000) if timeout is not None else 0):
+            check_deadline('ocr.recognize')
+            raise RuntimeError("Tesseract recognition failed")
+
+    def image_to_string(self, image, lang: str = 'eng', config: str = '') -> str:
+        with self._configured(lang, config) as api:
+            self._recognize(api, image)
+            return api.GetUTF8Text()
+
+    def image_to_data(self, image, lang: str = 'eng', config: str = '') -> Dict[str, List]:
+        with self._configured(lang, config) as api:
+            self._recognize(api, image)
+            return parse_tsv(api.GetTSVText(0))
+
+
+_default_engine = None
+_default_lock = threading.Lock()
+
+
+def create_engine(kind: Optional[str] = None, max_workers: Optional[int] = None):
+    """
+    Build an engine.
+
+    Args:
+        kind: "auto", "tesserocr" or "pytesseract" (default: BOOGASI_OCR_ENGINE or "auto")
+        max_workers: tesserocr handles per language (default: BOOGASI_OCR_ENGINE_WORKERS)
+    """
+    kind = (kind or os.environ.get('BOOGASI_OCR_ENGINE', 'auto')).strip().lower()
+    if kind not in ('auto', 'tesserocr', 'pytesseract'):
+        raise ValueError(f"Unknown OCR engine: {kind}")
+    if kind == 'tesserocr' or (kind == 'auto' and TESSEROCR_AVAILABLE):
+        if max_workers is None and os.environ.get('BOOGASI_OCR_ENGINE_WORKERS'):
+            max_workers = int(os.environ['BOOGASI_OCR_ENGINE_WORKERS'])
+        try:
+            return TesserocrEngine(max_workers=max_workers)
+        except Exception as e:
+            if kind == 'tesserocr':
+                raise
+            print(f"⚠️  tesserocr unavailable ({e}), using pytesseract")
+    return PytesseractEngine()
+
+
+def default_engine():
+    """Process-wide engine shared by the OCR system and ocr_layout."""
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = create_engine()
+        return _default_engine
@@ -0,0 +1,470 @@
+"""
+Boogasi Financial Assistant AI - Layout-aware OCR
+Word boxes from Tesseract's image_to_data, grouped into visual lines, and
+transaction-table extraction for bank statements.
+
+Table OCR:
+ 1. OCR a downscaled copy of the page into word boxes (cheap layout pass)
+ 2. Find the table header line (Date / Description / Debit / Credit / Balance ...)
+    and derive column boundaries from the header words' positions
+ 3. Re-OCR only the table region at full resolution as a uniform text block
+    (--psm 6), so rows stay aligned
+ 4. Assign each word to a column and join lines into rows; description lines
+    without an amount are carried into the next row that has one
+
+Adaptive two-pass OCR:
+ 1. OCR a downscaled copy (or the original, if already small) into word boxes
+ 2. Re-OCR only low-confidence lines from the full-resolution image as single
+    text lines (--psm 7); when only amounts are uncertain, re-read just those
+    words with a digit whitelist
+ 3. Keep whichever reading Tesseract is more confident about
+
+Usage:
+    table = extract_table(Image.open("statement.jpg"))
+    if table:
+        for row in table["rows"]:
+            print(row["date"], row["description"], row.get("debit"), row.get("credit"))
+
+    result = adaptive_ocr(Image.open("receipt.jpg"))
+    print(result["text"], result["stats"])
+
+Recognition goes through ocr_engine (persistent tesserocr handles when
+installed, pytesseract otherwise); pass engine= to use a specific one.
+
+Requires: pytesseract, Pillow
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+try:
+    from .ocr_engine import default_engine
+    from .tracing import span
+except ImportError:  # imported as a top-level module (scripts in this folder)
+    from ocr_engine import default_engine
+    from tracing import span
+
+# Header words per column kind; two-word phrases are matched before single words
+HEADER_KEYWORDS = {
+    'date': ('date', 'posting date', 'value date', 'txn date', 'trans date'),
+    'description': ('description', 'details', 'particulars', 'transaction', 'transactions',
+                    'narrative', 'remarks', 'reference'),
+    'debit': ('debit', 'debits', 'withdrawal', 'withdrawals', 'paid out', 'payments out',
+              'money out', 'dr'),
+    'credit': ('credit', 'credits', 'deposit', 'deposits', 'paid in', 'payments in',
+               'money in', 'cr'),
+    'amount': ('amount',),
+    'balance': ('balance', 'running balance'),
+}
+NUMERIC_COLUMNS = ('debit', 'credit', 'amount', 'balance')
+NUMERIC_WHITELIST = "0123456789.,-()/"
+
+_PHRASES = {phrase: kind for kind, phrases in HEADER_KEYWORDS.items() for phrase in phrases}
+_MONEY_RE = re.compile(r'^\(?-?[£$₱]?\s*-?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d{1,2})?\)?(?:CR|DR|-)?$', re.IGNORECASE)
+_TABLE_END_RE = re.compile(
+    r'\b(closing balance|balance carried forward|carried forward|total|page \d+ of \d+|end of statement)\b',
+    re.IGNORECASE
+)
+
+
+class Word:
+    """One recognized word and its box (pixel coordinates)."""
+
+    __slots__ = ("text", "left", "top", "width", "height", "conf")
+
+    def __init__(self, text: str, left: int, top: int, width: int, height: int, conf: float):
+        self.text = text
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.conf = conf
+
+    @property
+    def right(self) -> int:
+        return self.left + self.width
+
+    @property
+    def bottom(self) -> int:
+        return self.top + self.height
+
+    def to_dict(self) -> Dict:
+        return {"text": self.text, "left": self.left, "top": self.top,
+                "width": self.width, "height": self.height, "conf": self.conf}
+
+
+class Line:
+    """Words sharing a baseline, left to right."""
+
+    __slots__ = ("words",)
+
+    def __init__(self, words: List[Word]):
+        self.words = sorted(words, key=lambda w: w.left)
+
+    @property
+    def text(self) -> str:
+        return " ".join(w.text for w in self.words)
+
+    @property
+    def top(self) -> int:
+        return min(w.top for w in self.words)
+
+    @property
+    def bottom(self) -> int:
+        return max(w.bottom for w in self.words)
+
+    @property
+    def left(self) -> int:
+        return min(w.left for w in self.words)
+
+    @property
+    def right(self) -> int:
+        return max(w.right for w in self.words)
+
+    @property
+    def conf(self) -> float:
+        """Lowest word confidence on the line (0-100)."""
+        return min(w.conf for w in self.words)
+
+
+def image_to_words(image, lang: str = 'eng', config: str = '', engine=None) -> List[Word]:
+    """Recognized words with boxes and confidences (empty/space-only boxes dropped)."""
+    data = (engine or default_engine()).image_to_data(image, lang=lang, config=config)
+    words = []
+    for i, text in enumerate(data['text']):
+        text = (text or '').strip()
+        if not text:
+            continue
+        try:
+            conf = float(data['conf'][i])
+        except (TypeError, ValueError):
+            conf = -1.0
+        words.append(Word(text, int(data['left'][i]), int(data['top'][i]),
+                          int(data['width'][i]), int(data['height'][i]), conf))
+    return words
+
+
+def group_lines(words: Sequence[Word], tolerance: float = 0.5) -> List[Line]:
+    """
+    Group words into visual lines by vertical centre, across Tesseract blocks
+    (table columns often come back as separate blocks).
+    """
+    lines: List[List[Word]] = []
+    centers: List[float] = []
+    heights: List[float] = []
+    for word in sorted(words, key=lambda w: (w.top + w.height / 2, w.left)):
+        cy = word.top + word.height / 2
+        if lines and abs(cy - centers[-1]) <= tolerance * max(word.height, heights[-1]):
+            current = lines[-1]
+            current.append(word)
+            centers[-1] += (cy - centers[-1]) / len(current)
+            heights[-1] = max(heights[-1], word.height)
+        else:
+            lines.append([word])
+            centers.append(cy)
+            heights.append(word.height)
+    return [Line(line_words) for line_words in lines]
+
+
+def lines_to_text(lines: Sequence[Line]) -> str:
+    return "\n".join(line.text for line in lines)
+
+
+def is_money(token: str) -> bool:
+    return bool(_MONEY_RE.match(token.strip())) and any(c.isdigit() for c in token)
+
+
+def parse_money(value: Optional[str]) -> Optional[float]:
+    """'1,234.56' -> 1234.56; '(12.00)', '12.00-' and '12.00 DR' are negative."""
+    if not value:
+        return None
+    token = value.strip().upper().replace(' ', '')
+    negative = token.startswith('(') or token.endswith('-') or token.endswith('DR') or token.startswith('-')
+    digits = re.sub(r'[^\d.]', '', token.replace('CR', '').replace('DR', ''))
+    if not digits or digits == '.':
+        return None
+    try:
+        number = float(digits)
+    except ValueError:
+        return None
+    return -number if negative else number
+
+
+def find_header(lines: Sequence[Line]) -> Optional[Tuple[int, List[Tuple[str, int, int]]]]:
+    """
+    Index of the table header line and its columns as (kind, left, right),
+    sorted left to right. A header needs a date column, a numeric column and
+    at least three column kinds overall.
+    """
+    for index, line in enumerate(lines):
+        tokens = [(re.sub(r'[^a-z]', '', w.text.lower()), w) for w in line.words]
+        columns: Dict[str, Tuple[int, int]] = {}
+        order: List[str] = []          # column kind per matched token run, left to right
+        unmatched: List[Tuple[int, Word]] = []
+        i = 0
+        while i < len(tokens):
+            matched = None
+            if i + 1 < len(tokens):
+                phrase = f"{tokens[i][0]} {tokens[i + 1][0]}"
+                if phrase in _PHRASES:
+                    matched = (_PHRASES[phrase], tokens[i][1].left, tokens[i + 1][1].right, 2)
+            if matched is None and tokens[i][0] in _PHRASES:
+                matched = (_PHRASES[tokens[i][0]], tokens[i][1].left, tokens[i][1].right, 1)
+            if matched is None:
+                unmatched.append((len(order), tokens[i][1]))
+                i += 1
+                continue
+            kind, left, right, used = matched
+            if kind in columns:
+                left, right = min(left, columns[kind][0]), max(right, columns[kind][1])
+            columns[kind] = (left, right)
+            order.append(kind)
+            i += used
+
+        # Other header words belong to the column title they lead into
+        # ("Payment type and details"), or the last one if trailing ("Balance (PHP)")
+        for position, word in unmatched:
+            if not order:
+                break
+            kind = order[min(position, len(order) - 1)]
+            left, right = columns[kind]
+            columns[kind] = (min(left, word.left), max(right, word.right))
+
+        if ('date' in columns and len(columns) >= 3
+                and any(kind in columns for kind in NUMERIC_COLUMNS)):
+            return index, sorted(((k, l, r) for k, (l, r) in columns.items()), key=lambda c: c[1])
+    return None
+
+
+def column_bounds(columns: Sequence[Tuple[str, int, int]]) -> List[Tuple[str, float, float]]:
+    """Split the page between header columns at the midpoints of their gaps."""
+    bounds = []
+    for i, (kind, left, right) in enumerate(columns):
+        start = float('-inf') if i == 0 else (columns[i - 1][2] + left) / 2
+        end = float('inf') if i == len(columns) - 1 else (right + columns[i + 1][1]) / 2
+        bounds.append((kind, start, end))
+    return bounds
+
+
+def _column_for(word: Word, bounds: Sequence[Tuple[str, float, float]]) -> str:
+    # Amounts are usually right-aligned under their header, text left-aligned
+    # (bare integers such as the day/year of a date count as text)
+    x = word.right if is_money(word.text) and any(c in word.text for c in '.,') else word.left
+    for kind, start, end in bounds:
+        if start <= x < end:
+            return kind
+    return bounds[-1][0]
+
+
+def rows_from_lines(lines: Sequence[Line], bounds: Sequence[Tuple[str, float, float]]) -> Tuple[List[Dict], int]:
+    """
+    Turn table lines into rows of column text.
+
+    Returns:
+        (rows, index of the first line after the table)
+    """
+    kinds = [kind for kind, _, _ in bounds]
+    rows: List[Dict] = []
+    pending: Dict[str, List[str]] = {}
+    last_date = ""
+    end = len(lines)
+
+    for index, line in enumerate(lines):
+        cells: Dict[str, List[str]] = {kind: [] for kind in kinds}
+        for word in line.words:
+            cells[_column_for(word, bounds)].append(word.text)
+        cell_text = {kind: " ".join(parts) for kind, parts in cells.items() if parts}
+        # "Closing balance", "Total", page footers; a dated line is still a transaction
+        if rows and not cell_text.get('date') and _TABLE_END_RE.search(line.text):
+            end = index
+            break
+
+        has_amount = any(cell_text.get(kind) and parse_money(cell_text[kind]) is not None
+                         for kind in NUMERIC_COLUMNS)
+        if cell_text.get('date'):
+            if pending.get('date'):
+                pending = {}  # a dated line that never got an amount (sub-header, noise)
+            pending.setdefault('date', []).append(cell_text['date'])
+        if cell_text.get('description'):
+            pending.setdefault('description', []).append(cell_text['description'])
+        if not has_amount:
+            continue
+
+        date = " ".join(pending.get('date', [])) or last_date
+        row = {"date": date, "description": " ".join(pending.get('description', []))}
+        for kind in NUMERIC_COLUMNS:
+            if cell_text.get(kind):
+                row[kind] = cell_text[kind]
+        row["line"] = index
+        rows.append(row)
+        last_date = date
+        pending = {}
+
+    return rows, end
+
+
+def extract_table(image, lang: str = 'eng', layout_scale: float = 0.5,
+                  min_width: int = 1400, engine=None) -> Optional[Dict]:
+    """
+    Locate and OCR the transaction table of a page image.
+
+    Args:
+        image: PIL image (already preprocessed)
+        lang: Tesseract language
+        layout_scale: Scale of the layout pass; skipped (full resolution) for
+                      images narrower than min_width
+        min_width: Images narrower than this are laid out at full resolution
+        engine: Recognition engine (default: ocr_engine.default_engine())
+
+    Returns:
+        {"text", "rows", "columns", "region"} or None when no table header is found
+    """
+    engine = engine or default_engine()
+    scale = layout_scale if image.width >= min_width and layout_scale < 1 else 1.0
+    with span("ocr.table.layout_pass", scale=scale):
+        layout_image = image
+        if scale < 1:
+            layout_image = image.resize((round(image.width * scale), round(image.height * scale)), Image.BILINEAR)
+        page_lines = group_lines(image_to_words(layout_image, lang, engine=engine))
+
+    header = find_header(page_lines)
+    if header is None:
+        return None
+    header_index, columns = header
+    rows, end = rows_from_lines(page_lines[header_index + 1:], column_bounds(columns))
+    end += header_index + 1
+    if not rows:
+        return None
+
+    top = page_lines[header_index].top
+    bottom = page_lines[end - 1].bottom
+    region = [0, round(top / scale), image.width, round(bottom / scale)]
+    before, table_lines, after = page_lines[:header_index], page_lines[header_index:end], page_lines[end:]
+
+    if scale < 1:
+        # Full-resolution pass over the table only, as one uniform block of text
+        pad = max(4, round((bottom - top) / max(1, end - header_index) / scale / 2))
+        box = (0, max(0, region[1] - pad), image.width, min(image.height, region[3] + pad))
+        with span("ocr.table.region_pass", height=box[3] - box[1]) as s:
+            region_lines = group_lines(image_to_words(image.crop(box), lang, config='--psm 6', engine=engine))
+            region_header = find_header(region_lines)
+            if region_header is not None:
+                region_index, region_columns = region_header
+                region_rows, region_end = rows_from_lines(region_lines[region_index + 1:],
+                                                          column_bounds(region_columns))
+                if region_rows:
+                    rows, columns = region_rows, region_columns
+                    table_lines = region_lines[region_index:region_index + 1 + region_end]
+            s.set(items=len(rows))
+
+    return {
+        "text": lines_to_text([*before, *table_lines, *after]),
+        "rows": rows,
+        "columns": [kind for kind, _, _ in columns],
+        "region": region,
+    }
+
+
+def _looks_numeric(text: str) -> bool:
+    digits = sum(c.isdigit() for c in text)
+    return digits > 0 and digits >= 0.5 * len(text)
+
+
+def _mean_conf(words: Sequence[Word]) -> float:
+    return sum(w.conf for w in words) / len(words) if words else -1.0
+
+
+def _crop(image, box: Tuple[int, int, int, int], zoom: float):
+    """Crop a full-resolution box with some padding, optionally enlarged."""
+    left, top, right, bottom = box
+    pad = max(2, round((bottom - top) * 0.25))
+    crop = image.crop((max(0, left - pad), max(0, top - pad),
+                       min(image.width, right + pad), min(image.height, bottom + pad)))
+    if zoom != 1:
+        crop = crop.resize((max(1, round(crop.width * zoom)), max(1, round(crop.height * zoom))), Image.LANCZOS)
+    return crop, max(0, left - pad), max(0, top - pad)
+
+
+def adaptive_ocr(image, lang: str = 'eng', first_pass_scale: float = 0.5, min_width: int = 1600,
+                 min_conf: float = 70.0, max_retries: int = 60, zoom: Optional[float] = None,
+                 config: str = '', engine=None) -> Dict:
+    """
+    Fast first pass, then confidence-targeted re-recognition.
+
+    Args:
+        image: PIL image (already preprocessed)
+        lang: Tesseract language
+        first_pass_scale: Scale of the first pass for images at least min_width wide
+        min_width: Narrower images get their first pass at full resolution
+        min_conf: Lines whose weakest word is below this (0-100) are re-read
+        max_retries: Most lines re-read per image (lowest confidence first)
+        zoom: Enlargement of re-read crops (default: 1 after a downscaled first
+              pass, 2 when the first pass already used full resolution)
+        config: Extra Tesseract options for the first pass
+        engine: Recognition engine (default: ocr_engine.default_engine())
+
+    Returns:
+        {"text", "words" (full-resolution boxes), "stats"}
+    """
+    engine = engine or default_engine()
+    scale = first_pass_scale if image.width >= min_width and first_pass_scale < 1 else 1.0
+    zoom = zoom or (1.0 if scale < 1 else 2.0)
+
+    with span("ocr.adaptive.first_pass", scale=scale) as s:
+        small = image
+        if scale < 1:
+            small = image.resize((round(image.width * scale), round(image.height * scale)), Image.BILINEAR)
+        words = [Word(w.text, round(w.left / scale), round(w.top / scale),
+                      round(w.width / scale), round(w.height / scale), w.conf)
+                 for w in image_to_words(small, lang, config, engine)]
+        lines = group_lines(words)
+        s.set(items=len(words))
+
+    low = sorted((line for line in lines if line.conf < min_conf), key=lambda line: line.conf)[:max_retries]
+    retried_lines = retried_words = improved = 0
+    with span("ocr.adaptive.retry", lines=len(low)) as s:
+        for line in low:
+            uncertain = [w for w in line.words if w.conf < min_conf]
+            if all(_looks_numeric(w.text) for w in uncertain):
+                # Only amounts are in doubt: re-read those words as digits
+                for word in uncertain:
+                    retried_words += 1
+                    crop, _, _ = _crop(image, (word.left, word.top, word.right, word.bottom), zoom)
+                    candidates = image_to_words(
+                        crop, lang, config=f'--psm 7 -c tessedit_char_whitelist={NUMERIC_WHITELIST}',
+                        engine=engine)
+                    if candidates and _mean_conf(candidates) > word.conf:
+                        word.text = "".join(c.text for c in candidates)
+                        word.conf = _mean_conf(candidates)
+                        improved += 1
+                continue
+
+            retried_lines += 1
+            crop, x0, y0 = _crop(image, (line.left, line.top, line.right, line.bottom), zoom)
+            candidates = image_to_words(crop, lang, config='--psm 7', engine=engine)
+            if candidates and _mean_conf(candidates) > _mean_conf(line.words):
+                line.words = [Word(c.text, x0 + round(c.left / zoom), y0 + round(c.top / zoom),
+                                   round(c.width / zoom), round(c.height / zoom), c.conf)
+                              for c in sorted(candidates, key=lambda c: c.left)]
+                improved += 1
+        s.set(items=improved)
+
+    return {
+        "text": lines_to_text(lines),
+        "words": [w.to_dict() for line in lines for w in line.words],
+        "stats": {
+            "first_pass_scale": scale,
+            "lines": len(lines),
+            "low_confidence_lines": len(low),
+            "retried_lines": retried_lines,
+            "retried_words": retried_words,
+            "improved": improved,
+            "mean_conf": round(_mean_conf([w for line in lines for w in line.words]), 2),
+        },
+    }
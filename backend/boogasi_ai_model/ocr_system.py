@@ -14,17 +14,22 @@ Folder structure:
 boogasi_ai_data/
 ├── raw/            (JPG, PNG, PDF - original documents)
 ├── receipts/       (JPG, PNG - receipt images)
-├── parsed/         (JSON - OCR output)
+├── parsed/         (JSON - parsed output; TXT/table JSON - raw OCR output for re-parsing)
 └── labeled/        (JSON - human-corrected ground truth)
 """
 
 import os
 import json
+import hashlib
 import re
+import shutil
+import subprocess
+import contextvars
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
-from collections import Counter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 try:
     import pytesseract
@@ -36,27 +41,139 @@ except ImportError:
     print("   Install with: pip install pytesseract pillow pdf2image")
 
 try:
-    from pdf2image import convert_from_path
+    from pdf2image import convert_from_path, pdfinfo_from_path
+    from pdf2image.exceptions import PDFPopplerTimeoutError
     PDF_SUPPORT = True
 except ImportError:
     PDF_SUPPORT = False
     print("⚠️  Warning: pdf2image not installed. PDF support disabled.")
 
+try:
+    from .bank_templates import BankTemplate, TemplateReader, detect_currency, detect_template
+    from .deadline import Deadline, DeadlineExceeded, check_deadline, deadline_scope, remaining_time
+    from .duplicate_index import DuplicateIndex, document_fingerprint
+    from .image_preprocessing import ImagePreprocessor, default_preprocessor
+    from .line_lexer import LineTokens, amount_value, lex
+    from .ocr_cache import BatchManifest, OCRCache, file_digest, write_json_atomic
+    from .ocr_engine import default_engine
+    from .ocr_layout import adaptive_ocr, extract_table, parse_money
+    from .output_writer import OutputWriter
+    from .tracing import auto_trace, span, traced
+except ImportError:  # imported as a top-level module (scripts in this folder)
+    from bank_templates import BankTemplate, TemplateReader, detect_currency, detect_template
+    from deadline import Deadline, DeadlineExceeded, check_deadline, deadline_scope, remaining_time
+    from duplicate_index import DuplicateIndex, document_fingerprint
+    from image_preprocessing import ImagePreprocessor, default_preprocessor
+    from line_lexer import LineTokens, amount_value, lex
+    from ocr_cache import BatchManifest, OCRCache, file_digest, write_json_atomic
+    from ocr_engine import default_engine
+    from ocr_layout import adaptive_ocr, extract_table, parse_money
+    from output_writer import OutputWriter
+    from tracing import auto_trace, span, traced
+
+
+PAGE_BREAK = "\n\n--- PAGE BREAK ---\n\n"
+PAGE_BREAK_MARKER = PAGE_BREAK.strip()
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
+
+# Lines the parser looks at from a transaction's date line to find its amount
+# (description continuation plus the last-resort search), so a streamed
+# transaction is final once this many lines have arrived
+TRANSACTION_HORIZON = 10
+
+# Runs of whitespace in a description
+WHITESPACE_RE = re.compile(r'\s+')
+# Transfer phrases in a lowercased description (categorize_transaction)
+TRANSFER_OUT_RE = re.compile(r'\btransfer to\b|\btransfer\s+to\s+bank\b|\btransfer\b.*to\b')
+TRANSFER_IN_RE = re.compile(r'\btransfer from\b|\btransfer in\b|\bcash-in\b|\bdeposit\b')
+
+# Characters that occur on statements and receipts; anything else is OCR noise
+FINANCIAL_CHARSET = (
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+    ".,-/:()&*#%@+₱£$"
+)
+
+# Tesseract settings for the full OCR pass, chosen from the first-page preview
+# (only with early classification; without it every document uses the defaults)
+OCR_PROFILES = {
+    # One uniform block: keeps date, description and amount columns on one line
+    'bank_statement': f"--psm 6 -c tessedit_char_whitelist={FINANCIAL_CHARSET} -c preserve_interword_spaces=1",
+    # A single column of text in varying sizes
+    'receipt': f"--psm 4 -c tessedit_char_whitelist={FINANCIAL_CHARSET}",
+    'unknown': "",
+}
+
+# Text compared when confirming a look-alike duplicate (letters and digits only)
+_CONTENT_NOISE_RE = re.compile(r'[^0-9a-z]+')
+# Modules whose code shapes a parsed result; a change invalidates stored duplicates
+PARSER_SOURCES = ('ocr_system.py', 'bank_templates.py', 'line_lexer.py')
+
+# Preview: top part of the first page at low resolution
+PREVIEW_FRACTION = 0.4
+PREVIEW_WIDTH = 1000
+PREVIEW_PDF_DPI = 100
+
+
+def _rasterize(pdf_path: str, **kwargs) -> List:
+    """convert_from_path, with pdftoppm killed when the current deadline runs out."""
+    check_deadline("ocr.rasterize_page")
+    try:
+        return convert_from_path(pdf_path, timeout=remaining_time(), **kwargs)
+    except PDFPopplerTimeoutError as e:
+        raise DeadlineExceeded("Timed out rasterizing PDF page", "ocr.rasterize_page") from e
+
 
 class TesseractOCR:
     """Handles OCR extraction using Tesseract for all document types."""
     
-    def __init__(self, tesseract_path: Optional[str] = None):
+    def __init__(self, tesseract_path: Optional[str] = None, pdf_dpi: int = 200,
+                 pdf_workers: int = 1, pdf_window: Optional[int] = None,
+                 use_text_layer: bool = True, text_layer_min_chars: int = 20,
+                 cache: Optional[OCRCache] = None, preprocessor: Optional[ImagePreprocessor] = None,
+                 table_mode: bool = False, adaptive: bool = False, adaptive_min_conf: float = 70.0,
+                 engine=None, profiles: Optional[Dict[str, str]] = None):
         """
         Initialize Tesseract OCR.
         
         Args:
             tesseract_path: Path to tesseract executable (optional)
                            If not provided, will try to find it automatically
+            pdf_dpi: Resolution PDF pages are rasterized at
+            pdf_workers: Pages OCR'd concurrently (each runs its own tesseract process)
+            pdf_window: Max pages rasterized/in flight at once (default: 2 * pdf_workers)
+            use_text_layer: Use a PDF page's embedded text instead of OCR when it has one
+            text_layer_min_chars: Alphanumeric characters a page's text layer needs to be
+                                  trusted (scanned pages have none or only a few stray ones)
+            cache: Optional OCRCache; documents already OCR'd with the same
+                   settings are served from it instead of running Tesseract
+            preprocessor: Image cleanup applied before OCR (default: from
+                          BOOGASI_OCR_PREPROCESS, i.e. resize + grayscale)
+            table_mode: For images, locate the transaction table from word boxes
+                        and return its rows pre-split (falls back to plain OCR
+                        when no table header is found)
+            adaptive: Two-pass OCR: a fast low-resolution pass, then re-recognition
+                      of low-confidence lines/amounts only (images and scanned PDF pages)
+            adaptive_min_conf: Word confidence (0-100) below which a line is re-read
+            engine: Recognition engine (default: ocr_engine.default_engine(), i.e.
+                    persistent in-process tesserocr handles when installed)
+            profiles: Tesseract options per previewed document type (default: OCR_PROFILES)
         """
         if not TESSERACT_AVAILABLE:
             raise ImportError("pytesseract not installed. Run: pip install pytesseract pillow")
         
+        self.pdf_dpi = pdf_dpi
+        self.pdf_workers = max(1, pdf_workers)
+        self.pdf_window = max(1, pdf_window or 2 * self.pdf_workers)
+        self.use_text_layer = use_text_layer
+        self.text_layer_min_chars = text_layer_min_chars
+        self.cache = cache
+        self.preprocessor = preprocessor or default_preprocessor()
+        self.table_mode = table_mode
+        self.adaptive = adaptive
+        self.adaptive_min_conf = adaptive_min_conf
+        self.profiles = profiles or OCR_PROFILES
+        self.engine_version = None
+        
         # Auto-detect tesseract path if not provided
         if tesseract_path is None:
             tesseract_path = self._find_tesseract()
@@ -68,8 +185,10 @@ class TesseractOCR:
         
         # Test if tesseract is accessible
         try:
-            version = pytesseract.get_tesseract_version()
-            print(f"✅ Tesseract OCR ready (v{version})")
+            self.engine = engine or default_engine()
+            version = self.engine.version()
+            self.engine_version = str(version)
+            print(f"✅ Tesseract OCR ready (v{version}, {self.engine.name})")
         except Exception as e:
             print(f"❌ Tesseract not found: {e}")
             print("   Please install Tesseract OCR engine")
@@ -124,97 +243,391 @@ class TesseractOCR:
         
         return None
     
-    def extract_from_image(self, image_path: str, lang: str = 'eng') -> str:
+    @traced("ocr.extract_from_image", items=len)
+    def extract_from_image(self, image_path: str, lang: str = 'eng', config: str = '') -> str:
         """
         Extract text from an image file using Tesseract.
         
         Args:
             image_path: Path to image file (JPG, PNG)
             lang: Language code (default: 'eng' for English)
+            config: Extra Tesseract options (see TesseractOCR.profiles)
         
         Returns:
             Extracted text as string
         """
         try:
-            image = Image.open(image_path)
-            
-            # Optional: Preprocess image for better OCR
-            # image = image.convert('L')  # Convert to grayscale
-            
-            text = pytesseract.image_to_string(image, lang=lang)
+            with self.preprocessor.open(image_path) as image:
+                image = self.preprocessor(image)
+                text = self._recognize(image, lang, config)
             return text.strip()
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             print(f"❌ Error extracting from image: {e}")
             return ""
     
-    def extract_from_pdf(self, pdf_path: str, lang: str = 'eng') -> str:
+    def _recognize(self, image, lang: str, config: str = '') -> str:
+        """Text of one preprocessed image (single pass, or adaptive two-pass)."""
+        if not self.adaptive:
+            return self.engine.image_to_string(image, lang=lang, config=config)
+        result = adaptive_ocr(image, lang, min_conf=self.adaptive_min_conf, config=config, engine=self.engine)
+        stats = result["stats"]
+        print(f"   ✓ Adaptive OCR: {stats['low_confidence_lines']} low-confidence lines, "
+              f"{stats['improved']} improved")
+        return result["text"]
+    
+    @traced("ocr.extract_table", items=lambda table: len(table["rows"]) if table else 0)
+    def extract_table_from_image(self, image_path: str, lang: str = 'eng') -> Optional[Dict]:
+        """
+        Layout-aware OCR of a statement image (see ocr_layout.extract_table).
+        
+        Returns:
+            {"text", "rows", "columns", "region"} or None if no table was found
+        """
+        try:
+            with self.preprocessor.open(image_path) as image:
+                return extract_table(self.preprocessor(image), lang, engine=self.engine)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"⚠️  Table OCR failed, using plain OCR: {e}")
+            return None
+    
+    @traced("ocr.extract_from_pdf", items=len)
+    def extract_from_pdf(self, pdf_path: str, lang: str = 'eng', config: str = '') -> str:
         """
         Extract text from PDF by converting pages to images.
         
         Args:
             pdf_path: Path to PDF file
             lang: Language code (default: 'eng' for English)
+            config: Extra Tesseract options for OCR'd pages
         
         Returns:
             Extracted text from all pages
         """
+        text, _ = self.extract_pdf_with_pages(pdf_path, lang, config)
+        return text
+    
+    def extract_pdf_with_pages(self, pdf_path: str, lang: str = 'eng',
+                               config: str = '') -> Tuple[str, List[Dict]]:
+        """
+        Extract text from a PDF and report how each page was read.
+        
+        Returns:
+            (full text, [{"page": 1, "source": "text_layer" | "ocr", "char_count": n}, ...])
+        """
         if not PDF_SUPPORT:
             raise ImportError("pdf2image not installed. Run: pip install pdf2image")
         
         try:
-            # Convert PDF pages to images
-            images = convert_from_path(pdf_path)
-            
-            full_text = ""
-            for i, image in enumerate(images, 1):
-                print(f"      Processing page {i}/{len(images)}...")
-                page_text = pytesseract.image_to_string(image, lang=lang)
-                full_text += page_text + "\n\n--- PAGE BREAK ---\n\n"
-            
-            return full_text.strip()
+            pages = list(self.iter_pdf_pages(pdf_path, lang, config))
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             print(f"❌ Error extracting from PDF: {e}")
+            return "", []
+        text = "".join(page_text + PAGE_BREAK for _, page_text, _ in pages).strip()
+        page_info = [
+            {"page": page, "source": source, "char_count": len(page_text)}
+            for page, page_text, source in pages
+        ]
+        return text, page_info
+    
+    def iter_pdf_pages(self, pdf_path: str, lang: str = 'eng',
+                       config: str = '') -> Iterator[Tuple[int, str, str]]:
+        """
+        Read a PDF page by page, yielding (page_number, text, source) in page order.
+        
+        Pages with an extractable text layer (digitally generated statements) are
+        returned directly with source "text_layer"; only scanned pages are
+        rasterized and OCR'd ("ocr"). Rasterization happens one page at a time
+        with at most `pdf_window` pages in flight, so memory stays flat in page
+        count and the first page's text is available as soon as it is ready.
+        """
+        if not PDF_SUPPORT:
+            raise ImportError("pdf2image not installed. Run: pip install pdf2image")
+        
+        page_count = int(pdfinfo_from_path(pdf_path, timeout=remaining_time()).get('Pages', 0))
+        layer = self._pdf_text_layer(pdf_path) if self.use_text_layer else []
+        
+        def text_layer_for(page: int) -> Optional[str]:
+            if page <= len(layer):
+                page_text = layer[page - 1]
+                if sum(c.isalnum() for c in page_text) >= self.text_layer_min_chars:
+                    return page_text
+            return None
+        
+        if self.pdf_workers == 1:
+            for page in range(1, page_count + 1):
+                check_deadline("ocr.pdf")
+                page_text = text_layer_for(page)
+                if page_text is not None:
+                    print(f"      Page {page}/{page_count}: text layer")
+                    yield page, page_text, "text_layer"
+                else:
+                    print(f"      Processing page {page}/{page_count}...")
+                    yield page, self._ocr_pdf_page(pdf_path, page, lang, config), "ocr"
+            return
+        
+        # tesseract/pdftoppm run as subprocesses, so threads are enough to overlap pages
+        pool = ThreadPoolExecutor(max_workers=self.pdf_workers, thread_name_prefix="pdf-ocr")
+        pending = deque()
+        next_page = 1
+        try:
+            while next_page <= page_count or pending:
+                while next_page <= page_count and len(pending) < self.pdf_window:
+                    check_deadline("ocr.pdf")
+                    page_text = text_layer_for(next_page)
+                    if page_text is not None:
+                        future = Future()
+                        future.set_result(page_text)
+                        pending.append((next_page, future, "text_layer"))
+                    else:
+                        ctx = contextvars.copy_context()  # keep trace spans and the deadline of this document
+                        future = pool.submit(ctx.run, self._ocr_pdf_page, pdf_path, next_page, lang, config)
+                        pending.append((next_page, future, "ocr"))
+                    next_page += 1
+                page, future, source = pending.popleft()
+                page_text = future.result()
+                print(f"      Page {page}/{page_count}: {'text layer' if source == 'text_layer' else 'OCR'}")
+                yield page, page_text, source
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    
+    def _pdf_text_layer(self, pdf_path: str, last_page: Optional[int] = None) -> List[str]:
+        """
+        Per-page embedded text via poppler's pdftotext (installed alongside the
+        pdftoppm that pdf2image uses). Returns [] when unavailable.
+        """
+        pages_arg = ['-l', str(last_page)] if last_page else []
+        pdftotext = shutil.which('pdftotext')
+        if not pdftotext:
+            return []
+        with span("ocr.pdf_text_layer") as s:
+            try:
+                completed = subprocess.run(
+                    [pdftotext, '-layout', '-enc', 'UTF-8', *pages_arg, str(pdf_path), '-'],
+                    capture_output=True, timeout=remaining_time(cap=120), check=True
+                )
+            except subprocess.TimeoutExpired as e:
+                check_deadline("ocr.pdf_text_layer")
+                print(f"⚠️  Could not read PDF text layer: {e}")
+                return []
+            except (OSError, subprocess.SubprocessError) as e:
+                print(f"⚠️  Could not read PDF text layer: {e}")
+                return []
+            # pdftotext separates pages with form feeds
+            pages = completed.stdout.decode('utf-8', errors='replace').split('\f')
+            s.set(items=len(pages))
+        return pages
+    
+    def _ocr_pdf_page(self, pdf_path: str, page: int, lang: str, config: str = '') -> str:
+        """Rasterize and OCR a single PDF page."""
+        with span("ocr.page", page=page) as s:
+            with span("ocr.rasterize_page"):
+                images = _rasterize(pdf_path, dpi=self.pdf_dpi, first_page=page, last_page=page)
+            try:
+                text = "".join(self._recognize(self.preprocessor(image, dpi=self.pdf_dpi), lang, config)
+                               for image in images)
+            finally:
+                for image in images:
+                    image.close()
+            s.set(items=len(text))
+        return text
+    
+    @traced("ocr.preview", items=len)
+    def preview_text(self, file_path: str, lang: str = 'eng') -> str:
+        """
+        Cheap text sample for early classification: the top PREVIEW_FRACTION of
+        the first page, OCR'd at about PREVIEW_WIDTH pixels wide. For PDFs the
+        first page's text layer is used when it has one.
+        """
+        file_path = Path(file_path)
+        try:
+            if file_path.suffix.lower() == '.pdf':
+                if self.use_text_layer:
+                    layer = self._pdf_text_layer(str(file_path), last_page=1)
+                    if layer and sum(c.isalnum() for c in layer[0]) >= self.text_layer_min_chars:
+                        return layer[0]
+                if not PDF_SUPPORT:
+                    return ""
+                images = _rasterize(str(file_path), dpi=PREVIEW_PDF_DPI, first_page=1, last_page=1)
+                if not images:
+                    return ""
+                image = images[0]
+            else:
+                image = Image.open(file_path)
+                # Let the JPEG decoder do most of the downscaling
+                image.draft('L', (PREVIEW_WIDTH, max(1, image.height * PREVIEW_WIDTH // max(1, image.width))))
+            with image:
+                top = image.crop((0, 0, image.width, max(1, int(image.height * PREVIEW_FRACTION))))
+                if top.width > PREVIEW_WIDTH:
+                    top = top.resize((PREVIEW_WIDTH, max(1, round(top.height * PREVIEW_WIDTH / top.width))),
+                                     Image.BILINEAR)
+                return self.engine.image_to_string(top.convert('L'), lang=lang)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"⚠️  Preview OCR failed: {e}")
             return ""
     
-    def process_document(self, file_path: str, lang: str = 'eng') -> Dict:
+    def content_signature(self, file_path: str, lang: str = 'eng') -> str:
+        """
+        Hash of what a document says, so a look-alike found by the duplicate
+        index (same layout) is only reused when its content matches too: every
+        page of a PDF's text layer when it has one, else the first-page preview
+        OCR (header, account and period). "" when no text could be read.
+        """
+        file_path = Path(file_path)
+        text = ""
+        if file_path.suffix.lower() == '.pdf' and self.use_text_layer:
+            layer = self._pdf_text_layer(str(file_path))
+            if layer and all(sum(c.isalnum() for c in page) >= self.text_layer_min_chars for page in layer):
+                text = "\n".join(layer)
+        if not text:
+            digest = file_digest(file_path) if self.cache is not None else None
+            text = self._cached_preview(file_path, lang, digest)
+        normalized = _CONTENT_NOISE_RE.sub('', text.lower())
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest() if normalized else ""
+    
+    def ocr_settings(self, lang: str = 'eng') -> Dict:
+        """Every setting that changes OCR output; part of the cache key."""
+        return {
+            "engine": self.engine_version,
+            "lang": lang,
+            "pdf_dpi": self.pdf_dpi,
+            "use_text_layer": self.use_text_layer,
+            "text_layer_min_chars": self.text_layer_min_chars,
+            "preprocess": self.preprocessor.settings(),
+            "table_mode": self.table_mode,
+            "adaptive": self.adaptive,
+            "adaptive_min_conf": self.adaptive_min_conf if self.adaptive else None,
+            # Only when customized, so existing cache entries and manifests stay valid
+            **({"profiles": self.profiles} if self.profiles is not OCR_PROFILES else {}),
+        }
+    
+    def process_document(self, file_path: str, lang: str = 'eng',
+                         classify: Optional[Callable[[str], str]] = None,
+                         reject_unknown: bool = False) -> Dict:
         """
         Process any supported document type.
         
         Args:
             file_path: Path to document file
             lang: Language code
+            classify: Optional text -> document type function (DocumentClassifier.classify).
+                      A first-page preview is classified first and the full pass
+                      uses that type's profiles settings
+            reject_unknown: With classify, stop after the preview when the type is 'unknown'
         
         Returns:
             Dictionary with extracted text and metadata
         """
+        for event in self.iter_document(file_path, lang, classify, reject_unknown):
+            if event["event"] == "done":
+                return event["result"]
+    
+    def iter_document(self, file_path: str, lang: str = 'eng',
+                      classify: Optional[Callable[[str], str]] = None,
+                      reject_unknown: bool = False) -> Iterator[Dict]:
+        """
+        process_document() as a stream of events, so callers can use each
+        page's text while later pages are still being read:
+        
+            {"event": "preview", "document_type": "bank_statement"}   (with classify)
+            {"event": "page", "page": 1, "text": "...", "source": "ocr" | "text_layer" | "cache"}
+            {"event": "done", "result": {...}}                         (always last)
+        
+        The "done" result is what process_document returns.
+        """
         file_path = Path(file_path)
         
         if not file_path.exists():
-            return {
+            yield {"event": "done", "result": {
                 "success": False,
                 "error": f"File not found: {file_path}",
                 "text": ""
-            }
+            }}
+            return
         
         ext = file_path.suffix.lower()
         
         print(f"\n📄 Processing: {file_path.name}")
         print(f"   Type: {ext}")
         
-        if ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']:
-            text = self.extract_from_image(str(file_path), lang)
-            doc_type = "image"
-        elif ext == '.pdf':
-            text = self.extract_from_pdf(str(file_path), lang)
-            doc_type = "pdf"
-        else:
-            return {
+        if ext not in IMAGE_EXTENSIONS and ext != '.pdf':
+            yield {"event": "done", "result": {
                 "success": False,
                 "error": f"Unsupported file type: {ext}",
                 "text": ""
-            }
+            }}
+            return
+        
+        digest = file_digest(file_path) if self.cache is not None else None
+        
+        preview_type = None
+        if classify is not None:
+            preview_type = classify(self._cached_preview(file_path, lang, digest))
+            print(f"   ✓ Preview: {preview_type}")
+            yield {"event": "preview", "document_type": preview_type}
+            if preview_type == 'unknown' and reject_unknown:
+                yield {"event": "done", "result": {
+                    "success": False,
+                    "error": "Unrecognized document (rejected after first-page preview)",
+                    "filename": file_path.name,
+                    "preview_type": preview_type,
+                    "text": ""
+                }}
+                return
+        config = self.profiles.get(preview_type or 'unknown', '')
+        
+        cache_key = None
+        if digest is not None:
+            cache_key = self.cache.key(digest, {**self.ocr_settings(lang), "config": config})
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print("   ✓ OCR cache hit")
+                cached.pop("cached_at", None)
+                for page, page_text in enumerate(cached.get("text", "").split(PAGE_BREAK), 1):
+                    yield {"event": "page", "page": page, "text": page_text, "source": "cache"}
+                yield {"event": "done", "result": {
+                    **cached,
+                    "filename": file_path.name,
+                    "processed_at": datetime.now().isoformat(),
+                    "ocr_cached": True,
+                }}
+                return
+        
+        table = None
+        if ext in IMAGE_EXTENSIONS:
+            if self.table_mode and preview_type != 'receipt':
+                table = self.extract_table_from_image(str(file_path), lang)
+            if table is not None:
+                text = table.pop("text")
+            else:
+                text = self.extract_from_image(str(file_path), lang, config)
+            doc_type = "image"
+            yield {"event": "page", "page": 1, "text": text, "source": "ocr"}
+        else:
+            if not PDF_SUPPORT:
+                raise ImportError("pdf2image not installed. Run: pip install pdf2image")
+            text_parts, pages = [], []
+            try:
+                for page, page_text, source in self.iter_pdf_pages(str(file_path), lang, config):
+                    text_parts.append(page_text + PAGE_BREAK)
+                    pages.append({"page": page, "source": source, "char_count": len(page_text)})
+                    yield {"event": "page", "page": page, "text": page_text, "source": source}
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                print(f"❌ Error extracting from PDF: {e}")
+                text_parts, pages = [], []
+            text = "".join(text_parts).strip()
+            doc_type = "pdf"
         
-        return {
+        result = {
             "success": True,
             "filename": file_path.name,
             "file_type": doc_type,
@@ -223,6 +636,44 @@ class TesseractOCR:
             "char_count": len(text),
             "processed_at": datetime.now().isoformat()
         }
+        if doc_type == "pdf":
+            # Which pages came from the embedded text layer and which needed OCR
+            result["pages"] = pages
+        if table is not None:
+            # Pre-split transaction rows for BankStatementParser.parse_rows
+            result["table"] = table
+        if preview_type is not None:
+            result["preview_type"] = preview_type
+        
+        # Empty text usually means OCR failed; don't make that permanent
+        if cache_key is not None and text.strip():
+            try:
+                self.cache.put(cache_key, {k: v for k, v in result.items()
+                                           if k not in ("filename", "processed_at")})
+            except OSError as e:
+                print(f"⚠️  Could not write OCR cache entry: {e}")
+        yield {"event": "done", "result": result}
+    
+    def _cached_preview(self, file_path: Path, lang: str, digest: Optional[str]) -> str:
+        """preview_text(), stored in the OCR cache so cache hits skip Tesseract entirely."""
+        if digest is None:
+            return self.preview_text(str(file_path), lang)
+        key = self.cache.key(digest, {
+            "preview": [PREVIEW_FRACTION, PREVIEW_WIDTH, PREVIEW_PDF_DPI],
+            "engine": self.engine_version,
+            "lang": lang,
+            "use_text_layer": self.use_text_layer,
+        })
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached.get("text", "")
+        text = self.preview_text(str(file_path), lang)
+        if text.strip():
+            try:
+                self.cache.put(key, {"text": text})
+            except OSError as e:
+                print(f"⚠️  Could not write OCR cache entry: {e}")
+        return text
 
 
 class DocumentClassifier:
@@ -243,6 +694,7 @@ class DocumentClassifier:
             'paid', 'customer copy', 'merchant copy'
         ]
     
+    @traced("classifier.classify")
     def classify(self, text: str) -> str:
         """
         Classify document as 'bank_statement' or 'receipt'.
@@ -288,11 +740,28 @@ class DocumentClassifier:
         return 'unknown'
 
 
+def compile_category_index(patterns: Dict) -> tuple:
+    """
+    Flatten learned patterns into one ordered tuple of (lowercase needle, category):
+    merchant names first, then category keywords, in file order. Scanning it
+    gives the same answer as walking the nested dicts but does the lowercasing
+    once, so the tuple can be built before forking workers and shared.
+    """
+    index = [(merchant.lower(), category)
+             for merchant, category in patterns.get('merchant_categories', {}).items()]
+    index.extend((keyword.lower(), category)
+                 for category, keywords in patterns.get('category_patterns', {}).items()
+                 for keyword in keywords)
+    return tuple(index)
+
+
 class BankStatementParser:
     """Parses bank statements from extracted text."""
     
     def __init__(self, learned_patterns=None, model_artifacts=None):
         self.patterns = learned_patterns or {}
+        self._category_index = compile_category_index(self.patterns)
+        self._indexed_patterns = self.patterns
         self.model = None
         if model_artifacts:
             try:
@@ -325,10 +794,12 @@ class BankStatementParser:
                 data = json.load(f)
                 self.merchant_categories = data.get('merchant_categories', {})
                 self.category_patterns = data.get('category_patterns', {})
+                self.patterns = data
             print(f"✅ Loaded {len(self.merchant_categories)} merchant patterns")
         except FileNotFoundError:
             print("ℹ️  No saved patterns found, using default rules")
     
+    @traced("bank_parser.categorize_transaction", aggregate=True)
     def categorize_transaction(self, description: str) -> str:
         """Categorize a transaction based on learned patterns."""
         if not description:
@@ -340,9 +811,9 @@ class BankStatementParser:
             return 'entertainment'
 
         # 2) Explicit transfer phrases (outgoing)
-        if re.search(r'\btransfer to\b|\btransfer\s+to\s+bank\b|\btransfer\b.*to\b', desc_lower):
+        if TRANSFER_OUT_RE.search(desc_lower):
             return 'transfer_out'
-        if re.search(r'\btransfer from\b|\btransfer in\b|\bcash-in\b|\bdeposit\b', desc_lower):
+        if TRANSFER_IN_RE.search(desc_lower):
             return 'transfer_in'
 
         # 3) Withdrawals / ATM
@@ -361,33 +832,34 @@ class BankStatementParser:
         if any(phrase in desc_lower for phrase in ['opening balance', 'balance b/f', 'balance brought forward', 'previous balance']):
             return 'opening_balance'
 
-        # 6) fallback to learned patterns if present
-        for merchant, cat in self.patterns.get('merchant_categories', {}).items():
-            if merchant.lower() in desc_lower:
+        # 6) fallback to learned patterns if present (merchants, then keywords)
+        for needle, cat in self._learned_index():
+            if needle in desc_lower:
                 return cat
 
-        for cat, patterns in self.patterns.get('category_patterns', {}).items():
-            for p in patterns:
-                if p.lower() in desc_lower:
-                    return cat
-
         return 'uncategorized'
+
+    def _learned_index(self) -> tuple:
+        """Compiled learned patterns; rebuilt only when self.patterns is replaced."""
+        if self._indexed_patterns is not self.patterns:
+            self._category_index = compile_category_index(self.patterns)
+            self._indexed_patterns = self.patterns
+        return self._category_index
     
-    def parse(self, text: str) -> Dict:
-        """Parse bank statement text into structured data matching labeled format."""
-        result = {
-            "bank": "HSBC_UK",  # Can be detected from letterhead
+    def _new_result(self, template: Optional[BankTemplate] = None, text: str = "") -> Dict:
+        return {
+            "bank": template.name if template is not None else "UNKNOWN",
             "statement_type": "bank_statement",
             "statement_period": "",
-            "currency": "GBP",
+            "currency": template.currency if template is not None else detect_currency(text),
             "payment_summary": {},
             "transactions": []
         }
 
-        # Initialize opening balance
+    def _opening_balance(self, text: str) -> float:
+        """Opening balance from the statement's summary section (0.0 if not found)."""
         opening_balance = 0.0  # Default value if not found
         
-        # Parse summary section for opening balance
         summary_patterns = [
             r'Opening\s+Balance\s*[₱£$]?\s*([-\d,]+(?:\.\d{1,2})?)',
             r'Balance\s+B/F\s*[₱£$]?\s*([-\d,]+(?:\.\d{1,2})?)',
@@ -403,164 +875,13 @@ class BankStatementParser:
                 except Exception:
                     opening_balance = 0.0
                 break
-        
-        # Store opening balance in payment summary
-        result["payment_summary"]["openingBalance"] = opening_balance
-        
-        # Initialize current balance with opening balance
-        current_balance = opening_balance
+        return opening_balance
 
-        # Split text into lines for transaction processing (preserve order)
-        raw_lines = text.splitlines()
-        lines = [ln.rstrip() for ln in raw_lines if ln.strip()]
-
-        transactions = []
-
-        # Regex helpers
-        # Date at line start: "07 Jun 2024", "07 Jun 24", "07 Jun", or "07/06/2024"
-        month_names = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)'
-        date_start_re = re.compile(
-            rf'^(?:\d{{1,2}}[\/\-]\d{{1,2}}[\/\-]\d{{2,4}}|\d{{1,2}}\s+{month_names}\b(?:\s+\d{{2,4}})?)',
-            re.IGNORECASE
-        )
-        # Amount pattern - pick rightmost numeric-looking token (with optional currency)
-        amount_re = re.compile(r'([£$₱]?\s*-?\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)')
-
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-
-            # Start of a transaction identified by date at beginning
-            if date_start_re.match(line):
-                # Extract date token (first token matching date pattern)
-                date_token_match = date_start_re.match(line)
-                date_token = date_token_match.group(0).strip()
-                # Remove date token from the first-line remainder
-                first_remainder = line[len(date_token):].strip()
-                description_parts = []
-                if first_remainder:
-                    description_parts.append(first_remainder)
-
-                amount = None
-                txn_marker = None  # 'Debit' / 'Credit' or None
-
-                j = i + 1
-                lookahead_limit = 6  # tolerate multi-line descriptions up to this many lines
-                looked = 0
-
-                # Also check the same line for an amount (sometimes amount sits on same line)
-                same_line_amounts = amount_re.findall(line)
-                if same_line_amounts:
-                    # choose rightmost numeric token
-                    amt_token = same_line_amounts[-1]
-                    try:
-                        amt_val = float(amt_token.replace('£','').replace('$','').replace('₱','').replace(',','').strip())
-                        amount = amt_val
-                        lowered = line.lower()
-                        if 'debit' in lowered or 'payment to' in lowered or 'withdraw' in lowered or 'dra wn' in lowered:
-                            amount = -abs(amount)
-                        elif 'credit' in lowered or 'received' in lowered or 'deposit' in lowered:
-                            amount = abs(amount)
-                    except Exception:
-                        amount = None
-
-                # Look ahead to gather description continuation and to find amount
-                while amount is None and j < len(lines) and looked < lookahead_limit:
-                    nxt = lines[j].strip()
-                    # If next line starts with a date => stop (new transaction starts)
-                    if date_start_re.match(nxt):
-                        break
-
-                    # Search for amount tokens in the next line
-                    am_matches = amount_re.findall(nxt)
-                    if am_matches:
-                        amt_token = am_matches[-1]
-                        try:
-                            amt_val = float(amt_token.replace('£','').replace('$','').replace('₱','').replace(',','').strip())
-                            # Determine debit/credit by presence of keywords on this line or previous parts
-                            lowered = nxt.lower()
-                            if 'debit' in lowered or 'payment to' in lowered or 'withdraw' in lowered or 'dra wn' in lowered or ('paid' in lowered and 'received' not in lowered):
-                                amt_val = -abs(amt_val)
-                                txn_marker = 'debit'
-                            elif 'credit' in lowered or 'received' in lowered or 'deposit' in lowered:
-                                amt_val = abs(amt_val)
-                                txn_marker = 'credit'
-                            else:
-                                # If no explicit marker, try to infer from words in description parts
-                                prev_text = ' '.join(description_parts + [nxt]).lower()
-                                if any(w in prev_text for w in ['received', 'credit', 'deposit', 'inward']):
-                                    txn_marker = 'credit'
-                                elif any(w in prev_text for w in ['payment to', 'debit', 'withdraw', 'paid', 'dra wn']):
-                                    txn_marker = 'debit'
-                                # default: keep as positive (will be classified later)
-                            amount = amt_val
-                        except Exception:
-                            amount = None
-
-                        # If there is descriptive text before the amount token on that same line, capture it
-                        before_amt = nxt[:nxt.rfind(amt_token)].strip()
-                        if before_amt:
-                            description_parts.append(before_amt)
-                        # Done with this transaction (found amount)
-                        j += 1
-                        break
-                    else:
-                        # Not an amount line => continuation of description
-                        description_parts.append(nxt)
-                    j += 1
-                    looked += 1
-
-                # If still no amount, as a last resort search the next few lines for any numeric token (wider net)
-                if amount is None:
-                    k = j
-                    while k < len(lines) and k < i + 10:
-                        fallback_matches = amount_re.findall(lines[k])
-                        if fallback_matches:
-                            amt_token = fallback_matches[-1]
-                            try:
-                                amt_val = float(amt_token.replace('£','').replace('$','').replace('₱','').replace(',','').strip())
-                                amount = amt_val
-                                lowered = lines[k].lower()
-                                if 'debit' in lowered or 'payment to' in lowered or 'withdraw' in lowered:
-                                    amount = -abs(amount)
-                                elif 'credit' in lowered or 'received' in lowered:
-                                    amount = abs(amount)
-                                # capture any prefix
-                                before_amt = lines[k][:lines[k].rfind(amt_token)].strip()
-                                if before_amt:
-                                    description_parts.append(before_amt)
-                                j = k + 1
-                                break
-                            except Exception:
-                                pass
-                        k += 1
-
-                # Build final description
-                description = ' '.join(part for part in description_parts if part).strip()
-                description = re.sub(r'\s+', ' ', description)
-
-                # Use date token as-is; normalization happens later
-                date_val = date_token
-
-                # Only add transaction when we have at least an amount (and description if possible)
-                if amount is not None:
-                    txn = {
-                        "date": date_val,
-                        "description": description or "", 
-                        "amount": amount,
-                        "category": self.categorize_transaction(description or "")
-                    }
-                    transactions.append(txn)
-                    # update running balance
-                    try:
-                        current_balance += float(amount)
-                    except Exception:
-                        pass
-
-                # Advance main pointer to next unprocessed line
-                i = j
-            else:
-                i += 1
+    def _finish(self, result: Dict, transactions: List[Dict], opening_balance: float) -> Dict:
+        """Sort transactions by date and fill in the payment summary."""
+        current_balance = opening_balance
+        for t in transactions:
+            current_balance += float(t["amount"])
 
         # Sort transactions by date where possible (attempt to normalize simple "DD Mon YYYY" forms)
         def sort_key(tx):
@@ -594,10 +915,338 @@ class BankStatementParser:
 
         return result
 
+    @traced("bank_parser.parse", items=lambda result: len(result["transactions"]))
+    def parse(self, text: str) -> Dict:
+        """
+        Parse bank statement text into structured data matching labeled format.
+        Statements of a known bank (bank_templates) are read with its layout;
+        other layouts, or a template that finds no rows, use the heuristic parser.
+        """
+        template = detect_template(text)
+        if template is not None:
+            reader = template.reader(self.categorize_transaction)
+            transactions = list(self.read_template(reader, text.splitlines()))
+            transactions.extend(reader.finish())
+            if transactions:
+                return self.parse_transactions(text, transactions, template, reader.opening_balance)
+        return self.parse_transactions(text, list(self.iter_transactions(text.splitlines())), template)
+
+    def parse_transactions(self, text: str, transactions: List[Dict],
+                           template: Optional[BankTemplate] = None,
+                           opening_balance: Optional[float] = None) -> Dict:
+        """
+        Statement result from transactions already read by iter_transactions
+        or a template reader (the full text is still needed for the opening
+        balance when the reader did not find one).
+        """
+        result = self._new_result(template, text)
+
+        # Parse summary section for opening balance
+        if opening_balance is None:
+            opening_balance = self._opening_balance(text)
+        
+        # Store opening balance in payment summary
+        result["payment_summary"]["openingBalance"] = opening_balance
+
+        return self._finish(result, list(transactions), opening_balance)
+
+    def iter_pages(self, pages: Iterable[str]) -> Iterator[Dict]:
+        """Transactions of page texts as they arrive; a transaction may span pages."""
+        stream = self.stream()
+        for page in pages:
+            yield from stream.feed(page)
+        yield from stream.finish()
+
+    def stream(self) -> "StatementStream":
+        """Parser state for a statement fed page by page (see StatementStream)."""
+        return StatementStream(self)
+
+    def read_template(self, reader: TemplateReader, lines: Iterable[str]) -> Iterator[Dict]:
+        """Feed statement lines to a template reader; call reader.finish() after the last ones."""
+        def content():
+            for line in lines:
+                if line.strip() == PAGE_BREAK_MARKER:
+                    continue
+                check_deadline("bank_parser.parse")
+                yield line
+        return reader.feed(content())
+
+    def iter_transactions(self, lines: Iterable[str], window: Optional[List[LineTokens]] = None,
+                          final: bool = True) -> Iterator[Dict]:
+        """
+        Transactions in document order, each yielded as soon as the
+        TRANSACTION_HORIZON lines starting at its date line have arrived.
+        Every line is lexed once (line_lexer) on arrival.
+        
+        Args:
+            lines: Statement lines
+            window: Lexed lines not yet consumed; pass the same list with
+                    final=False to feed a document in pieces (e.g. page by page)
+            final: The document ends after these lines (flush the window)
+        """
+        # Non-empty lines (order preserved); page break markers are not content
+        window = [] if window is None else window
+        for line in lines:
+            tokens = LineTokens(line)
+            if not tokens.text or tokens.text == PAGE_BREAK_MARKER:
+                continue
+            if not window and tokens.date is None:
+                continue  # not in a transaction (header, footer, noise)
+            window.append(tokens)
+            check_deadline("bank_parser.parse")
+            while len(window) >= TRANSACTION_HORIZON:
+                if window[0].date is None:
+                    del window[0]  # not the start of a transaction
+                    continue
+                txn, used = self._parse_transaction(window[:TRANSACTION_HORIZON])
+                del window[:used]
+                if txn is not None:
+                    yield txn
+        # Shorter than the horizon: a transaction is already final once its amount was found
+        while window:
+            txn, used = self._parse_transaction(window[:TRANSACTION_HORIZON])
+            if (txn is None and not final and len(window) < TRANSACTION_HORIZON
+                    and window[0].date is not None):
+                break  # its amount may still be in lines to come
+            del window[:used]
+            if txn is not None:
+                yield txn
+
+    def _parse_transaction(self, lines: List[LineTokens]) -> Tuple[Optional[Dict], int]:
+        """
+        Read the transaction starting at lines[0], looking ahead at most
+        TRANSACTION_HORIZON lines for its description and amount.
+
+        Returns:
+            (transaction or None, number of lines consumed)
+        """
+        first = lines[0]
+
+        # Start of a transaction identified by date at beginning
+        if first.date is None:
+            return None, 1
+
+        # Date token (first token matching date pattern), removed from the first-line remainder
+        date_token = first.date
+        first_remainder = first.text[len(date_token):].strip()
+        description_parts = []
+        if first_remainder:
+            description_parts.append(first_remainder)
+
+        amount = None
+        txn_marker = None  # 'Debit' / 'Credit' or None
+
+        j = 1
+        lookahead_limit = 6  # tolerate multi-line descriptions up to this many lines
+        looked = 0
+
+        # Also check the same line for an amount (sometimes amount sits on same line)
+        same_line_amounts = first.amounts
+        if same_line_amounts:
+            # choose rightmost numeric token
+            amt_token = same_line_amounts[-1]
+            try:
+                amount = amount_value(amt_token)
+                keywords = first.keywords
+                if 'debit' in keywords or 'payment to' in keywords or 'withdraw' in keywords or 'dra wn' in keywords:
+                    amount = -abs(amount)
+                elif 'credit' in keywords or 'received' in keywords or 'deposit' in keywords:
+                    amount = abs(amount)
+            except ValueError:
+                amount = None
+
+        # Look ahead to gather description continuation and to find amount
+        while amount is None and j < len(lines) and looked < lookahead_limit:
+            nxt = lines[j]
+            # If next line starts with a date => stop (new transaction starts)
+            if nxt.date is not None:
+                break
+
+            # Amount tokens in the next line
+            am_matches = nxt.amounts
+            if am_matches:
+                amt_token = am_matches[-1]
+                try:
+                    amt_val = amount_value(amt_token)
+                    # Determine debit/credit by presence of keywords on this line or previous parts
+                    keywords = nxt.keywords
+                    if 'debit' in keywords or 'payment to' in keywords or 'withdraw' in keywords or 'dra wn' in keywords or ('paid' in keywords and 'received' not in keywords):
+                        amt_val = -abs(amt_val)
+                        txn_marker = 'debit'
+                    elif 'credit' in keywords or 'received' in keywords or 'deposit' in keywords:
+                        amt_val = abs(amt_val)
+                        txn_marker = 'credit'
+                    else:
+                        # If no explicit marker, try to infer from words in description parts
+                        prev_text = ' '.join(description_parts + [nxt.text]).lower()
+                        if any(w in prev_text for w in ['received', 'credit', 'deposit', 'inward']):
+                            txn_marker = 'credit'
+                        elif any(w in prev_text for w in ['payment to', 'debit', 'withdraw', 'paid', 'dra wn']):
+                            txn_marker = 'debit'
+                        # default: keep as positive (will be classified later)
+                    amount = amt_val
+                except ValueError:
+                    amount = None
+
+                # If there is descriptive text before the amount token on that same line, capture it
+                before_amt = nxt.text[:nxt.text.rfind(amt_token)].strip()
+                if before_amt:
+                    description_parts.append(before_amt)
+                # Done with this transaction (found amount)
+                j += 1
+                break
+            else:
+                # Not an amount line => continuation of description
+                description_parts.append(nxt.text)
+            j += 1
+            looked += 1
+
+        # If still no amount, as a last resort search the next few lines for any numeric token (wider net)
+        if amount is None:
+            k = j
+            while k < len(lines) and k < TRANSACTION_HORIZON:
+                fallback = lines[k]
+                fallback_matches = fallback.amounts
+                if fallback_matches:
+                    amt_token = fallback_matches[-1]
+                    try:
+                        amount = amount_value(amt_token)
+                        keywords = fallback.keywords
+                        if 'debit' in keywords or 'payment to' in keywords or 'withdraw' in keywords:
+                            amount = -abs(amount)
+                        elif 'credit' in keywords or 'received' in keywords:
+                            amount = abs(amount)
+                        # capture any prefix
+                        before_amt = fallback.text[:fallback.text.rfind(amt_token)].strip()
+                        if before_amt:
+                            description_parts.append(before_amt)
+                        j = k + 1
+                        break
+                    except ValueError:
+                        pass
+                k += 1
+
+        # Build final description
+        description = ' '.join(part for part in description_parts if part).strip()
+        description = WHITESPACE_RE.sub(' ', description)
+
+        # Use date token as-is; normalization happens later
+        date_val = date_token
+
+        # Only a transaction when we have at least an amount (and description if possible)
+        if amount is None:
+            return None, j
+        return {
+            "date": date_val,
+            "description": description or "", 
+            "amount": amount,
+            "category": self.categorize_transaction(description or "")
+        }, j
+
+    @traced("bank_parser.parse_rows", items=lambda result: len(result["transactions"]))
+    def parse_rows(self, rows: List[Dict], text: str = "") -> Dict:
+        """
+        Parse pre-split table rows from layout-aware OCR (ocr_layout.extract_table).
+        Each row has date/description text plus whichever of debit, credit,
+        amount and balance the statement has; no line pairing is needed.
+        
+        Args:
+            rows: Table rows
+            text: Page text, searched for the opening balance
+        """
+        result = self._new_result(detect_template(text), text)
+        opening_balance = self._opening_balance(text)
+
+        transactions = []
+        for row in rows:
+            debit = parse_money(row.get('debit'))
+            credit = parse_money(row.get('credit'))
+            amount = parse_money(row.get('amount'))
+            description = WHITESPACE_RE.sub(' ', row.get('description') or '').strip()
+
+            if debit is None and credit is None and amount is None:
+                # Balance-only row, e.g. "Balance brought forward"
+                balance = parse_money(row.get('balance'))
+                if balance is not None and not transactions and not opening_balance:
+                    opening_balance = balance
+                continue
+            if amount is None:
+                amount = abs(credit or 0.0) - abs(debit or 0.0)
+
+            transactions.append({
+                "date": (row.get('date') or '').strip(),
+                "description": description,
+                "amount": amount,
+                "category": self.categorize_transaction(description)
+            })
+
+        result["payment_summary"]["openingBalance"] = opening_balance
+        return self._finish(result, transactions, opening_balance)
+
+
+class StatementStream:
+    """
+    A bank statement parsed while its pages are still being OCR'd. The first
+    page picks the layout template (letterhead); without one, lines go
+    through the heuristic parser's window, so a transaction may span pages.
+    """
+
+    def __init__(self, parser: BankStatementParser):
+        self.parser = parser
+        self.template: Optional[BankTemplate] = None
+        self.reader: Optional[TemplateReader] = None
+        self.transactions: List[Dict] = []
+        self._window: List[LineTokens] = []
+        self._started = False
+
+    def feed(self, page_text: str) -> Iterator[Dict]:
+        """Transactions completed by this page."""
+        if not self._started:
+            self._started = True
+            self.template = detect_template(page_text)
+            if self.template is not None:
+                self.reader = self.template.reader(self.parser.categorize_transaction)
+        if self.reader is not None:
+            found = self.parser.read_template(self.reader, page_text.splitlines())
+        else:
+            found = self.parser.iter_transactions(page_text.splitlines(), self._window, final=False)
+        for txn in found:
+            self.transactions.append(txn)
+            yield txn
+
+    def finish(self) -> Iterator[Dict]:
+        """Transactions still held back at the end of the document."""
+        found = self.reader.finish() if self.reader is not None else self.parser.iter_transactions((), self._window)
+        for txn in found:
+            self.transactions.append(txn)
+            yield txn
+
+    def result(self, text: str) -> Dict:
+        """Statement result for the whole text; re-parsed when streaming found nothing."""
+        if not self.transactions:
+            return self.parser.parse(text)
+        opening = self.reader.opening_balance if self.reader is not None else None
+        return self.parser.parse_transactions(text, self.transactions, self.template, opening)
+
+
+# Receipt fields
+RECEIPT_DATE_RE = re.compile(r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})')
+RECEIPT_TIME_RE = re.compile(r'(\d{1,2}:\d{2}(?::\d{2})?(?:\s*[AP]M)?)', re.IGNORECASE)
+RECEIPT_ITEM_RE = re.compile(r'(.+?)\s+([₱$]?\s*[\d,]+\.?\d{2})')
+# Lines with these keywords are totals or payment lines, not items
+RECEIPT_SKIP_KEYWORDS = frozenset({'total', 'tax', 'change', 'cash', 'tender'})  # 'total' also covers SUBTOTAL
+# Total type -> (pattern, keyword a line must have for the pattern to match there)
+RECEIPT_TOTALS = {
+    'subtotal': (re.compile(r'(?:Sub\s*)?Total[:\s]*[₱$]?\s*([\d,]+\.?\d{2})', re.IGNORECASE), 'total'),
+    'tax': (re.compile(r'Tax[:\s]*[₱$]?\s*([\d,]+\.?\d{2})', re.IGNORECASE), 'tax'),
+    'total': (re.compile(r'(?:Grand\s*)?Total[:\s]*[₱$]?\s*([\d,]+\.?\d{2})', re.IGNORECASE), 'total'),
+}
+
 
 class ReceiptParser:
     """Parses receipts from extracted text."""
     
+    @traced("receipt_parser.parse", items=lambda result: len(result["items"]))
     def parse(self, text: str) -> Dict:
         """Parse receipt text into structured data."""
         result = {
@@ -608,43 +1257,35 @@ class ReceiptParser:
         }
         
         lines = text.split('\n')
-        
-        # Extract merchant name (usually first few lines)
         merchant_name = None
-        for line in lines[:5]:
-            line = line.strip()
-            if len(line) > 3 and not any(char.isdigit() for char in line[:10]):
-                merchant_name = line
-                break
+        keyword_offsets = {}  # keyword -> offset of the first line that has it
         
-        if merchant_name:
-            result["merchant_info"]["name"] = merchant_name
-        
-        # Extract date
-        date_pattern = r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
-        for line in lines:
-            match = re.search(date_pattern, line)
-            if match:
-                result["transaction_info"]["date"] = match.group(1)
-                break
-        
-        # Extract time
-        time_pattern = r'(\d{1,2}:\d{2}(?::\d{2})?(?:\s*[AP]M)?)'
-        for line in lines:
-            match = re.search(time_pattern, line, re.IGNORECASE)
-            if match:
-                result["transaction_info"]["time"] = match.group(1)
-                break
-        
-        # Extract items (line with description and price)
-        item_pattern = r'(.+?)\s+([₱$]?\s*[\d,]+\.?\d{2})'
-        
-        for line in lines:
-            # Skip header lines and total lines
-            if any(keyword in line.lower() for keyword in ['subtotal', 'total', 'tax', 'change', 'cash', 'tender']):
-                continue
+        # One pass over the lexed lines
+        for index, tokens in enumerate(lex(text)):
+            line = lines[index]
+            
+            # Merchant name (usually first few lines)
+            if (merchant_name is None and index < 5 and len(tokens.text) > 3
+                    and not any(char.isdigit() for char in tokens.text[:10])):
+                merchant_name = tokens.text
+            
+            # Date and time: the first on the receipt
+            if "date" not in result["transaction_info"]:
+                match = RECEIPT_DATE_RE.search(line)
+                if match:
+                    result["transaction_info"]["date"] = match.group(1)
+            if "time" not in result["transaction_info"]:
+                match = RECEIPT_TIME_RE.search(line)
+                if match:
+                    result["transaction_info"]["time"] = match.group(1)
             
-            match = re.search(item_pattern, line)
+            for keyword in tokens.keywords:
+                keyword_offsets.setdefault(keyword, tokens.offset)
+            
+            # Items (line with description and price); skip header and total lines
+            if not RECEIPT_SKIP_KEYWORDS.isdisjoint(tokens.keywords):
+                continue
+            match = RECEIPT_ITEM_RE.search(line)
             if match:
                 description = match.group(1).strip()
                 price_str = match.group(2).replace(',', '').replace('₱', '').replace('$', '').strip()
@@ -663,15 +1304,15 @@ class ReceiptParser:
                 except ValueError:
                     continue
         
-        # Extract totals
-        total_patterns = {
-            'subtotal': r'(?:Sub\s*)?Total[:\s]*[₱$]?\s*([\d,]+\.?\d{2})',
-            'tax': r'Tax[:\s]*[₱$]?\s*([\d,]+\.?\d{2})',
-            'total': r'(?:Grand\s*)?Total[:\s]*[₱$]?\s*([\d,]+\.?\d{2})',
-        }
+        if merchant_name:
+            result["merchant_info"]["name"] = merchant_name
         
-        for total_type, pattern in total_patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
+        # Totals: searched from the first line with the keyword (the amount may
+        # be on the next line); no line with the keyword means no total
+        for total_type, (pattern, keyword) in RECEIPT_TOTALS.items():
+            if keyword not in keyword_offsets:
+                continue
+            match = pattern.search(text, keyword_offsets[keyword])
             if match:
                 value = float(match.group(1).replace(',', ''))
                 result["totals"][total_type] = value
@@ -682,13 +1323,52 @@ class ReceiptParser:
 class BoogasiOCRSystem:
     """Main OCR system integrating all components."""
     
-    def __init__(self, tesseract_path: Optional[str] = None, patterns_file: str = "learned_patterns.json"):
+    def __init__(self, tesseract_path: Optional[str] = None, patterns_file: str = "learned_patterns.json",
+                 insight_precomputer=None, pdf_workers: int = 1, ocr_cache: bool = True,
+                 load_ocr: bool = True, preprocess: Optional[str] = None,
+                 table_ocr: Optional[bool] = None, adaptive_ocr: Optional[bool] = None,
+                 early_classification: Optional[bool] = None, reject_unknown: Optional[bool] = None,
+                 duplicate_detection: Optional[bool] = None, document_timeout: Optional[float] = None,
+                 pdf_dpi: int = 200, ocr_profiles: Optional[Dict[str, str]] = None):
         """
         Initialize the complete Boogasi OCR system.
         
         Args:
             tesseract_path: Path to tesseract executable (Windows)
             patterns_file: Path to learned patterns JSON file from trainer
+            insight_precomputer: Optional InsightPrecomputer; when set, every parsed
+                                 document has all insights scheduled in the background
+            pdf_workers: PDF pages OCR'd concurrently within one document
+            ocr_cache: Reuse OCR text of files already processed with the same
+                       settings (stored under boogasi_ai_data/cache/ocr)
+            load_ocr: Set False to parse stored text only (reparse); Tesseract is
+                      then neither needed nor checked
+            preprocess: Image preprocessing steps, e.g. "resize,grayscale,deskew"
+                        (default: BOOGASI_OCR_PREPROCESS or resize + grayscale)
+            table_ocr: Layout-aware table OCR for statement images
+                       (default: BOOGASI_OCR_TABLES=1 enables it)
+            adaptive_ocr: Two-pass, confidence-targeted OCR
+                          (default: BOOGASI_OCR_ADAPTIVE=1 enables it)
+            early_classification: Classify a low-resolution first-page preview and OCR
+                                  with that document type's profile; costs an extra
+                                  Tesseract pass and the statement/receipt profiles
+                                  restrict the character set, so it is opt-in
+                                  (default: BOOGASI_OCR_PREVIEW=1 enables it)
+            reject_unknown: Skip the full OCR pass for documents the preview cannot
+                            classify (default: BOOGASI_REJECT_UNKNOWN=1 enables it)
+            duplicate_detection: Return the earlier result for documents whose pages look
+                                 the same as an already processed one (perceptual hash) and
+                                 whose text layer or preview OCR is identical (a duplicate still
+                                 costs the fingerprint and, without a text layer, the preview
+                                 OCR); the index is shared by every caller of this system, so
+                                 keep it off where documents of different users are processed
+                                 (default: BOOGASI_DUPLICATE_DETECTION=1 enables it)
+            document_timeout: Seconds one document may take before OCR and parsing are
+                              stopped and a timed-out result is returned
+                              (default: BOOGASI_DOCUMENT_TIMEOUT, else no limit; the API
+                              sets its own per-request limit)
+            pdf_dpi: Resolution scanned PDF pages are rasterized at
+            ocr_profiles: Tesseract options per previewed document type (default: OCR_PROFILES)
         """
         # Get project root directory
         self.base_dir = Path(__file__).resolve().parent.parent
@@ -698,10 +1378,49 @@ class BoogasiOCRSystem:
         for subdir in ['raw', 'receipts', 'parsed', 'labeled']:
             (self.data_dir / subdir).mkdir(parents=True, exist_ok=True)
         
-        self.ocr = TesseractOCR(tesseract_path)
+        self.tesseract_path = tesseract_path
+        self.patterns_file = patterns_file
+        self.cache_dir = self.data_dir / 'cache'
+        self.manifest_path = self.cache_dir / 'manifest.json'
+        if table_ocr is None:
+            table_ocr = os.environ.get('BOOGASI_OCR_TABLES', '').lower() in ('1', 'true', 'yes', 'on')
+        if adaptive_ocr is None:
+            adaptive_ocr = os.environ.get('BOOGASI_OCR_ADAPTIVE', '').lower() in ('1', 'true', 'yes', 'on')
+        if early_classification is None:
+            early_classification = os.environ.get('BOOGASI_OCR_PREVIEW', '').lower() in ('1', 'true', 'yes', 'on')
+        if reject_unknown is None:
+            reject_unknown = os.environ.get('BOOGASI_REJECT_UNKNOWN', '').lower() in ('1', 'true', 'yes', 'on')
+        if duplicate_detection is None:
+            duplicate_detection = os.environ.get('BOOGASI_DUPLICATE_DETECTION', '').lower() in ('1', 'true', 'yes', 'on')
+        if document_timeout is None:
+            document_timeout = float(os.environ.get('BOOGASI_DOCUMENT_TIMEOUT', '0'))
+        self.document_timeout = document_timeout or None
+        self.early_classification = early_classification
+        self.reject_unknown = reject_unknown
+        self.ocr = None
+        if load_ocr:
+            self.ocr = TesseractOCR(tesseract_path, pdf_dpi=pdf_dpi, pdf_workers=pdf_workers,
+                                    cache=OCRCache(self.cache_dir / 'ocr') if ocr_cache else None,
+                                    preprocessor=ImagePreprocessor.from_spec(preprocess) if preprocess is not None else None,
+                                    table_mode=table_ocr, adaptive=adaptive_ocr, profiles=ocr_profiles)
+        # Same OCR configuration for batch worker processes
+        self.worker_options = {
+            "pdf_workers": pdf_workers,
+            "ocr_cache": ocr_cache,
+            "preprocess": (",".join(self.ocr.preprocessor.steps) or "none") if self.ocr else preprocess,
+            "table_ocr": table_ocr,
+            "adaptive_ocr": adaptive_ocr,
+            "early_classification": early_classification,
+            "reject_unknown": reject_unknown,
+            "duplicate_detection": duplicate_detection,
+            "document_timeout": document_timeout,
+            "pdf_dpi": pdf_dpi,
+            "ocr_profiles": ocr_profiles,
+        }
         self.classifier = DocumentClassifier()
         self.bank_parser = BankStatementParser()
         self.receipt_parser = ReceiptParser()
+        self.insight_precomputer = insight_precomputer
         
         # Use absolute path for patterns file
         patterns_path = self.base_dir / patterns_file
@@ -711,10 +1430,36 @@ class BoogasiOCRSystem:
         else:
             print(f"ℹ️  No learned patterns found at {patterns_file}, using default rules")
         
+        self.duplicates = None
+        if self.ocr is not None and duplicate_detection:
+            self.duplicates = DuplicateIndex(self.cache_dir / 'duplicates', self.result_settings())
+        
         print("\n" + "="*60)
         print("🚀 BOOGASI OCR SYSTEM INITIALIZED")
         print("="*60)
     
+    def pipeline_settings(self) -> Dict:
+        """OCR and pipeline options a stored result depends on (see result_settings)."""
+        return {
+            **self.ocr.ocr_settings(),
+            "early_classification": self.early_classification,
+            "reject_unknown": self.reject_unknown,
+        }
+    
+    def result_settings(self) -> Dict:
+        """
+        Everything a stored parsed result depends on (batch manifest, duplicate
+        index): pipeline_settings() plus the parser code and the learned patterns.
+        """
+        source = hashlib.sha256()
+        for name in PARSER_SOURCES:
+            source.update((Path(__file__).resolve().parent / name).read_bytes())
+        return {
+            **self.pipeline_settings(),
+            "parser": source.hexdigest(),
+            "patterns": self.bank_parser.patterns,
+        }
+    
     def _normalize_date(self, date_str: str) -> str:
         """Try to convert common date formats to YYYY-MM-DD. If fail, return original."""
         if not date_str:
@@ -734,33 +1479,241 @@ class BoogasiOCRSystem:
             return m.group(1)
         return date_str  # as-is if not parseable
     
-    def process_document(self, file_path: str, save_output: bool = True) -> Dict:
+    def process_document(self, file_path: str, save_output: bool = True,
+                         timeout: Optional[float] = None, write_parsed: bool = True) -> Dict:
         """
         Process any financial document (bank statement or receipt).
         
         Args:
             file_path: Path to document file
-            save_output: Whether to save parsed JSON
+            save_output: Whether to save the OCR text and parsed JSON
+            timeout: Seconds allowed for this document (default: document_timeout)
+            write_parsed: With save_output, write the parsed JSON here; False when the
+                          caller saves the returned result itself (batch OutputWriter)
         
         Returns:
             Parsed document data
         """
-        # Step 1: Extract text with OCR
-        ocr_result = self.ocr.process_document(file_path)
+        deadline = Deadline(timeout) if timeout is not None else None
+        with auto_trace("process_document", file=Path(file_path).name):
+            for event in self.iter_process_document(file_path, save_output, deadline=deadline,
+                                                    write_parsed=write_parsed):
+                if event["event"] == "result":
+                    return event["result"]
+
+    def iter_process_document(self, file_path: str, save_output: bool = True,
+                              deadline: Optional[Deadline] = None,
+                              write_parsed: bool = True) -> Iterator[Dict]:
+        """
+        process_document() as a stream of progress events. For PDFs whose
+        preview (or, without early_classification, first page) says bank
+        statement, pages are parsed as they arrive, so transactions come out
+        while later pages are still being OCR'd:
+        
+            {"event": "preview", "document_type": "bank_statement"}   (early_classification)
+            {"event": "page", "page": 1, "source": "ocr" | "text_layer" | "cache", "char_count": n}
+            {"event": "transaction", "transaction": {...}}   (normalized, document order)
+            {"event": "result", "result": {...}}             (always last)
+        
+        The "result" is what process_document returns (transactions sorted by date).
+        When the deadline runs out or is cancelled, work stops at the next page,
+        Tesseract call or parsed line and the result is
+        {"success": False, "timed_out": True, "cancelled": bool, "error": ...}.
+        
+        Args:
+            deadline: Budget for this document (default: Deadline(document_timeout));
+                      deadline.cancel() from another thread stops the work early
+            write_parsed: See process_document
+        """
+        deadline = deadline or Deadline(self.document_timeout)
+        events = self._iter_process_document(file_path, save_output, write_parsed)
+        try:
+            while True:
+                # Current only while the pipeline runs, not while the caller holds an event
+                try:
+                    with deadline_scope(deadline):
+                        event = next(events)
+                except StopIteration:
+                    return
+                except DeadlineExceeded as e:
+                    print(f"⏱️  {Path(file_path).name}: {e}")
+                    yield {"event": "result", "result": {
+                        "success": False,
+                        "error": str(e),
+                        "timed_out": True,
+                        "cancelled": e.cancelled,
+                        "filename": Path(file_path).name,
+                        "text": ""
+                    }}
+                    return
+                yield event
+        finally:
+            events.close()
+
+    def _iter_process_document(self, file_path: str, save_output: bool, write_parsed: bool) -> Iterator[Dict]:
+        if self.ocr is None:
+            yield {"event": "result", "result": {
+                "success": False,
+                "error": "OCR is not available (system created with load_ocr=False)",
+                "text": ""
+            }}
+            return
+        
+        # Near-duplicate of a document already processed: reuse its result
+        fingerprint, content = None, ""
+        if self.duplicates is not None:
+            try:
+                with span("duplicates.lookup") as s:
+                    fingerprint = document_fingerprint(file_path)
+                    content = self.ocr.content_signature(file_path)
+                    previous = self.duplicates.find(fingerprint, content)
+                    s.set(items=int(previous is not None))
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                print(f"⚠️  Duplicate check skipped: {e}")
+                previous = None
+            if previous is not None:
+                yield {"event": "result", "result": self._reuse_duplicate(previous, file_path, save_output,
+                                                                            write_parsed)}
+                return
+        
+        # Step 1: Extract text with OCR (profile picked from a first-page preview)
+        ocr_events = self.ocr.iter_document(
+            file_path,
+            classify=self.classifier.classify if self.early_classification else None,
+            reject_unknown=self.reject_unknown,
+        )
+        ocr_result = None
+        stream: Optional[StatementStream] = None
+        # Step 2 (statements): parse each page while the next ones are OCR'd. The
+        # type comes from the preview, or without one from the first page's text
+        classify_first_page = Path(file_path).suffix.lower() == '.pdf'
+        for event in ocr_events:
+            if event["event"] == "preview":
+                if event["document_type"] == 'bank_statement' and classify_first_page:
+                    stream = self.bank_parser.stream()
+                classify_first_page = False
+                yield event
+            elif event["event"] == "page":
+                yield {"event": "page", "page": event["page"], "source": event["source"],
+                       "char_count": len(event["text"])}
+                if classify_first_page:
+                    classify_first_page = False
+                    if self.classifier.classify(event["text"]) == 'bank_statement':
+                        stream = self.bank_parser.stream()
+                if stream is not None:
+                    for txn in stream.feed(event["text"]):
+                        yield {"event": "transaction", "transaction": self._normalize_bank_transaction(txn)}
+            else:
+                ocr_result = event["result"]
+        if stream is not None:
+            for txn in stream.finish():
+                yield {"event": "transaction", "transaction": self._normalize_bank_transaction(txn)}
         
         if not ocr_result['success']:
-            return ocr_result
+            yield {"event": "result", "result": ocr_result}
+            return
         
         text = ocr_result['text']
         print(f"   ✓ Extracted {ocr_result['char_count']} characters")
+        if ocr_result.get('pages'):
+            from_layer = sum(1 for p in ocr_result['pages'] if p['source'] == 'text_layer')
+            print(f"   ✓ Text layer used for {from_layer}/{len(ocr_result['pages'])} pages")
+        
+        # Keep the raw text (and table rows) so parser/pattern changes can be re-applied without OCR
+        if save_output:
+            self._write_ocr_text(file_path, text, ocr_result.get('table'))
+        
+        # Steps 2-3: Classify and parse
+        result = self.process_text(text, ocr_result['filename'], pages=ocr_result.get('pages'),
+                                   table=ocr_result.get('table'),
+                                   stream=stream)
+        if not result['success']:
+            yield {"event": "result", "result": result}
+            return
+        result['processed_at'] = ocr_result['processed_at']
+        if 'preview_type' in ocr_result:
+            result['preview_type'] = ocr_result['preview_type']
+        normalized_transactions = result['data']['transactions']
+        
+        # Precompute every insight in the background (served later by document_id)
+        if self.insight_precomputer is not None and normalized_transactions:
+            result['document_id'] = self.insight_precomputer.schedule(normalized_transactions)
+        
+        if fingerprint is not None and content:
+            self.duplicates.add(fingerprint, content, {
+                "result": {k: v for k, v in result.items() if k != 'document_id'},
+                "text": text,
+                "table": ocr_result.get('table'),
+            }, Path(file_path).name)
+        
+        # Save output
+        if save_output and write_parsed:
+            self._write_parsed(result, self.parsed_output_path(file_path))
         
+        yield {"event": "result", "result": result}
+    
+    def _reuse_duplicate(self, previous: Dict, file_path: str, save_output: bool,
+                         write_parsed: bool = True) -> Dict:
+        """Result of an earlier, near-identical document, relabeled for this file."""
+        print(f"   ✓ Duplicate of {previous['duplicate_of']}, OCR skipped")
+        result = {
+            **previous['result'],
+            "filename": Path(file_path).name,
+            "processed_at": datetime.now().isoformat(),
+            "duplicate_of": previous['duplicate_of'],
+        }
+        transactions = result.get('data', {}).get('transactions')
+        if self.insight_precomputer is not None and transactions:
+            result['document_id'] = self.insight_precomputer.schedule(transactions)
+        if save_output:
+            self._write_ocr_text(file_path, previous.get('text', ''), previous.get('table'))
+            if write_parsed:
+                self._write_parsed(result, self.parsed_output_path(file_path))
+        return result
+    
+    def _write_ocr_text(self, file_path: str, text: str, table: Optional[Dict]):
+        text_path = self.ocr_text_path(file_path)
+        text_path.parent.mkdir(parents=True, exist_ok=True)
+        text_path.write_text(text, encoding='utf-8')
+        table_path = text_path.with_name(Path(file_path).stem + "_table.json")
+        if table:
+            with open(table_path, 'w', encoding='utf-8') as f:
+                json.dump(table, f, indent=2, ensure_ascii=False)
+        elif table_path.exists():
+            table_path.unlink()
+    
+    def process_text(self, text: str, filename: str, pages: Optional[List[Dict]] = None,
+                     table: Optional[Dict] = None, stream: Optional[StatementStream] = None) -> Dict:
+        """
+        Classify, parse and normalize already-extracted document text.
+        
+        Args:
+            text: OCR (or text layer) output of the whole document
+            filename: Original document file name, kept in the result
+            pages: Optional per-page OCR metadata to carry into the result
+            table: Optional layout-OCR table ({"rows": [...]}) used instead of
+                   reconstructing bank transactions from the flat text
+            stream: The statement already parsed page by page from this text
+                    (BankStatementParser.stream); used when the text is
+                    classified as a bank statement
+        
+        Returns:
+            Parsed document data (not saved)
+        """
         # Step 2: Classify document type
         doc_type = self.classifier.classify(text)
         print(f"   ✓ Detected: {doc_type}")
         
         # Step 3: Parse based on document type
         if doc_type == 'bank_statement':
-            parsed_data = self.bank_parser.parse(text)
+            if table and table.get('rows'):
+                parsed_data = self.bank_parser.parse_rows(table['rows'], text)
+            elif stream is not None:
+                parsed_data = stream.result(text)
+            else:
+                parsed_data = self.bank_parser.parse(text)
             parsed_data['document_type'] = 'bank_statement'
         elif doc_type == 'receipt':
             parsed_data = self.receipt_parser.parse(text)
@@ -769,6 +1722,7 @@ class BoogasiOCRSystem:
             return {
                 "success": False,
                 "error": "Could not determine document type",
+                "filename": filename,
                 "raw_text": text
             }
         
@@ -777,20 +1731,7 @@ class BoogasiOCRSystem:
         
         if parsed_data.get('document_type') == 'bank_statement':
             for txn in parsed_data.get('transactions', []):
-                date_norm = self._normalize_date(txn.get('date', ''))
-                amount_raw = txn.get('amount', 0.0)
-                # amount in bank parser uses negative for debits
-                txn_type = 'income' if amount_raw > 0 else 'expense'
-                amount = abs(float(amount_raw))
-                category = txn.get('category') or self.bank_parser.categorize_transaction(txn.get('description', ''))
-                
-                normalized_transactions.append({
-                    "date": date_norm,
-                    "description": txn.get('description', '').strip(),
-                    "amount": round(amount, 2),
-                    "type": txn_type,
-                    "category": category or "uncategorized"
-                })
+                normalized_transactions.append(self._normalize_bank_transaction(txn))
         
         elif parsed_data.get('document_type') == 'receipt':
             date_raw = parsed_data.get('transaction_info', {}).get('date', '')
@@ -816,30 +1757,148 @@ class BoogasiOCRSystem:
         # Add metadata
         result = {
             "success": True,
-            "filename": ocr_result['filename'],
+            "filename": filename,
             "document_type": doc_type,
-            "processed_at": ocr_result['processed_at'],
+            "processed_at": datetime.now().isoformat(),
             "data": parsed_data
         }
+        if pages is not None:
+            result['pages'] = pages
         
-        # Save output
-        if save_output:
-            output_dir = self.data_dir / 'parsed'
-            output_dir.mkdir(parents=True, exist_ok=True)
-            
-            output_filename = Path(file_path).stem + "_parsed.json"
-            output_path = output_dir / output_filename
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            
-            print(f"   ✓ Saved to: {output_path.relative_to(self.base_dir)}")
+        return result
+    
+    def _normalize_bank_transaction(self, txn: Dict) -> Dict:
+        """Bank parser transaction in the requested schema."""
+        date_norm = self._normalize_date(txn.get('date', ''))
+        amount_raw = txn.get('amount', 0.0)
+        # amount in bank parser uses negative for debits
+        txn_type = 'income' if amount_raw > 0 else 'expense'
+        amount = abs(float(amount_raw))
+        category = txn.get('category') or self.bank_parser.categorize_transaction(txn.get('description', ''))
         
+        return {
+            "date": date_norm,
+            "description": txn.get('description', '').strip(),
+            "amount": round(amount, 2),
+            "type": txn_type,
+            "category": category or "uncategorized"
+        }
+    
+    def _write_parsed(self, result: Dict, output_path: Path):
+        # Atomic: the ingestion daemon and API may read parsed/ while documents are written
+        write_json_atomic(output_path, result, indent=2)
+        print(f"   ✓ Saved to: {output_path.relative_to(self.base_dir)}")
+    
+    def parsed_output_path(self, file_path) -> Path:
+        """Where process_document saves the parsed JSON for a file."""
+        return self.data_dir / 'parsed' / (Path(file_path).stem + "_parsed.json")
+    
+    def ocr_text_path(self, file_path) -> Path:
+        """Where process_document saves the raw OCR text for a file."""
+        return self.data_dir / 'parsed' / (Path(file_path).stem + "_ocr.txt")
+    
+    def reparse_file(self, text_path) -> Dict:
+        """
+        Rebuild one parsed result from its stored OCR text (no Tesseract).
+        Overwrites the matching _parsed.json on success.
+        """
+        text_path = Path(text_path)
+        stem = text_path.name[:-len("_ocr.txt")]
+        output_path = text_path.with_name(f"{stem}_parsed.json")
+        
+        previous = {}
+        if output_path.exists():
+            try:
+                with open(output_path, 'r', encoding='utf-8') as f:
+                    previous = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                previous = {}
+        
+        text = text_path.read_text(encoding='utf-8')
+        table = None
+        table_path = text_path.with_name(f"{stem}_table.json")
+        if table_path.exists():
+            with open(table_path, 'r', encoding='utf-8') as f:
+                table = json.load(f)
+        result = self.process_text(text, previous.get('filename', stem), pages=previous.get('pages'), table=table)
+        if result['success']:
+            result['reparsed'] = True
+            self._write_parsed(result, output_path)
         return result
     
-    def batch_process(self, directory: str, pattern: str = "*.jpg", output_dir: str = None) -> List[Dict]:
-        """Process all matching files in directory."""
-        results = []
+    def reparse(self, parsed_dir: Optional[str] = None, workers: Optional[int] = 1,
+                progress: Optional[Callable[[int, int, Dict], None]] = None) -> List[Dict]:
+        """
+        Re-parse and re-categorize every stored OCR text with the current
+        parsers and learned patterns, regenerating the _parsed.json files.
+        
+        Args:
+            parsed_dir: Folder with <name>_ocr.txt files (default: boogasi_ai_data/parsed)
+            workers: Worker processes (1 = sequential in this process, None = one per CPU)
+            progress: Optional callback(done, total, result) called as each file finishes
+        
+        Returns:
+            Results in file-name order
+        """
+        parsed_dir = Path(parsed_dir) if parsed_dir else self.data_dir / 'parsed'
+        files = sorted(parsed_dir.glob("*_ocr.txt"))
+        
+        workers = workers or os.cpu_count() or 1
+        workers = max(1, min(workers, len(files)))
+        print(f"\n🔁 Re-parsing {len(files)} stored OCR texts from {parsed_dir}"
+              + (f" with {workers} workers" if workers > 1 else ""))
+        
+        results = [None] * len(files)
+        if workers == 1:
+            for done, text_path in enumerate(files, 1):
+                results[done - 1] = self.reparse_file(text_path)
+                if progress:
+                    progress(done, len(files), results[done - 1])
+            return results
+        
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_reparse_worker,
+            initargs=(self.patterns_file,),
+        ) as pool:
+            futures = {pool.submit(_reparse_worker_process, str(f)): i for i, f in enumerate(files)}
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                results[i] = future.result()
+                status = "✓" if results[i].get('success') else "❌"
+                print(f"   [{done}/{len(files)}] {status} {files[i].name}")
+                if progress:
+                    progress(done, len(files), results[i])
+        
+        return results
+    
+    def batch_process(self, directory: str, pattern: str = "*.jpg", output_dir: str = None,
+                      workers: Optional[int] = 1, tesseract_threads: Optional[int] = None,
+                      progress: Optional[Callable[[int, int, Dict], None]] = None,
+                      incremental: bool = False, jsonl: Optional[bool] = None) -> List[Dict]:
+        """
+        Process all matching files in directory.
+        
+        Args:
+            directory: Folder to scan
+            pattern: Glob pattern ("*.jpg" means all supported image/PDF types)
+            output_dir: Optional folder for an extra copy of each parsed result
+            workers: Worker processes (1 = sequential in this process, None = one per CPU)
+            tesseract_threads: OMP_THREAD_LIMIT for tesseract inside workers; defaults
+                               to 1 when running in parallel so processes don't oversubscribe cores
+            progress: Optional callback(done, total, result) called as each file finishes
+            incremental: Skip files the batch manifest shows as unchanged since their
+                         last successful run; their previous parsed output is returned
+            jsonl: Collect this run's results in one compact batch_<timestamp>.jsonl
+                   (in output_dir, else parsed/) instead of a copy per document in
+                   output_dir (default: BOOGASI_OUTPUT_JSONL=1 enables it)
+        
+        Parsed results are saved by one OutputWriter in this process: serialized
+        once, written off the OCR workers, renamed into place.
+        
+        Returns:
+            Results in file-name order, regardless of completion order
+        """
         directory = Path(directory)
         if output_dir:
             output_dir = Path(output_dir)
@@ -853,25 +1912,134 @@ class BoogasiOCRSystem:
                 files.extend(list(directory.glob(p)))
         else:
             files = list(directory.glob(pattern))
+        files = sorted(set(files))
+        results = [None] * len(files)
+        
+        manifest = None
+        pending = list(range(len(files)))
+        if incremental:
+            manifest = BatchManifest(self.manifest_path, self.result_settings())
+            pending = []
+            for i, file_path in enumerate(files):
+                previous = self._load_unchanged(manifest, file_path)
+                if previous is None:
+                    pending.append(i)
+                else:
+                    results[i] = previous
+            print(f"\n⏭️  {len(files) - len(pending)} unchanged files skipped (batch manifest)")
+        
+        workers = workers or os.cpu_count() or 1
+        workers = max(1, min(workers, len(pending)))
+        print(f"\n📂 Batch processing {len(pending)} files from {directory}"
+              + (f" with {workers} workers" if workers > 1 else ""))
+        
+        if jsonl is None:
+            jsonl = os.environ.get('BOOGASI_OUTPUT_JSONL', '').lower() in ('1', 'true', 'yes', 'on')
+        jsonl_path = None
+        if jsonl and pending:
+            jsonl_path = (output_dir or self.data_dir / 'parsed') / f"batch_{datetime.now():%Y%m%dT%H%M%S}.jsonl"
+        writer = OutputWriter(jsonl_path=jsonl_path)
+        
+        def finish(done: int, i: int, result: Dict):
+            self._save_batch_output(writer, result, files[i], None if jsonl else output_dir)
+            if manifest is not None and result.get('success'):
+                manifest.record(files[i], self.parsed_output_path(files[i]))
+            results[i] = result
+            if progress:
+                progress(done, len(pending), result)
         
-        print(f"\n📂 Batch processing {len(files)} files from {directory}")
-        
-        for file_path in files:
-            print(f"\n📄 Processing: {file_path.name}")
-            print(f"   Type: {file_path.suffix}")
-            
-            result = self.process_document(str(file_path))
+        try:
+            if workers == 1:
+                for done, i in enumerate(pending, 1):
+                    print(f"\n📄 Processing: {files[i].name}")
+                    print(f"   Type: {files[i].suffix}")
+                    finish(done, i, self.process_document(str(files[i]), write_parsed=False))
+                return results
             
-            if result.get('success') and output_dir:
-                # Save parsed result to output directory
-                output_path = output_dir / f"{file_path.stem}_parsed.json"
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(result, f, indent=2, ensure_ascii=False)
-                print(f"   ✓ Saved to: {output_path.relative_to(output_dir.parent)}")
+            if tesseract_threads is None:
+                tesseract_threads = 1
             
-            results.append(result)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_batch_worker,
+                initargs=(self.tesseract_path, self.patterns_file, tesseract_threads, self.worker_options),
+            ) as pool:
+                futures = {pool.submit(_batch_worker_process, str(files[i])): i for i in pending}
+                for done, future in enumerate(as_completed(futures), 1):
+                    i = futures[future]
+                    result = future.result()
+                    # Workers have their own process memory: schedule insights here
+                    if (self.insight_precomputer is not None and result.get('success')
+                            and result.get('data', {}).get('transactions')):
+                        result['document_id'] = self.insight_precomputer.schedule(result['data']['transactions'])
+                    finish(done, i, result)
+                    status = "✓" if result.get('success') else "❌"
+                    print(f"   [{done}/{len(pending)}] {status} {files[i].name}")
             
-        return results
+            return results
+        finally:
+            # Every parsed file is on disk before the manifest points at it
+            writer.close()
+            if jsonl_path is not None and writer.written:
+                print(f"   ✓ Batch results: {jsonl_path}")
+            # Saved even when interrupted, so finished files are not redone next run
+            if manifest is not None:
+                manifest.save()
+    
+    def _load_unchanged(self, manifest: BatchManifest, file_path: Path) -> Optional[Dict]:
+        """Previous parsed result of an unchanged file, or None if it must be processed."""
+        output_path = manifest.unchanged_output(file_path)
+        if output_path is None:
+            return None
+        try:
+            with open(output_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+    
+    def _save_batch_output(self, writer: OutputWriter, result: Dict, file_path: Path,
+                           output_dir: Optional[Path]):
+        """Queue a successful result for parsed/ and, when given, a copy in output_dir."""
+        if not result.get('success'):
+            return
+        paths = [self.parsed_output_path(file_path)]
+        if output_dir:
+            paths.append(output_dir / f"{file_path.stem}_parsed.json")
+        writer.write(result, paths)
+
+
+# Parallel batch workers: each process builds its own OCR system once
+_batch_system = None
+
+
+def _init_batch_worker(tesseract_path: Optional[str], patterns_file: str, tesseract_threads: Optional[int],
+                       options: Optional[Dict] = None):
+    global _batch_system
+    if tesseract_threads:
+        # Tesseract's own OpenMP threads would multiply with our worker processes
+        os.environ['OMP_THREAD_LIMIT'] = str(tesseract_threads)
+    _batch_system = BoogasiOCRSystem(tesseract_path=tesseract_path, patterns_file=patterns_file,
+                                     **(options or {}))
+
+
+def _batch_worker_process(file_path: str) -> Dict:
+    try:
+        # Parsed JSON is saved by the parent's OutputWriter
+        return _batch_system.process_document(file_path, write_parsed=False)
+    except Exception as e:
+        return {"success": False, "filename": Path(file_path).name, "error": str(e)}
+
+
+def _init_reparse_worker(patterns_file: str):
+    global _batch_system
+    _batch_system = BoogasiOCRSystem(patterns_file=patterns_file, load_ocr=False)
+
+
+def _reparse_worker_process(text_path: str) -> Dict:
+    try:
+        return _batch_system.reparse_file(text_path)
+    except Exception as e:
+        return {"success": False, "filename": Path(text_path).name, "error": str(e)}
 
 
 # Demo usage
@@ -0,0 +1,119 @@
+"""
+Boogasi Financial Assistant AI - Output writer
+Background stage that saves parsed results for batch runs and the ingestion
+daemon, so OCR workers hand results over and move on to the next document.
+
+ - Each result is serialized once; the same bytes go to every destination
+   (parsed/<stem>_parsed.json, an extra output_dir copy, the batch JSONL)
+ - Files are written to a temp file and renamed into place, so readers never
+   see a partial result
+ - With jsonl, results are also appended as compact lines to one file per
+   batch (batch_<timestamp>.jsonl) instead of one pretty-printed copy per
+   document; the batch file is renamed into place when the batch closes.
+   Per-document files then use the same compact bytes.
+
+Usage:
+    with OutputWriter(jsonl_path=output_dir / "batch_20240607T101500.jsonl") as writer:
+        writer.write(result, [system.parsed_output_path(file_path)])
+    # leaving the block waits for every queued write
+
+Environment:
+ - BOOGASI_OUTPUT_COMPACT   1 writes per-document JSON without indentation
+"""
+
+import json
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    from .ocr_cache import write_bytes_atomic
+    from .result_builder import dumps
+except ImportError:  # imported as a top-level module (scripts in this folder)
+    from ocr_cache import write_bytes_atomic
+    from result_builder import dumps
+
+# Results waiting to be written; producers block beyond this (bounded memory)
+DEFAULT_MAX_PENDING = 64
+
+
+class OutputWriter:
+    """Writes results on a background thread, in submission order."""
+
+    def __init__(self, jsonl_path: Optional[Path] = None, compact: Optional[bool] = None,
+                 max_pending: int = DEFAULT_MAX_PENDING):
+        """
+        Args:
+            jsonl_path: Also append every result to this JSONL file (renamed into
+                        place by close(); implies compact)
+            compact: Per-document JSON without indentation (default: BOOGASI_OUTPUT_COMPACT)
+            max_pending: Queued results before write() blocks
+        """
+        if compact is None:
+            compact = os.environ.get('BOOGASI_OUTPUT_COMPACT', '').lower() in ('1', 'true', 'yes', 'on')
+        self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+        self.compact = compact or self.jsonl_path is not None
+        self.written = 0
+        self.errors = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._jsonl = None
+        self._jsonl_tmp = None
+        self._thread = threading.Thread(target=self._run, name="output-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, result: Dict, paths: List[Path]) -> Future:
+        """
+        Queue a result for paths (duplicates are written once) and the batch JSONL.
+        The future resolves when it is on disk (or holds the write error).
+        """
+        future = Future()
+        unique = list(dict.fromkeys(Path(p).resolve() for p in paths))
+        self._queue.put((result, unique, future))
+        return future
+
+    def _serialize(self, result: Dict) -> bytes:
+        if self.compact:
+            return dumps(result)
+        return json.dumps(result, indent=2, ensure_ascii=False).encode('utf-8')
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            result, paths, future = item
+            try:
+                data = self._serialize(result)
+                for path in paths:
+                    write_bytes_atomic(path, data)
+                if self.jsonl_path is not None:
+                    if self._jsonl is None:
+                        self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+                        self._jsonl_tmp = self.jsonl_path.with_name(f".{self.jsonl_path.name}.tmp")
+                        self._jsonl = open(self._jsonl_tmp, 'wb')
+                    self._jsonl.write(data + b"\n")
+                self.written += 1
+                future.set_result(paths)
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️  Could not save {result.get('filename', 'result')}: {e}")
+                future.set_exception(e)
+
+    def close(self):
+        """Wait for queued writes, then move the batch JSONL into place."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self._jsonl is not None:
+            self._jsonl.close()
+            os.replace(self._jsonl_tmp, self.jsonl_path)
+            self._jsonl = None
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
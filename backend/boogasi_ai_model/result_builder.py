@@ -0,0 +1,136 @@
+"""
+result_builder.py
+
+Column-wise construction of JSON-ready insight outputs.
+Functions:
+ - format_dates(values, fallback, with_time)  # datetime column -> list of strings
+ - column_values(values, decimals)            # any column -> list of native Python values
+ - build_records(columns)                     # dict of equal-length columns -> list of dicts
+ - frame_to_records(df)                       # DataFrame -> JSON-ready records
+ - dumps(obj)                                 # bytes; uses orjson when installed
+
+Everything here works on whole columns (NumPy arrays / pandas Series) so
+building a large response costs one pass per column instead of one
+Python-level conversion per row and field.
+
+Requires: pandas, numpy (orjson optional)
+"""
+from __future__ import annotations
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _as_series(values: Any) -> pd.Series:
+    if isinstance(values, pd.Series):
+        return values.reset_index(drop=True)
+    if isinstance(values, pd.Index):
+        return pd.Series(values)
+    return pd.Series(list(values) if not isinstance(values, np.ndarray) else values)
+
+
+def format_dates(values: Any, fallback: Any = None, with_time: bool = False) -> List[Optional[str]]:
+    """
+    Format a datetime-like column as 'YYYY-MM-DD' (or ISO 'YYYY-MM-DDTHH:MM:SS').
+    Missing/unparseable entries take `fallback`, which may be a scalar or a
+    column of the same length (e.g. the raw date strings).
+    """
+    series = _as_series(values)
+    if series.empty:
+        return []
+    dates = pd.to_datetime(series, errors='coerce')
+    stamps = dates.to_numpy(dtype='datetime64[ns]')
+    text = np.datetime_as_string(stamps, unit='s' if with_time else 'D').astype(object)
+    missing = dates.isna().to_numpy()
+    if missing.any():
+        if isinstance(fallback, (pd.Series, pd.Index, np.ndarray, list, tuple)):
+            fill = np.asarray(column_values(fallback), dtype=object)
+            text[missing] = fill[missing]
+        else:
+            text[missing] = fallback
+    return text.tolist()
+
+
+def column_values(values: Any, decimals: Optional[int] = None) -> List[Any]:
+    """
+    Convert a column to a list of native Python values in one pass.
+    NaN/NaT become None; numeric columns can be rounded column-wise.
+    """
+    series = _as_series(values)
+    if series.empty:
+        return []
+    if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_integer_dtype(series.dtype):
+        return series.tolist()
+    if pd.api.types.is_float_dtype(series.dtype):
+        arr = series.to_numpy(dtype=float)
+        if decimals is not None:
+            arr = np.round(arr, decimals)
+        missing = np.isnan(arr)
+        if not missing.any():
+            return arr.tolist()
+        out = arr.astype(object)
+        out[missing] = None
+        return out.tolist()
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return format_dates(series, with_time=True)
+    out = series.to_numpy(dtype=object)
+    missing = pd.isna(out)
+    if missing.any():
+        out = out.copy()
+        out[missing] = None
+    return [v.item() if isinstance(v, np.generic) else v for v in out.tolist()]
+
+
+def build_records(columns: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Zip equal-length columns into a list of record dicts."""
+    keys = list(columns.keys())
+    cols = [c.tolist() if hasattr(c, 'tolist') else list(c) for c in columns.values()]
+    return [dict(zip(keys, row)) for row in zip(*cols)]
+
+
+def frame_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    JSON-ready replacement for df.to_dict('records'): datetime columns become
+    ISO strings, NaN/NaT become None and NumPy scalars become Python values.
+    """
+    if df.empty:
+        return []
+    return build_records({str(name): column_values(df[name]) for name in df.columns})
+
+
+def _default(obj: Any) -> Any:
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize a response payload to compact UTF-8 JSON (orjson if available)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            obj,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(
+        obj,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
@@ -0,0 +1,238 @@
+"""
+tracing.py
+
+Opt-in, lightweight span/timing API for the OCR -> parse -> insights pipeline.
+
+Usage:
+    from tracing import trace, span, traced
+
+    with trace("process_document") as root:      # start recording
+        with span("ocr.page", page=1) as s:       # nested timing
+            ...
+            s.set(items=42)                       # item counts / attributes
+    print(root.to_dict())
+
+    @traced("parser.parse", items=lambda result: len(result["transactions"]))
+    def parse(...): ...
+
+Spans are only recorded inside an active trace(). Without one, span() and
+@traced cost a single ContextVar lookup and return a shared no-op object,
+so instrumentation can stay in hot paths.
+
+Environment:
+ - BOOGASI_TRACE=1         record a trace for every auto_trace() root (CLI runs, every API request)
+ - BOOGASI_TRACE_DIR=path  where auto_trace() writes JSON trace files (default: ./traces)
+ - BOOGASI_TRACE_HEADER=1  API clients may request a trace with `X-Boogasi-Trace: 1`
+                           (debug only: the header exposes file names and stage timings)
+"""
+
+import functools
+import json
+import os
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+TRACE_ENABLED = os.environ.get("BOOGASI_TRACE", "").lower() in ("1", "true", "yes", "on")
+TRACE_DIR = Path(os.environ.get("BOOGASI_TRACE_DIR", "traces"))
+TRACE_HEADER_ENABLED = os.environ.get("BOOGASI_TRACE_HEADER", "").lower() in ("1", "true", "yes", "on")
+
+_current: ContextVar[Optional["Span"]] = ContextVar("boogasi_trace_span", default=None)
+
+
+class Span:
+    """A timed node in a trace tree."""
+
+    __slots__ = ("name", "attrs", "children", "calls", "duration", "_start", "_token", "_parent", "_aggregate")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, aggregate: bool = False, **attrs):
+        self.name = name
+        self.attrs: Dict[str, Any] = attrs
+        self.children: List[Span] = []
+        self.calls = 1
+        self.duration = 0.0
+        self._start = 0.0
+        self._token = None
+        self._parent = parent
+        self._aggregate = aggregate
+
+    def set(self, **attrs) -> "Span":
+        """Attach attributes such as item counts (items=..., pages=...)."""
+        self.attrs.update(attrs)
+        return self
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration = time.perf_counter() - self._start
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        parent = self._parent
+        if parent is not None:
+            if self._aggregate:
+                # Fold repeated calls (e.g. per-transaction categorization) into one node
+                for sibling in parent.children:
+                    if sibling.name == self.name and sibling._aggregate:
+                        sibling.calls += 1
+                        sibling.duration += self.duration
+                        for key, value in self.attrs.items():
+                            if isinstance(value, (int, float)) and isinstance(sibling.attrs.get(key), (int, float)):
+                                sibling.attrs[key] += value
+                        return False
+            parent.children.append(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        node = {"name": self.name, "ms": round(self.duration * 1000, 3)}
+        if self.calls > 1:
+            node["calls"] = self.calls
+        if self.attrs:
+            node.update(self.attrs)
+        if self.children:
+            node["children"] = [child.to_dict() for child in self.children]
+        return node
+
+
+class _NoopSpan:
+    """Returned when no trace is active; every operation is a no-op."""
+
+    __slots__ = ()
+
+    def set(self, **attrs) -> "_NoopSpan":
+        return self
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def is_tracing() -> bool:
+    """True when called inside an active trace."""
+    return _current.get() is not None
+
+
+def current_span():
+    """The innermost active span, or the no-op span."""
+    return _current.get() or NOOP_SPAN
+
+
+def span(name: str, aggregate: bool = False, **attrs):
+    """
+    Time a nested pipeline step.
+
+    Args:
+        name: Stage name, e.g. "ocr.extract_from_image"
+        aggregate: Merge repeated sibling calls into one node with a call count
+        **attrs: Initial attributes (page numbers, file names, ...)
+    """
+    parent = _current.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(name, parent, aggregate, **attrs)
+
+
+def trace(name: str, dump_dir: Optional[Path] = None, **attrs) -> "_Trace":
+    """Start recording a new trace tree rooted at `name`."""
+    return _Trace(name, dump_dir, attrs)
+
+
+class _Trace:
+    def __init__(self, name: str, dump_dir: Optional[Path], attrs: Dict[str, Any]):
+        self.root = Span(name, None, False, **attrs)
+        self.dump_dir = dump_dir
+
+    def __enter__(self) -> Span:
+        self.root.attrs.setdefault("started_at", datetime.now().isoformat())
+        return self.root.__enter__()
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.root.__exit__(exc_type, exc, tb)
+        if self.dump_dir is not None:
+            try:
+                dump_trace(self.root, self.dump_dir)
+            except OSError as e:
+                print(f"⚠️ Warning: Could not write trace file: {e}")
+        return False
+
+
+def auto_trace(name: str, **attrs):
+    """
+    Nested span when already tracing; a new trace dumped to TRACE_DIR when
+    BOOGASI_TRACE is set; otherwise the no-op span.
+    """
+    if _current.get() is not None:
+        return span(name, **attrs)
+    if TRACE_ENABLED:
+        return trace(name, dump_dir=TRACE_DIR, **attrs)
+    return NOOP_SPAN
+
+
+def traced(name: Optional[str] = None, items: Optional[Callable[[Any], int]] = None, aggregate: bool = False):
+    """
+    Decorator form of span().
+
+    Args:
+        name: Span name (default: the function's qualified name)
+        items: Optional callable mapping the return value to an item count
+        aggregate: See span()
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            parent = _current.get()
+            if parent is None:
+                return func(*args, **kwargs)
+            with Span(span_name, parent, aggregate) as s:
+                result = func(*args, **kwargs)
+                if items is not None:
+                    try:
+                        s.attrs["items"] = int(items(result))
+                    except Exception:
+                        pass
+                return result
+        return wrapper
+    return decorator
+
+
+def dump_trace(root: Span, directory: Path) -> Path:
+    """Write a trace tree to `directory` as JSON and return the file path."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in root.name)[:60]
+    path = directory / f"trace_{datetime.now():%Y%m%d_%H%M%S_%f}_{safe_name}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(root.to_dict(), f, indent=2, ensure_ascii=False)
+    return path
+
+
+def trace_header_value(root: Span, max_bytes: int = 6000) -> str:
+    """
+    Compact ASCII JSON of a trace tree for a debug response header.
+    Deep levels are dropped until the value fits in max_bytes.
+    """
+    def prune(node: Dict[str, Any], depth: int) -> Dict[str, Any]:
+        node = dict(node)
+        children = node.pop("children", None)
+        if children and depth > 0:
+            node["children"] = [prune(child, depth - 1) for child in children]
+        return node
+
+    tree = root.to_dict()
+    for depth in (32, 4, 2, 1, 0):
+        value = json.dumps(prune(tree, depth), separators=(",", ":"), ensure_ascii=True)
+        if len(value) <= max_bytes:
+            return value
+    return value[:max_bytes]
@@ -0,0 +1,41 @@
+"""
+Gunicorn settings for multi-worker deployment of the Boogasi API.
+
+    gunicorn -c gunicorn.conf.py api:app
+
+preload_app imports api.py once in the master: pandas/numpy, learned_patterns.json,
+model_artifacts.json and the parser's compiled category index are built there,
+then shared copy-on-write by every forked worker instead of being rebuilt per
+worker. Before forking, the master's objects are moved to the GC's permanent
+generation (gc.freeze) so collections in the workers do not touch - and so
+un-share - those pages.
+
+Precomputed insights (InsightPrecomputer) and their document_ids live in the
+worker that processed the upload, so GET /api/documents/{document_id}/insights/...
+only finds them on that worker. The default is therefore one worker; with
+BOOGASI_WORKERS > 1 the load balancer must route a client's requests to the
+same worker (sticky sessions), or those lookups return 404.
+
+Environment:
+ - BOOGASI_BIND     address to bind (default 0.0.0.0:8000)
+ - BOOGASI_WORKERS  worker processes (default 1; more needs sticky routing, see above)
+"""
+import gc
+import os
+
+bind = os.environ.get("BOOGASI_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("BOOGASI_WORKERS", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def when_ready(server):
+    # Everything the app loaded at import is long-lived: collect once, then freeze it
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Preloaded app state frozen ({gc.get_freeze_count()} objects shared with workers)")
+
+
+def pre_fork(server, worker):
+    # Covers objects created in the master after when_ready (e.g. worker restarts)
+    gc.freeze()